@@ -0,0 +1,290 @@
+import asyncio
+import heapq
+import itertools
+import json
+import logging
+import math
+import os
+import re
+import time
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Priority classes, most important first, and the share of ADMISSION_MAX_INFLIGHT each may
+# occupy. Bulk reads are shed first; contribution writes and auth may use every slot.
+PRIORITY_SHARES = {
+    "critical": 1.0,
+    "write": 0.9,
+    "read": 0.75,
+    "bulk_read": 0.5,
+}
+PRIORITY_RANK = {name: rank for rank, name in enumerate(PRIORITY_SHARES)}
+
+ADMISSION_MAX_INFLIGHT = int(os.getenv("ADMISSION_MAX_INFLIGHT", "64"))
+ADMISSION_MAX_QUEUE = int(os.getenv("ADMISSION_MAX_QUEUE", "256"))
+ADMISSION_QUEUE_TIMEOUT = float(os.getenv("ADMISSION_QUEUE_TIMEOUT", "2"))
+
+
+@dataclass
+class RouteRule:
+    name: str
+    method: str
+    path: str  # regex searched against the request path, anchored with $ where needed
+    priority: Optional[str] = "read"  # None exempts the route from admission control
+    max_concurrency: Optional[int] = None
+    rate: Optional[float] = None  # tokens per second
+    burst: Optional[int] = None
+
+    def __post_init__(self):
+        self.pattern = re.compile(self.path)
+
+
+DEFAULT_RULES = [
+    RouteRule("health", "GET", r"^/(health-check)?$", priority=None),
+    # Long-lived event streams would pin a concurrency slot for their whole lifetime
+    RouteRule("live_updates", "GET", r"/projects/\d+/live$", priority=None),
+    RouteRule("contribution_insert", "POST", r"/projects/\d+/contributions$", "critical"),
+    RouteRule("project_add_fund", "PUT", r"/projects/\d+/addFund$", "critical"),
+    RouteRule("auth", "POST", r"/(signin|signout|register)$", "critical", rate=50, burst=100),
+    RouteRule("project_list", "GET", r"/projects$", "bulk_read", max_concurrency=16),
+    RouteRule("project_query", "GET", r"/projects/(query|filter/.*)$", "bulk_read", max_concurrency=16),
+    RouteRule("contribution_list", "GET", r"/projects/\d+/contributions$", "bulk_read", max_concurrency=16),
+    RouteRule("user_list", "GET", r"/users$", "bulk_read", max_concurrency=8),
+    RouteRule("receiver_list", "GET", r"/receivers$", "bulk_read", max_concurrency=8),
+    RouteRule("search", "GET", r"/search$", "bulk_read", max_concurrency=8, rate=100, burst=200),
+    # Exports hold a replica connection and a slot for their whole stream
+    RouteRule("export", "GET", r"/admin/exports/\w+$", "bulk_read", max_concurrency=2),
+]
+
+READ_FALLBACK = RouteRule("default_read", "*", r"", "read")
+WRITE_FALLBACK = RouteRule("default_write", "*", r"", "write")
+
+
+def load_rules() -> List[RouteRule]:
+    """DEFAULT_RULES, or the JSON list of RouteRule fields in ADMISSION_RULES when set."""
+    raw = os.getenv("ADMISSION_RULES")
+    if not raw:
+        return list(DEFAULT_RULES)
+    return [RouteRule(**rule) for rule in json.loads(raw)]
+
+
+class TokenBucket:
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+
+    def take(self) -> float:
+        """Take one token; returns 0 when admitted, else seconds until a token is available."""
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+
+class SharedTokenBucket:
+    """TokenBucket kept in a shared state backend, so ``rate`` holds across all workers together.
+
+    Concurrency limits stay per process: they protect this worker's own threadpool and pool.
+    """
+
+    def __init__(self, store, key: str, rate: float, burst: int):
+        self.store = store
+        self.key = key
+        self.rate = rate
+        self.burst = burst
+
+    def take(self) -> float:
+        return self.store.take_token(self.key, self.rate, self.burst)
+
+
+class PriorityLimiter:
+    """Concurrency limit with a bounded priority queue; higher classes are woken first.
+
+    Runs on the event loop only, so plain counters are enough.
+    """
+
+    def __init__(self, limit: int, max_queue: int, timeout: float, shares: Dict[str, float] = PRIORITY_SHARES):
+        self.limit = limit
+        self.shares = shares
+        self.max_queue = max_queue
+        self.timeout = timeout
+        self.inflight = 0
+        self.queue_depth = 0
+        self._waiters: List[Tuple[int, int, asyncio.Future, str]] = []
+        self._seq = itertools.count()
+
+    def _fits(self, priority: str) -> bool:
+        return self.inflight < self.limit * self.shares[priority]
+
+    async def acquire(self, priority: str) -> bool:
+        if not self.queue_depth and self._fits(priority):
+            self.inflight += 1
+            return True
+        if self.queue_depth >= self.max_queue:
+            return False
+
+        fut = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (PRIORITY_RANK[priority], next(self._seq), fut, priority))
+        self.queue_depth += 1
+        # A higher class may fit even though lower classes are already waiting
+        self._wake()
+        try:
+            return await asyncio.wait_for(fut, self.timeout)
+        except asyncio.TimeoutError:
+            self.queue_depth -= 1
+            return False
+        except asyncio.CancelledError:
+            if fut.done() and not fut.cancelled():
+                self.release()  # granted just before the client went away
+            else:
+                self.queue_depth -= 1
+            raise
+
+    def release(self):
+        self.inflight -= 1
+        self._wake()
+
+    def _wake(self):
+        while self._waiters:
+            _, _, fut, priority = self._waiters[0]
+            if fut.done():  # timed out or cancelled; already uncounted
+                heapq.heappop(self._waiters)
+                continue
+            if not self._fits(priority):
+                break
+            heapq.heappop(self._waiters)
+            self.queue_depth -= 1
+            self.inflight += 1
+            fut.set_result(True)
+
+
+class AdmissionController:
+    def __init__(self, rules: List[RouteRule], state_backend=None):
+        self.rules = rules
+        self.global_limiter = PriorityLimiter(ADMISSION_MAX_INFLIGHT, ADMISSION_MAX_QUEUE, ADMISSION_QUEUE_TIMEOUT)
+        self.route_limiters: Dict[str, PriorityLimiter] = {
+            # a route limit applies in full to its own requests; only ordering uses priority
+            rule.name: PriorityLimiter(
+                rule.max_concurrency, ADMISSION_MAX_QUEUE, ADMISSION_QUEUE_TIMEOUT,
+                shares=dict.fromkeys(PRIORITY_SHARES, 1.0),
+            )
+            for rule in rules if rule.max_concurrency
+        }
+        shared = state_backend is not None and state_backend.shared
+        self.buckets: Dict[str, TokenBucket] = {
+            rule.name: (
+                SharedTokenBucket(state_backend, f"admission:{rule.name}", rule.rate, rule.burst or max(1, int(rule.rate)))
+                if shared else TokenBucket(rule.rate, rule.burst or max(1, int(rule.rate)))
+            )
+            for rule in rules if rule.rate
+        }
+        self.rejected: Dict[Tuple[str, int], int] = {}
+
+    def match(self, method: str, path: str) -> RouteRule:
+        for rule in self.rules:
+            if rule.method in (method, "*") and rule.pattern.search(path):
+                return rule
+        return READ_FALLBACK if method in ("GET", "HEAD") else WRITE_FALLBACK
+
+    def _reject(self, rule: RouteRule, status_code: int, retry_after: float):
+        key = (rule.name, status_code)
+        self.rejected[key] = self.rejected.get(key, 0) + 1
+        return status_code, max(1, math.ceil(retry_after))
+
+    async def admit(self, rule: RouteRule) -> Optional[Tuple[int, int]]:
+        """None when admitted (call release() afterwards), else (status_code, retry_after)."""
+        bucket = self.buckets.get(rule.name)
+        if bucket is not None:
+            if isinstance(bucket, SharedTokenBucket):
+                try:
+                    # Backend round trip; keep it off the event loop
+                    wait = await asyncio.get_running_loop().run_in_executor(None, bucket.take)
+                except Exception as e:
+                    # Fail open: an unavailable state store must not take the API down with it
+                    logger.error(f"Shared rate limit check failed for {rule.name}: {str(e)}")
+                    wait = 0.0
+            else:
+                wait = bucket.take()
+            if wait:
+                return self._reject(rule, 429, wait)
+
+        route_limiter = self.route_limiters.get(rule.name)
+        if route_limiter is not None and not await route_limiter.acquire(rule.priority):
+            return self._reject(rule, 503, route_limiter.timeout)
+        try:
+            admitted = await self.global_limiter.acquire(rule.priority)
+        except BaseException:
+            if route_limiter is not None:
+                route_limiter.release()
+            raise
+        if not admitted:
+            if route_limiter is not None:
+                route_limiter.release()
+            return self._reject(rule, 503, self.global_limiter.timeout)
+        return None
+
+    def release(self, rule: RouteRule):
+        self.global_limiter.release()
+        route_limiter = self.route_limiters.get(rule.name)
+        if route_limiter is not None:
+            route_limiter.release()
+
+    def snapshot(self) -> dict:
+        return {
+            "inflight": self.global_limiter.inflight,
+            "queue_depth": self.global_limiter.queue_depth,
+            "routes": {
+                name: {"inflight": limiter.inflight, "queue_depth": limiter.queue_depth}
+                for name, limiter in self.route_limiters.items()
+            },
+            "rejected": [
+                {"route": name, "status": status_code, "count": count}
+                for (name, status_code), count in self.rejected.items()
+            ],
+        }
+
+
+class AdmissionMiddleware:
+    """ASGI middleware that admits, queues or rejects each HTTP request before routing."""
+
+    def __init__(self, app, controller: AdmissionController):
+        self.app = app
+        self.controller = controller
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        rule = self.controller.match(scope["method"], scope["path"])
+        if rule.priority is None:
+            await self.app(scope, receive, send)
+            return
+
+        rejection = await self.controller.admit(rule)
+        if rejection is not None:
+            status_code, retry_after = rejection
+            body = json.dumps({"statusCode": status_code, "detail": "Server busy, retry later"}).encode()
+            await send({
+                "type": "http.response.start",
+                "status": status_code,
+                "headers": [
+                    (b"content-type", b"application/json"),
+                    (b"content-length", str(len(body)).encode()),
+                    (b"retry-after", str(retry_after).encode()),
+                ],
+            })
+            await send({"type": "http.response.body", "body": body})
+            return
+
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.controller.release(rule)
@@ -0,0 +1,187 @@
+"""Move long soft-deleted projects and their child rows into the *_archive tables.
+
+Runs as a background thread in the app when ARCHIVER_ENABLED=1 (one batch at a
+time across processes thanks to a transaction-level advisory lock), or from the
+command line:
+
+    python archiver.py --once
+    python archiver.py --restore 1234
+"""
+import argparse
+import logging
+import os
+import threading
+from typing import Dict, List, Tuple
+
+from db_utils import get_db_connection
+
+logger = logging.getLogger(__name__)
+
+ARCHIVER_ENABLED = os.getenv("ARCHIVER_ENABLED", "0") == "1"
+ARCHIVE_AFTER_DAYS = int(os.getenv("ARCHIVE_AFTER_DAYS", "30"))
+ARCHIVE_BATCH_SIZE = int(os.getenv("ARCHIVE_BATCH_SIZE", "500"))
+ARCHIVE_INTERVAL_SECONDS = float(os.getenv("ARCHIVE_INTERVAL_SECONDS", "3600"))
+# Arbitrary constant identifying the archiver's pg advisory lock
+ARCHIVE_LOCK_KEY = 4707001
+
+# (live table, archive table, column holding the project id); children before the project
+ARCHIVED_TABLES: Tuple[Tuple[str, str, str], ...] = (
+    ("algo_receivers_transaction", "algo_receivers_transaction_archive", "project_id"),
+    ("algo_receivers", "algo_receivers_archive", "project_id"),
+    ("algo_contributions", "algo_contributions_archive", "project_id"),
+    ("algo_projects", "algo_projects_archive", "id"),
+)
+
+_columns_cache: Dict[str, List[str]] = {}
+
+
+def _insertable_columns(cursor, table: str) -> List[str]:
+    """Non-generated columns of a live table; read once, so later migrations are picked up on restart."""
+    if table not in _columns_cache:
+        cursor.execute('''
+            SELECT column_name FROM information_schema.columns
+            WHERE table_schema = current_schema() AND table_name = %s AND is_generated = 'NEVER'
+            ORDER BY ordinal_position;
+        ''', (table,))
+        _columns_cache[table] = [row[0] for row in cursor.fetchall()]
+    return _columns_cache[table]
+
+
+def _move(cursor, source: str, target: str, key: str, project_ids: List[int], columns: List[str]) -> int:
+    column_list = ", ".join(columns)
+    cursor.execute(f'''
+        WITH moved AS (
+            DELETE FROM {source} WHERE {key} = ANY(%s) RETURNING {column_list}
+        )
+        INSERT INTO {target} ({column_list}) SELECT {column_list} FROM moved;
+    ''', (project_ids,))
+    return cursor.rowcount
+
+
+def archive_batch(conn, older_than_days: int = ARCHIVE_AFTER_DAYS, batch_size: int = ARCHIVE_BATCH_SIZE) -> int:
+    """Archive up to ``batch_size`` projects in one transaction; returns how many were moved.
+
+    Returns 0 without doing anything while another archiver is mid-batch.
+    """
+    cursor = conn.cursor()
+    try:
+        # Transaction-scoped, so commit or rollback releases it even if this connection is
+        # reused afterwards; a session lock left on a pooled connection would block every
+        # later archiver run in the whole fleet.
+        cursor.execute("SELECT pg_try_advisory_xact_lock(%s);", (ARCHIVE_LOCK_KEY,))
+        if not cursor.fetchone()[0]:
+            conn.rollback()
+            return 0
+        cursor.execute('''
+            SELECT id FROM algo_projects
+            WHERE deleted_at IS NOT NULL AND deleted_at < NOW() - make_interval(days => %s)
+            ORDER BY deleted_at, id
+            LIMIT %s
+            FOR UPDATE SKIP LOCKED;
+        ''', (older_than_days, batch_size))
+        project_ids = [row[0] for row in cursor.fetchall()]
+        if not project_ids:
+            conn.rollback()
+            return 0
+
+        for live, archive, key in ARCHIVED_TABLES:
+            _move(cursor, live, archive, key, project_ids, _insertable_columns(cursor, live))
+        conn.commit()
+        return len(project_ids)
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cursor.close()
+
+
+def archive_deleted_projects(older_than_days: int = ARCHIVE_AFTER_DAYS, batch_size: int = ARCHIVE_BATCH_SIZE) -> int:
+    """Archive every eligible project in batches; stops early if another process is archiving."""
+    conn = get_db_connection()
+    total = 0
+    try:
+        while True:
+            moved = archive_batch(conn, older_than_days, batch_size)
+            total += moved
+            if moved < batch_size:
+                break
+        if total:
+            logger.info(f"Archived {total} projects deleted more than {older_than_days} days ago")
+        return total
+    finally:
+        conn.close()
+
+
+def restore_project(project_id: int, undelete: bool = True) -> bool:
+    """Move an archived project and its child rows back; False if it is not in the archive."""
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    try:
+        cursor.execute("SELECT 1 FROM algo_projects_archive WHERE id = %s FOR UPDATE;", (project_id,))
+        if cursor.fetchone() is None:
+            conn.rollback()
+            return False
+        for live, archive, key in reversed(ARCHIVED_TABLES):
+            _move(cursor, archive, live, key, [project_id], _insertable_columns(cursor, live))
+        if undelete:
+            cursor.execute("UPDATE algo_projects SET deleted_at = NULL, updated_at = NOW() WHERE id = %s;", (project_id,))
+        conn.commit()
+        return True
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cursor.close()
+        conn.close()
+
+
+class Archiver:
+    def __init__(self, interval: float = ARCHIVE_INTERVAL_SECONDS):
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self._thread is None:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="project-archiver", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=30)
+            self._thread = None
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                archive_deleted_projects()
+            except Exception as e:
+                logger.error(f"Project archiver failed: {str(e)}")
+
+
+archiver = Archiver()
+
+
+def main():
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser()
+    group = parser.add_mutually_exclusive_group(required=True)
+    group.add_argument("--once", action="store_true", help="archive every eligible project now")
+    group.add_argument("--restore", type=int, metavar="PROJECT_ID", help="move a project back from the archive")
+    parser.add_argument("--days", type=int, default=ARCHIVE_AFTER_DAYS)
+    parser.add_argument("--batch-size", type=int, default=ARCHIVE_BATCH_SIZE)
+    parser.add_argument("--keep-deleted", action="store_true", help="with --restore: leave deleted_at set")
+    args = parser.parse_args()
+
+    if args.once:
+        print(f"archived {archive_deleted_projects(args.days, args.batch_size)} projects")
+    elif restore_project(args.restore, undelete=not args.keep_deleted):
+        print(f"restored project {args.restore}")
+    else:
+        raise SystemExit(f"project {args.restore} is not archived")
+
+
+if __name__ == "__main__":
+    main()
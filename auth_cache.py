@@ -0,0 +1,96 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+REVOKED_NAMESPACE = "revoked_jwt"
+
+
+def token_digest(token: str) -> bytes:
+    return hashlib.sha256(token.encode("utf-8")).digest()
+
+
+class VerifiedTokenCache:
+    """Bounded LRU of already-verified JWTs: sha256(token) -> (user_id, exp).
+
+    Entries are dropped once ``exp`` has passed so an expired token always goes
+    back through ``jwt.decode`` and fails there. Revoked digests are kept until
+    their own ``exp`` so a revoked token cannot be re-admitted on a cache miss.
+
+    With a shared ``store`` (see state_backend) revocations are also written
+    there, and every ``sync_interval`` seconds the cache pulls revocations made
+    by other workers and evicts those tokens.
+    """
+
+    def __init__(self, maxsize: int = 10000, store=None, sync_interval: float = 5.0):
+        self.maxsize = maxsize
+        self.store = store if store is not None and store.shared else None
+        self.sync_interval = sync_interval
+        self._synced_at = 0.0
+        self._entries: "OrderedDict[bytes, Tuple[Any, float]]" = OrderedDict()
+        self._revoked: Dict[bytes, float] = {}
+        self._lock = threading.Lock()
+
+    def sync(self):
+        """Pull revocations made by other workers into this process."""
+        self._synced_at = time.time()
+        revoked = {bytes.fromhex(key): float(exp) for key, exp in self.store.items(REVOKED_NAMESPACE).items()}
+        with self._lock:
+            for digest, exp in revoked.items():
+                self._entries.pop(digest, None)
+                self._revoked[digest] = exp
+
+    def get(self, token: str) -> Optional[Any]:
+        if self.store is not None and time.time() - self._synced_at > self.sync_interval:
+            self.sync()
+        digest = token_digest(token)
+        with self._lock:
+            entry = self._entries.get(digest)
+            if entry is None:
+                return None
+            user_id, exp = entry
+            if exp <= time.time():
+                del self._entries[digest]
+                return None
+            self._entries.move_to_end(digest)
+            return user_id
+
+    def put(self, token: str, user_id: Any, exp: float):
+        digest = token_digest(token)
+        with self._lock:
+            if digest in self._revoked:
+                return
+            self._entries[digest] = (user_id, exp)
+            self._entries.move_to_end(digest)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def is_revoked(self, token: str) -> bool:
+        digest = token_digest(token)
+        with self._lock:
+            exp = self._revoked.get(digest)
+            if exp is not None and exp <= time.time():
+                del self._revoked[digest]
+                exp = None
+        if exp is not None:
+            return True
+        # Only reached on a cache miss, so the shared lookup is paid once per token and worker
+        return self.store is not None and self.store.get(REVOKED_NAMESPACE, digest.hex()) is not None
+
+    def revoke(self, token: str, exp: float):
+        digest = token_digest(token)
+        now = time.time()
+        if self.store is not None and exp > now:
+            self.store.set(REVOKED_NAMESPACE, digest.hex(), str(exp), ttl=exp - now)
+        with self._lock:
+            self._entries.pop(digest, None)
+            if exp > now:
+                self._revoked[digest] = exp
+            for expired in [d for d, e in self._revoked.items() if e <= now]:
+                del self._revoked[expired]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._revoked.clear()
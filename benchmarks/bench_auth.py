@@ -0,0 +1,63 @@
+"""Per-request cost of get_current_user's token check with and without VerifiedTokenCache.
+
+Run from the repository root:
+
+    python benchmarks/bench_auth.py --requests 100000 --tokens 500
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+import jwt
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from auth_cache import VerifiedTokenCache  # noqa: E402
+
+SECRET_KEY = "bench-secret"
+
+
+def verify_uncached(token):
+    payload = jwt.decode(token, SECRET_KEY, algorithms=["HS256"])
+    return payload.get("sub")
+
+
+def make_verify_cached(cache):
+    def verify(token):
+        user_id = cache.get(token)
+        if user_id is not None:
+            return user_id
+        if cache.is_revoked(token):
+            raise PermissionError("revoked")
+        payload = jwt.decode(token, SECRET_KEY, algorithms=["HS256"])
+        cache.put(token, payload.get("sub"), payload["exp"])
+        return payload.get("sub")
+    return verify
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=100000)
+    parser.add_argument("--tokens", type=int, default=500, help="distinct live sessions")
+    args = parser.parse_args()
+
+    exp = datetime.utcnow() + timedelta(minutes=60)
+    tokens = [jwt.encode({"sub": str(i), "exp": exp}, SECRET_KEY, algorithm="HS256") for i in range(args.tokens)]
+    traffic = [random.choice(tokens) for _ in range(args.requests)]
+
+    for name, verify in (
+        ("jwt.decode every request", verify_uncached),
+        ("VerifiedTokenCache", make_verify_cached(VerifiedTokenCache())),
+    ):
+        start = time.perf_counter()
+        for token in traffic:
+            verify(token)
+        elapsed = time.perf_counter() - start
+        print(f"{name:26s} {elapsed / args.requests * 1e6:8.2f} us/request")
+
+
+if __name__ == "__main__":
+    main()
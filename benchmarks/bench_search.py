@@ -0,0 +1,143 @@
+"""Latency of the /search query on a synthetic 1M-row catalogue.
+
+Seeds an isolated ``bench_search`` schema (the real tables are never touched)
+with projects and funds shaped like algo_projects/algo_funds, builds the same
+generated tsvector columns and GIN indexes as migrations/001, then times the
+ranked search against an ILIKE scan baseline.
+
+    DB_HOST=... DB_NAME=... python benchmarks/bench_search.py --projects 1000000
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from db_utils import get_db_connection  # noqa: E402
+
+WORDS = [
+    "water", "school", "clinic", "solar", "farm", "library", "bridge", "forest", "river", "village",
+    "hoc", "bong", "nuoc", "sach", "truong", "benh", "vien", "nong", "dan", "mua",
+]
+
+SEED_SQL = '''
+DROP SCHEMA IF EXISTS bench_search CASCADE;
+CREATE SCHEMA bench_search;
+
+CREATE TABLE bench_search.algo_funds (
+    id SERIAL PRIMARY KEY,
+    name_fund TEXT,
+    description TEXT,
+    logo TEXT,
+    deleted_at TIMESTAMP,
+    search_vector tsvector GENERATED ALWAYS AS (
+        setweight(to_tsvector('simple', coalesce(name_fund, '')), 'A') ||
+        setweight(to_tsvector('simple', coalesce(description, '')), 'B')
+    ) STORED
+);
+
+CREATE TABLE bench_search.algo_projects (
+    id SERIAL PRIMARY KEY,
+    name TEXT,
+    description TEXT,
+    fund_id INT,
+    deleted_at TIMESTAMP,
+    search_vector tsvector GENERATED ALWAYS AS (
+        setweight(to_tsvector('simple', coalesce(name, '')), 'A') ||
+        setweight(to_tsvector('simple', coalesce(description, '')), 'B')
+    ) STORED
+);
+
+INSERT INTO bench_search.algo_funds (name_fund, description)
+SELECT 'Fund ' || w1 || ' ' || g, 'Supporting ' || w1 || ' and ' || w2 || ' projects ' || g
+FROM generate_series(1, %(funds)s) g,
+     LATERAL (SELECT (%(words)s)[1 + (g * 7) %% %(nwords)s] AS w1, (%(words)s)[1 + (g * 13) %% %(nwords)s] AS w2) w;
+
+INSERT INTO bench_search.algo_projects (name, description, fund_id, deleted_at)
+SELECT initcap(w1) || ' ' || w2 || ' ' || g,
+       'Project to build ' || w1 || ' ' || w2 || ' ' || w3 || ' for the community, batch ' || (g %% 1000),
+       1 + g %% %(funds)s,
+       CASE WHEN g %% 20 = 0 THEN NOW() END
+FROM generate_series(1, %(projects)s) g,
+     LATERAL (SELECT (%(words)s)[1 + (g * 3) %% %(nwords)s] AS w1,
+                     (%(words)s)[1 + (g * 11) %% %(nwords)s] AS w2,
+                     (%(words)s)[1 + (g * 17) %% %(nwords)s] AS w3) w;
+
+CREATE INDEX ON bench_search.algo_projects USING GIN (search_vector) WHERE deleted_at IS NULL;
+CREATE INDEX ON bench_search.algo_funds USING GIN (search_vector) WHERE deleted_at IS NULL;
+ANALYZE bench_search.algo_projects;
+ANALYZE bench_search.algo_funds;
+'''
+
+SEARCH_SQL = '''
+WITH q AS (SELECT websearch_to_tsquery('simple', %s) AS query)
+SELECT 'project' AS kind, p.id, p.name, ts_rank(p.search_vector, q.query) AS rank
+FROM bench_search.algo_projects p, q
+WHERE p.search_vector @@ q.query AND p.deleted_at IS NULL
+UNION ALL
+SELECT 'fund', f.id, f.name_fund, ts_rank(f.search_vector, q.query)
+FROM bench_search.algo_funds f, q
+WHERE f.search_vector @@ q.query AND f.deleted_at IS NULL
+ORDER BY rank DESC, id DESC
+LIMIT 20 OFFSET 0
+'''
+
+ILIKE_SQL = '''
+SELECT 'project', p.id, p.name FROM bench_search.algo_projects p
+WHERE (p.name ILIKE %s OR p.description ILIKE %s) AND p.deleted_at IS NULL
+UNION ALL
+SELECT 'fund', f.id, f.name_fund FROM bench_search.algo_funds f
+WHERE (f.name_fund ILIKE %s OR f.description ILIKE %s) AND f.deleted_at IS NULL
+LIMIT 20
+'''
+
+
+def timed(cursor, sql, params, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        cursor.execute(sql, params)
+        cursor.fetchall()
+        samples.append((time.perf_counter() - start) * 1e3)
+    samples.sort()
+    return statistics.median(samples), samples[int(len(samples) * 0.95) - 1]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--projects", type=int, default=1000000)
+    parser.add_argument("--funds", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=50)
+    parser.add_argument("--skip-seed", action="store_true")
+    parser.add_argument("--keep", action="store_true", help="keep the bench_search schema afterwards")
+    args = parser.parse_args()
+
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    try:
+        if not args.skip_seed:
+            start = time.perf_counter()
+            cursor.execute(SEED_SQL, {"funds": args.funds, "projects": args.projects, "words": WORDS, "nwords": len(WORDS)})
+            conn.commit()
+            print(f"seeded {args.projects} projects / {args.funds} funds in {time.perf_counter() - start:.1f}s")
+
+        for term in ("solar", "clinic village", "nuoc sach", "bridge -river"):
+            p50, p95 = timed(cursor, SEARCH_SQL, (term,), args.repeat)
+            print(f"tsvector  {term!r:18s} p50 {p50:8.2f} ms  p95 {p95:8.2f} ms")
+        for term in ("solar", "clinic"):
+            like = f"%{term}%"
+            p50, p95 = timed(cursor, ILIKE_SQL, (like, like, like, like), max(3, args.repeat // 10))
+            print(f"ILIKE     {term!r:18s} p50 {p50:8.2f} ms  p95 {p95:8.2f} ms")
+
+        if not args.keep:
+            cursor.execute("DROP SCHEMA bench_search CASCADE")
+            conn.commit()
+    finally:
+        cursor.close()
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""Per-row serialization cost of the project list endpoints, before and after orjson.
+
+Run from the repository root:
+
+    python benchmarks/bench_serialization.py --rows 20000
+"""
+import argparse
+import os
+import sys
+import timeit
+from datetime import datetime, timedelta
+
+from fastapi.responses import JSONResponse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from serializers import FastJSONResponse, row_mapper  # noqa: E402
+
+project_row_to_dict = row_mapper(
+    "id", "user_id", "name", "description", "fund_id", "current_fund", "fund_raise_total",
+    "fund_raise_count", "deadline", "project_hash", "is_verify", "status",
+    "created_at", "updated_at", "deleted_at", "linkcardImage", "type",
+    "fund_name", "fund_logo", "fund_description"
+)
+
+
+def make_rows(n):
+    now = datetime(2024, 1, 1, 12, 0, 0)
+    return [
+        (
+            i, i % 97, f"Project {i}", "Lorem ipsum dolor sit amet " * 8, i % 13, i * 10, 100000, i % 50,
+            now + timedelta(days=30), f"hash{i:08x}", bool(i % 2), "active",
+            now, now, None, [f"https://cdn.example.com/{i}.png"], "charity",
+            f"Fund {i % 13}", "https://cdn.example.com/logo.png", "Fund description " * 10,
+        )
+        for i in range(n)
+    ]
+
+
+def before(rows):
+    project_list = [{
+        "id": project[0],
+        "user_id": project[1],
+        "name": project[2],
+        "description": project[3],
+        "fund_id": project[4],
+        "current_fund": project[5],
+        "fund_raise_total": project[6],
+        "fund_raise_count": project[7],
+        "deadline": project[8].strftime('%Y-%m-%d %H:%M:%S') if project[8] else None,
+        "project_hash": project[9],
+        "is_verify": project[10],
+        "status": project[11],
+        "linkcardImage": project[15],
+        "type": project[16],
+        "created_at": project[12].strftime('%Y-%m-%d %H:%M:%S') if project[12] else None,
+        "updated_at": project[13].strftime('%Y-%m-%d %H:%M:%S') if project[13] else None,
+        "deleted_at": project[14].strftime('%Y-%m-%d %H:%M:%S') if project[14] else None,
+        "fund_name": project[17],
+        "fund_logo": project[18],
+        "fund_description": project[19]
+    } for project in rows]
+    return JSONResponse(status_code=200, content={"statusCode": 200, "body": project_list}).body
+
+
+def after(rows):
+    project_list = [project_row_to_dict(project) for project in rows]
+    return FastJSONResponse(status_code=200, content={"statusCode": 200, "body": project_list}).body
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    rows = make_rows(args.rows)
+    for name, fn in (("before (dict + strftime + json)", before), ("after (row_mapper + orjson)", after)):
+        best = min(timeit.repeat(lambda: fn(rows), number=1, repeat=args.repeat))
+        print(f"{name:36s} {best * 1e3:9.2f} ms total  {best / args.rows * 1e6:7.2f} us/row")
+
+
+if __name__ == "__main__":
+    main()
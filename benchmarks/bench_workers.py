@@ -0,0 +1,99 @@
+"""Throughput and latency of one scenario as the gunicorn worker count grows.
+
+Needs a seeded database (python loadtest/seed.py --reset). Run from the repository root:
+
+    python benchmarks/bench_workers.py --workers 1 2 4 --scenario browsing --duration 20
+"""
+import argparse
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+
+import requests
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from loadtest import stubs  # noqa: E402
+from loadtest.run import SCENARIOS, Context, run_scenario, sign_in_pool  # noqa: E402
+
+
+def start_gunicorn(workers, port, stub_port, state_path):
+    env = dict(os.environ)
+    env.setdefault("API_TOKEN", "loadtest")
+    env.setdefault("GOOGLE_API_KEY", "loadtest")
+    env["ALGOD_ADDRESS"] = f"http://127.0.0.1:{stub_port}"
+    env["PROXY_PREFIX"] = ""
+    env["WEB_CONCURRENCY"] = str(workers)
+    env["BIND"] = f"127.0.0.1:{port}"
+    env["LOG_LEVEL"] = "warning"
+    env.setdefault("STATE_BACKEND", "sqlite")
+    env.setdefault("STATE_SQLITE_PATH", state_path)
+    process = subprocess.Popen([sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py", "main:app"], cwd=ROOT, env=env)
+    base_url = f"http://127.0.0.1:{port}"
+    for _ in range(150):
+        try:
+            if requests.get(base_url + "/health-check", timeout=1).ok:
+                return process, base_url
+        except requests.RequestException:
+            pass
+        time.sleep(0.2)
+    process.terminate()
+    raise RuntimeError(f"gunicorn with {workers} workers did not become healthy")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--scenario", default="browsing", choices=list(SCENARIOS))
+    parser.add_argument("--duration", type=float, default=20)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--stub-port", type=int, default=8980)
+    parser.add_argument("--stub-latency-ms", type=float, default=20)
+    parser.add_argument("--users", type=int, default=2000, help="must match loadtest/seed.py")
+    parser.add_argument("--projects", type=int, default=10000, help="must match loadtest/seed.py")
+    parser.add_argument("--funds", type=int, default=200, help="must match loadtest/seed.py")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    stub_server = stubs.serve(args.stub_port, args.stub_latency_ms)
+    results = []
+    try:
+        with tempfile.TemporaryDirectory() as state_dir:
+            for workers in args.workers:
+                random.seed(args.seed)
+                process, base_url = start_gunicorn(workers, args.port, args.stub_port, os.path.join(state_dir, f"state-{workers}.sqlite3"))
+                try:
+                    ctx = Context(base_url, args.users, args.projects, args.funds)
+                    sign_in_pool(ctx, 50)
+                    # Short warm-up so every worker has its pool and caches filled
+                    run_scenario(ctx, args.scenario, min(3.0, args.duration), args.concurrency)
+                    result = run_scenario(ctx, args.scenario, args.duration, args.concurrency)
+                finally:
+                    process.terminate()
+                    process.wait()
+                total = result["total"]
+                results.append({
+                    "workers": workers,
+                    "throughput_rps": total["throughput_rps"],
+                    "p50_ms": total["p50_ms"],
+                    "p95_ms": total["p95_ms"],
+                    "errors": total["errors"],
+                })
+                print(f"{workers:3d} workers  {total['throughput_rps']:9.1f} req/s  p95 {total['p95_ms']:.1f} ms", file=sys.stderr)
+    finally:
+        stub_server.shutdown()
+
+    baseline = results[0]["throughput_rps"] if results and results[0]["throughput_rps"] else None
+    for row in results:
+        row["speedup"] = round(row["throughput_rps"] / baseline, 2) if baseline else None
+    print(json.dumps({"scenario": args.scenario, "concurrency": args.concurrency, "results": results}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,211 @@
+"""Negotiated gzip/brotli compression for buffered responses.
+
+Responses with an ETag are compressed once per (ETag, encoding) and served from
+an LRU afterwards, so hot list endpoints polled by many clients do not pay for
+compression on every hit. Brotli is used when the ``brotli`` package is
+installed and the client accepts it; otherwise gzip.
+"""
+import gzip
+import os
+import threading
+from collections import OrderedDict
+from typing import Optional
+
+import anyio
+
+try:
+    import brotli
+except ImportError:  # optional: gzip only
+    brotli = None
+
+COMPRESSION_MIN_SIZE = int(os.getenv("COMPRESSION_MIN_SIZE", "1024"))
+GZIP_LEVEL = int(os.getenv("COMPRESSION_GZIP_LEVEL", "6"))
+BROTLI_QUALITY = int(os.getenv("COMPRESSION_BROTLI_QUALITY", "4"))
+COMPRESSION_CACHE_BYTES = int(os.getenv("COMPRESSION_CACHE_BYTES", str(64 * 1024 * 1024)))
+# Bodies larger than this are compressed in a worker thread instead of on the event loop
+COMPRESSION_OFFLOAD_SIZE = 256 * 1024
+
+COMPRESSIBLE_TYPES = ("application/json", "text/", "application/javascript", "image/svg+xml")
+
+
+def _compress(body: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body, quality=BROTLI_QUALITY)
+    return gzip.compress(body, compresslevel=GZIP_LEVEL, mtime=0)
+
+
+def _with_vary(headers) -> list:
+    """Headers with Accept-Encoding added to Vary, merged into an existing Vary header if any."""
+    headers = list(headers)
+    for i, (name, value) in enumerate(headers):
+        if name.lower() == b"vary":
+            tokens = [token.strip().lower() for token in value.split(b",")]
+            if b"accept-encoding" not in tokens and b"*" not in tokens:
+                headers[i] = (name, value + b", Accept-Encoding")
+            return headers
+    headers.append((b"vary", b"Accept-Encoding"))
+    return headers
+
+
+def negotiate(accept_encoding: str) -> Optional[str]:
+    """Pick "br" or "gzip" from an Accept-Encoding header, honouring q=0."""
+    accepted = {}
+    for item in accept_encoding.split(","):
+        name, _, params = item.strip().partition(";")
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        accepted[name.strip().lower()] = q
+    wildcard = accepted.get("*", 0.0)
+    for encoding in (("br", "gzip") if brotli is not None else ("gzip",)):
+        if accepted.get(encoding, wildcard) > 0:
+            return encoding
+    return None
+
+
+class CompressedBodyCache:
+    """Byte-bounded LRU of compressed bodies keyed by (strong ETag, encoding)."""
+
+    def __init__(self, max_bytes: int = COMPRESSION_CACHE_BYTES):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self._entries: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key) -> Optional[bytes]:
+        with self._lock:
+            body = self._entries.get(key)
+            if body is not None:
+                self._entries.move_to_end(key)
+            return body
+
+    def put(self, key, body: bytes):
+        if len(body) > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self.size -= len(previous)
+            self._entries[key] = body
+            self.size += len(body)
+            while self.size > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self.size -= len(evicted)
+
+
+compressed_body_cache = CompressedBodyCache()
+
+
+class CompressionMiddleware:
+    """ASGI middleware compressing complete (non-streamed) responses above a size threshold."""
+
+    def __init__(self, app, min_size: int = COMPRESSION_MIN_SIZE, cache: CompressedBodyCache = compressed_body_cache):
+        self.app = app
+        self.min_size = min_size
+        self.cache = cache
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        encoding = None
+        for name, value in scope["headers"]:
+            if name == b"accept-encoding":
+                encoding = negotiate(value.decode("latin-1"))
+                break
+        if encoding is None:
+            async def send_identity(message):
+                if message["type"] == "http.response.start" and self._compressible(message):
+                    message = {**message, "headers": _with_vary(message.get("headers", []))}
+                await send(message)
+
+            # Still advertise Vary: a shared cache must not hand this identity body to a client asking for br
+            await self.app(scope, receive, send_identity)
+            return
+
+        start_message = None
+        chunks = []
+        passthrough = False
+
+        async def send_wrapper(message):
+            nonlocal start_message, passthrough
+            if passthrough:
+                await send(message)
+                return
+            if message["type"] == "http.response.start":
+                start_message = message
+                return
+            if message["type"] != "http.response.body":
+                await send(message)
+                return
+
+            chunks.append(message.get("body", b""))
+            if message.get("more_body", False):
+                if len(chunks) == 1 and not self._compressible(start_message):
+                    passthrough = True
+                    await send(start_message)
+                    await send(message)
+                return
+            # The body is only buffered until its end; streams (more_body on the
+            # first chunk of an uncompressible type) were passed through above
+            await self._send_complete(send, start_message, b"".join(chunks), encoding)
+
+        await self.app(scope, receive, send_wrapper)
+
+    @staticmethod
+    def _compressible(start_message) -> bool:
+        content_type = ""
+        for name, value in start_message.get("headers", []):
+            name = name.lower()
+            if name == b"content-encoding":
+                return False
+            if name == b"content-type":
+                content_type = value.decode("latin-1")
+            if name == b"cache-control" and b"no-transform" in value:
+                return False
+        # Event streams must reach the client chunk by chunk
+        return content_type.startswith(COMPRESSIBLE_TYPES) and not content_type.startswith("text/event-stream")
+
+    async def _send_complete(self, send, start_message, body: bytes, encoding: str):
+        if not self._compressible(start_message):
+            await send(start_message)
+            await send({"type": "http.response.body", "body": body})
+            return
+        if len(body) < self.min_size or start_message["status"] in (204, 304):
+            await send({**start_message, "headers": _with_vary(start_message.get("headers", []))})
+            await send({"type": "http.response.body", "body": body})
+            return
+
+        headers = _with_vary([
+            (name, value) for name, value in start_message.get("headers", [])
+            if name.lower() not in (b"content-length", b"etag")
+        ])
+        etag = next((value for name, value in start_message.get("headers", []) if name.lower() == b"etag"), None)
+
+        compressed = None
+        cache_key = None
+        if etag is not None and not etag.startswith(b"W/"):
+            cache_key = (etag, encoding)
+            compressed = self.cache.get(cache_key)
+        if compressed is None:
+            if len(body) > COMPRESSION_OFFLOAD_SIZE:
+                compressed = await anyio.to_thread.run_sync(_compress, body, encoding)
+            else:
+                compressed = _compress(body, encoding)
+            if cache_key is not None:
+                self.cache.put(cache_key, compressed)
+
+        if etag is not None:
+            # The compressed bytes are a different representation; a weak tag still
+            # matches If-None-Match (weak comparison) against the handler's strong tag.
+            headers.append((b"etag", etag if etag.startswith(b"W/") else b"W/" + etag))
+        headers += [
+            (b"content-encoding", encoding.encode()),
+            (b"content-length", str(len(compressed)).encode()),
+        ]
+        await send({**start_message, "headers": headers})
+        await send({"type": "http.response.body", "body": compressed})
@@ -1,29 +1,394 @@
+import contextvars
+import functools
+import itertools
 import json
 import logging
 import os
+import random
+import re
+import threading
+import time
+from typing import Optional
 
 import psycopg2
+import psycopg2.extensions
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 
+DB_POOL_MAX = int(os.getenv("DB_POOL_MAX", "20"))
+# Seconds to wait for a free pooled connection before failing the request
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "10"))
+# Set DB_PREPARED_STATEMENTS=0 to send registered statements as plain SQL (for A/B timing)
+USE_PREPARED_STATEMENTS = os.getenv("DB_PREPARED_STATEMENTS", "1") != "0"
+# Fraction of registered-statement executions preceded by EXPLAIN (SUMMARY) to sample planning time
+DB_PLAN_SAMPLE_RATE = float(os.getenv("DB_PLAN_SAMPLE_RATE", "0.01"))
+
+
+# Observability hooks; db_utils stays free of any metrics/logging backend.
+# QUERY_HOOKS: hook(name, query, params, seconds, cursor, error) after every execute();
+#   error is the raised exception or None.
+# POOL_WAIT_HOOKS: hook(seconds) with the time a caller waited for a pooled connection.
+QUERY_HOOKS: list = []
+POOL_WAIT_HOOKS: list = []
+
+
+def _run_hooks(hooks, *args):
+    for hook in hooks:
+        try:
+            hook(*args)
+        except Exception as e:
+            logger.error(f"DB hook {getattr(hook, '__name__', hook)} failed: {str(e)}")
+
+
+@functools.lru_cache(maxsize=1024)
+def statement_label(query: str) -> str:
+    """Low-cardinality label for ad-hoc SQL: verb plus first table, e.g. 'select_algo_projects'."""
+    verb = re.match(r"\s*(\w+)", query)
+    table = re.search(r"\b(?:FROM|INTO|UPDATE)\s+(\w+)", query, re.IGNORECASE)
+    label = verb.group(1).lower() if verb else "unknown"
+    return f"{label}_{table.group(1).lower()}" if table else label
+
+
+class InstrumentedCursor(psycopg2.extensions.cursor):
+    """Cursor that times execute() and reports to QUERY_HOOKS when any are installed."""
+
+    query_name = None  # set by execute_prepared() so EXECUTE is labelled by statement name
+
+    def execute(self, query, vars=None):
+        if not QUERY_HOOKS:
+            return super().execute(query, vars)
+        start = time.perf_counter()
+        error = None
+        try:
+            return super().execute(query, vars)
+        except Exception as e:
+            error = e
+            raise
+        finally:
+            seconds = time.perf_counter() - start
+            name = self.query_name or (statement_label(query) if isinstance(query, str) else "composed")
+            _run_hooks(QUERY_HOOKS, name, query, vars, seconds, self, error)
+
+
+class PooledConnection(psycopg2.extensions.connection):
+    """Connection whose close() hands it back to the pool it was checked out from.
+
+    Handlers keep calling conn.close() as before; the socket, and the prepared
+    statements living on it, survive for the next request. discard() really closes.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.pool = None
+        self.prepared_statements = set()
+        self.cursor_factory = InstrumentedCursor
+
+    def close(self):
+        pool, self.pool = self.pool, None
+        if pool is not None:
+            pool.putconn(self)
+
+    def discard(self):
+        self.pool = None
+        super().close()
+
+
+class PoolTimeout(Exception):
+    """No pooled connection became free within the pool's timeout."""
+
+
+class ConnectionPool:
+    """LIFO pool of PooledConnection; getconn() waits up to ``timeout`` once maxconn are checked out."""
+
+    def __init__(self, maxconn: int, timeout: float = DB_POOL_TIMEOUT, **params):
+        self.maxconn = maxconn
+        self.timeout = timeout
+        self.params = params
+        self._idle: list[PooledConnection] = []
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(maxconn)
+
+    def getconn(self) -> PooledConnection:
+        start = time.perf_counter()
+        if not self._slots.acquire(timeout=self.timeout):
+            if POOL_WAIT_HOOKS:
+                _run_hooks(POOL_WAIT_HOOKS, time.perf_counter() - start)
+            raise PoolTimeout(f"no DB connection free after {self.timeout:.1f}s ({self.maxconn} in use)")
+        if POOL_WAIT_HOOKS:
+            _run_hooks(POOL_WAIT_HOOKS, time.perf_counter() - start)
+        try:
+            with self._lock:
+                conn = self._idle.pop() if self._idle else None
+            if conn is None or conn.closed:
+                conn = psycopg2.connect(connection_factory=PooledConnection, **self.params)
+                logger.info("Connection to DB established..")
+        except Exception:
+            self._slots.release()
+            raise
+        conn.pool = self
+        return conn
+
+    def putconn(self, conn: PooledConnection):
+        try:
+            if conn.closed:
+                return
+            status = conn.info.transaction_status
+            if status == psycopg2.extensions.TRANSACTION_STATUS_UNKNOWN:
+                conn.discard()
+                return
+            if status != psycopg2.extensions.TRANSACTION_STATUS_IDLE:
+                conn.rollback()
+            with self._lock:
+                self._idle.append(conn)
+        except Exception as e:
+            logger.error(f"Discarding broken DB connection: {str(e)}")
+            conn.discard()
+        finally:
+            self._slots.release()
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def _connection_params():
+    return dict(
+        host=os.environ["DB_HOST"],
+        dbname=os.environ["DB_NAME"],
+        user=os.environ["DB_USER"],
+        password=os.environ["DB_PASSWORD"],
+        port=os.environ["DB_PORT"],
+    )
+
+
+def get_db_pool() -> ConnectionPool:
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ConnectionPool(DB_POOL_MAX, **_connection_params())
+    return _pool
+
+
 def get_db_connection():
     try:
-        conn = psycopg2.connect(
-            host=os.environ["DB_HOST"],
-            dbname=os.environ["DB_NAME"],
-            user=os.environ["DB_USER"],
-            password=os.environ["DB_PASSWORD"],
-            port=os.environ["DB_PORT"],
-        )
-        logger.info("Connection to DB established..")
-        return conn
+        return get_db_pool().getconn()
     except Exception as e:
         logger.error(f"Error connecting to DB: {str(e)}")
         raise e
 
 
+def get_dedicated_connection():
+    """Unpooled autocommit connection to the primary for long-lived sessions such as LISTEN."""
+    conn = psycopg2.connect(**_connection_params())
+    conn.set_session(autocommit=True)
+    return conn
+
+
+# Read replicas, e.g. DB_REPLICA_DSNS="host=127.0.0.1 port=5433 dbname=algo user=app password=...;host=..."
+# (';'-separated libpq DSNs). Unset means every read goes to the primary.
+DB_REPLICA_DSNS = [dsn.strip() for dsn in os.getenv("DB_REPLICA_DSNS", "").split(";") if dsn.strip()]
+DB_REPLICA_MAX_LAG_SECONDS = float(os.getenv("DB_REPLICA_MAX_LAG_SECONDS", "5"))
+DB_REPLICA_CHECK_INTERVAL = float(os.getenv("DB_REPLICA_CHECK_INTERVAL", "2"))
+
+# Set per request (see main.py) when the client wrote recently and must read its own writes
+read_from_primary: contextvars.ContextVar[bool] = contextvars.ContextVar("read_from_primary", default=False)
+
+# A server that is not in recovery is a primary and reports 0, so two independent local
+# instances can stand in for primary + replica when testing the routing. A standby without
+# a running WAL receiver reports NULL (unhealthy): it has everything it *received* replayed,
+# but may have been cut off from the primary for hours. pg_stat_wal_receiver shows its row
+# to every role; the status column needs pg_read_all_stats and is only checked when visible.
+REPLICA_LAG_SQL = '''
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() THEN 0
+        WHEN NOT EXISTS (
+            SELECT 1 FROM pg_stat_wal_receiver WHERE status IS NULL OR status = 'streaming'
+        ) THEN NULL
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+    END
+'''
+
+
+class Replica:
+    def __init__(self, dsn: str):
+        self.pool = ConnectionPool(DB_POOL_MAX, dsn=dsn, connect_timeout=2)
+        self.healthy = False
+        self.lag = None
+        self.checked_at = 0.0
+        self.check_lock = threading.Lock()
+
+    def refresh(self):
+        try:
+            conn = self.pool.getconn()
+            try:
+                cursor = conn.cursor()
+                cursor.execute(REPLICA_LAG_SQL)
+                lag = cursor.fetchone()[0]
+                cursor.close()
+            finally:
+                conn.close()
+            self.lag = float(lag) if lag is not None else None
+            self.healthy = self.lag is not None and self.lag <= DB_REPLICA_MAX_LAG_SECONDS
+            if self.lag is None:
+                logger.warning("Replica excluded, WAL receiver is not streaming from the primary")
+            elif not self.healthy:
+                logger.warning(f"Replica excluded, lag {self.lag:.1f}s > {DB_REPLICA_MAX_LAG_SECONDS}s")
+        except Exception as e:
+            logger.error(f"Replica health check failed: {str(e)}")
+            self.healthy = False
+        self.checked_at = time.monotonic()
+
+
+class ReplicaRouter:
+    """Round-robin over replicas whose replication lag is within DB_REPLICA_MAX_LAG_SECONDS.
+
+    Lag is re-checked at most every DB_REPLICA_CHECK_INTERVAL by whichever request
+    notices it is stale; other requests keep using the last known state meanwhile.
+    """
+
+    def __init__(self, dsns: list[str]):
+        self.replicas = [Replica(dsn) for dsn in dsns]
+        self._next = itertools.count()
+
+    def _maybe_refresh(self, replica: Replica):
+        if time.monotonic() - replica.checked_at < DB_REPLICA_CHECK_INTERVAL:
+            return
+        if replica.check_lock.acquire(blocking=False):
+            try:
+                replica.refresh()
+            finally:
+                replica.check_lock.release()
+
+    def get_connection(self):
+        for replica in self.replicas:
+            self._maybe_refresh(replica)
+        healthy = [replica for replica in self.replicas if replica.healthy]
+        if not healthy:
+            return None
+        start = next(self._next)
+        for i in range(len(healthy)):
+            replica = healthy[(start + i) % len(healthy)]
+            try:
+                return replica.pool.getconn()
+            except Exception as e:
+                logger.error(f"Error connecting to replica: {str(e)}")
+                replica.healthy = False
+        return None
+
+
+_replica_router = ReplicaRouter(DB_REPLICA_DSNS) if DB_REPLICA_DSNS else None
+
+
+def get_read_connection():
+    """Connection for read-only handlers: a healthy replica if one is configured, else the primary."""
+    if _replica_router is not None and not read_from_primary.get():
+        conn = _replica_router.get_connection()
+        if conn is not None:
+            return conn
+    return get_db_connection()
+
+
+# Hot statements, prepared once per pooled connection and run with EXECUTE.
+# SQL uses $1..$n placeholders; see register_statement().
+PREPARED_STATEMENTS: dict[str, str] = {}
+_statement_stats: dict[str, dict[str, float]] = {}
+_stats_lock = threading.Lock()
+
+
+_POSITIONAL = re.compile(r"\$(\d+)")
+
+
+def register_statement(name: str, sql: str):
+    PREPARED_STATEMENTS[name] = sql.strip().rstrip(";")
+
+
+def to_pyformat(sql: str, params=()) -> tuple[str, Optional[dict]]:
+    """A $1..$n statement and its positional params as psycopg2 pyformat (%(p1)s) and a dict.
+
+    Named placeholders keep a reused $n bound to one value, and literal % signs
+    (e.g. ``$1 % 16``) are escaped so psycopg2 does not read them as placeholders.
+    Without params psycopg2 does no substitution at all, so the SQL is returned as is.
+    """
+    if not params:
+        return sql, None
+    if isinstance(params, dict):
+        values = params
+    else:
+        values = {f"p{i}": value for i, value in enumerate(params, 1)}
+    return _POSITIONAL.sub(r"%(p\1)s", sql.replace("%", "%%")), values
+
+
+def _stats(name: str) -> dict[str, float]:
+    return _statement_stats.setdefault(name, {
+        "prepare_count": 0, "execute_count": 0, "execute_seconds": 0.0, "plan_count": 0, "plan_seconds": 0.0,
+    })
+
+
+def _record_prepare(name: str):
+    with _stats_lock:
+        _stats(name)["prepare_count"] += 1
+
+
+def _record(name: str, phase: str, seconds: float):
+    with _stats_lock:
+        stats = _stats(name)
+        stats[f"{phase}_count"] += 1
+        stats[f"{phase}_seconds"] += seconds
+
+
+def statement_stats() -> dict[str, dict[str, float]]:
+    with _stats_lock:
+        return {name: dict(stats) for name, stats in _statement_stats.items()}
+
+
+def _sample_planning(cursor, name: str, query: str, params):
+    """Record the planner's time for ``query`` from EXPLAIN (SUMMARY), which plans without executing.
+
+    For EXECUTE this is the time to fetch or build the cached plan, so comparing
+    plan_seconds/plan_count between DB_PREPARED_STATEMENTS=1 and =0 is the saving.
+    """
+    cursor.query_name = f"{name}:plan"
+    cursor.execute("EXPLAIN (SUMMARY, FORMAT JSON) " + query, params)
+    plan = cursor.fetchone()[0]
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    _record(name, "plan", plan[0]["Planning Time"] / 1e3)
+    cursor.query_name = name
+
+
+def execute_prepared(cursor, name: str, params: tuple = ()):
+    """Run a registered statement by name, preparing it on this connection on first use."""
+    sql = PREPARED_STATEMENTS[name]
+    cursor.query_name = name
+    try:
+        if not USE_PREPARED_STATEMENTS:
+            query, args = to_pyformat(sql, params)
+        else:
+            prepared = cursor.connection.prepared_statements
+            if name not in prepared:
+                # PREPARE is session-level and survives ROLLBACK, so this runs once per connection.
+                # It only parses; planning happens at EXECUTE and is sampled below.
+                cursor.query_name = f"{name}:prepare"
+                cursor.execute(f"PREPARE {name} AS {sql}")
+                _record_prepare(name)
+                prepared.add(name)
+                cursor.query_name = name
+            query = f"EXECUTE {name} ({', '.join(['%s'] * len(params))})" if params else f"EXECUTE {name}"
+            args = params or None
+
+        if DB_PLAN_SAMPLE_RATE > 0 and random.random() < DB_PLAN_SAMPLE_RATE:
+            _sample_planning(cursor, name, query, args)
+        start = time.perf_counter()
+        cursor.execute(query, args)
+        _record(name, "execute", time.perf_counter() - start)
+    finally:
+        cursor.query_name = None
+
+
 def push_user_chat_to_db(user_id: str, request_id: str, chat: dict[str, str], conn):
     cursor = conn.cursor()
     table = os.environ.get("table_name", "chat_history")
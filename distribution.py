@@ -0,0 +1,71 @@
+"""Splitting a fully funded project's balance between its receivers, run as a background job."""
+from datetime import datetime
+from typing import Any, Dict, List, Tuple
+
+from jobs import PermanentJobError, job_handler
+
+DISTRIBUTE_FUNDS_JOB = "distribute_funds"
+
+
+class DistributionError(Exception):
+    def __init__(self, status_code: int, detail: str):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+
+
+def check_distributable(cursor, project_id: int, lock: bool = False) -> Tuple[Any, List[int]]:
+    """(current_fund, receiver ids) of a project that is ready to pay out, else DistributionError."""
+    cursor.execute(f'''
+        SELECT current_fund, fund_raise_total FROM algo_projects WHERE id = %s{" FOR UPDATE" if lock else ""};
+    ''', (project_id,))
+    project = cursor.fetchone()
+    if not project:
+        raise DistributionError(404, "Project not found.")
+
+    current_fund, fund_raise_total = project
+    if current_fund != fund_raise_total:
+        raise DistributionError(400, "Current fund does not equal fund raise total.")
+
+    # One payout per project: a retried or repeated request must not pay every receiver again
+    cursor.execute('SELECT 1 FROM algo_receivers_transaction WHERE project_id = %s LIMIT 1;', (project_id,))
+    if cursor.fetchone() is not None:
+        raise DistributionError(409, "Funds for this project have already been distributed.")
+
+    cursor.execute('SELECT id FROM algo_receivers WHERE project_id = %s ORDER BY id;', (project_id,))
+    receiver_ids = [row[0] for row in cursor.fetchall()]
+    if not receiver_ids:
+        raise DistributionError(404, "No receivers found for this project.")
+    return current_fund, receiver_ids
+
+
+@job_handler(DISTRIBUTE_FUNDS_JOB)
+def run_distribution(job, cursor) -> Dict[str, Any]:
+    project_id = job.payload["project_id"]
+    try:
+        # The row lock keeps contributions from changing the balance mid-distribution
+        current_fund, receiver_ids = check_distributable(cursor, project_id, lock=True)
+    except DistributionError as e:
+        raise PermanentJobError(e.detail)
+
+    amount_per_receiver = current_fund / len(receiver_ids)
+    report_every = max(1, len(receiver_ids) // 20)
+    transactions = []
+    for i, receiver_id in enumerate(receiver_ids):
+        now = datetime.now()
+        cursor.execute('''
+            INSERT INTO algo_receivers_transaction (receiver_id, project_id, transaction_count, amount, time_round, created_at, updated_at)
+            VALUES (%s, %s, %s, %s, %s, %s, %s);
+        ''', (receiver_id, project_id, i + 1, amount_per_receiver, now, now, now))
+        transactions.append({
+            "receiver_id": receiver_id,
+            "project_id": project_id,
+            "transaction_count": i + 1,
+            "amount": amount_per_receiver,
+            "time_round": now.isoformat(),
+            "created_at": now.isoformat(),
+            "updated_at": now.isoformat(),
+        })
+        if (i + 1) % report_every == 0:
+            job.progress((i + 1) / len(receiver_ids), f"{i + 1}/{len(receiver_ids)} receivers")
+    return {"transactions": transactions}
@@ -0,0 +1,245 @@
+"""Columnar export of contributions and payouts for reconciliation.
+
+Rows are read through a server-side (named) cursor EXPORT_CHUNK_ROWS at a time
+and each chunk becomes one Arrow record batch, written as a Parquet row group or
+an Arrow IPC stream batch. Memory therefore stays at about one chunk whatever
+the table size. Requires ``pyarrow``.
+
+Exports read from the replica. A long export there can be cancelled by a hot-standby
+recovery conflict ("canceling statement due to conflict with recovery") when vacuum on
+the primary removes rows the export's snapshot still needs. Raise
+``max_standby_streaming_delay`` on the replica that serves exports (or set
+``hot_standby_feedback = on``) if full-range exports run longer than it allows.
+
+    python export.py contributions --output contributions.parquet --since 2024-01-01 --until 2024-02-01
+    python export.py payouts --format arrow --columns project_id,receiver_id,amount,time_round --output payouts.arrow
+"""
+import argparse
+import logging
+import os
+import sys
+import time
+import uuid
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional, Sequence
+
+from db_utils import get_read_connection
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # optional: exports are unavailable without it
+    pa = None
+    pq = None
+
+logger = logging.getLogger(__name__)
+
+EXPORT_CHUNK_ROWS = int(os.getenv("EXPORT_CHUNK_ROWS", "50000"))
+EXPORT_PARQUET_COMPRESSION = os.getenv("EXPORT_PARQUET_COMPRESSION", "zstd")
+
+# dataset -> (table, {column: arrow type name}); only these identifiers ever reach the SQL
+EXPORT_DATASETS: Dict[str, tuple] = {
+    "contributions": ("algo_contributions", {
+        "id": "int64",
+        "project_id": "int64",
+        "txid": "string",
+        "amount": "float64",
+        "email": "string",
+        "sodienthoai": "string",
+        "address": "string",
+        "name": "string",
+        "type_sender_wallet": "string",
+        "sender_wallet_address": "string",
+        "time_round": "timestamp",
+        "created_at": "timestamp",
+        "updated_at": "timestamp",
+    }),
+    "payouts": ("algo_receivers_transaction", {
+        "id": "int64",
+        "receiver_id": "int64",
+        "project_id": "int64",
+        "transaction_count": "int64",
+        "amount": "float64",
+        "time_round": "timestamp",
+        "created_at": "timestamp",
+        "updated_at": "timestamp",
+    }),
+}
+
+EXPORT_FORMATS = {
+    "parquet": "application/vnd.apache.parquet",
+    "arrow": "application/vnd.apache.arrow.stream",
+}
+
+
+class ExportError(ValueError):
+    """Bad export parameters; the message is safe to show to the caller."""
+
+
+def _arrow_type(name: str):
+    if name == "timestamp":
+        return pa.timestamp("us")
+    return getattr(pa, name)()
+
+
+def _schema(dataset: str, columns: List[str]):
+    types = EXPORT_DATASETS[dataset][1]
+    return pa.schema([(column, _arrow_type(types[column])) for column in columns])
+
+
+def plan_export(dataset: str, columns: Optional[Sequence[str]] = None, date_column: str = "created_at",
+                fmt: str = "parquet") -> List[str]:
+    """Validate the request up front, before any response bytes are sent; returns the column list."""
+    if pa is None:
+        raise RuntimeError("pyarrow is not installed")
+    if dataset not in EXPORT_DATASETS:
+        raise ExportError(f"Unknown dataset {dataset!r}; expected one of {', '.join(EXPORT_DATASETS)}")
+    if fmt not in EXPORT_FORMATS:
+        raise ExportError(f"Unknown format {fmt!r}; expected one of {', '.join(EXPORT_FORMATS)}")
+    types = EXPORT_DATASETS[dataset][1]
+    columns = list(columns) if columns else list(types)
+    unknown = [column for column in columns if column not in types]
+    if unknown:
+        raise ExportError(f"Unknown columns for {dataset}: {', '.join(unknown)}")
+    if types.get(date_column) != "timestamp":
+        raise ExportError(f"date_column must be one of {', '.join(c for c, t in types.items() if t == 'timestamp')}")
+    return columns
+
+
+def _query(table: str, columns: List[str], date_column: str, since, until, project_id) -> tuple:
+    conditions, params = [], []
+    if since is not None:
+        conditions.append(f"{date_column} >= %s")
+        params.append(since)
+    if until is not None:
+        conditions.append(f"{date_column} < %s")
+        params.append(until)
+    if project_id is not None:
+        conditions.append("project_id = %s")
+        params.append(project_id)
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+    # Deterministic order so repeated exports of the same range are byte-for-byte comparable.
+    # A date range sorts on (date_column, id), which migrations/013 indexes, so the scan
+    # starts at the range instead of walking the whole primary key.
+    order = f"{date_column}, id" if since is not None or until is not None else "id"
+    return f"SELECT {', '.join(columns)} FROM {table} {where} ORDER BY {order}", params
+
+
+def iter_batches(dataset: str, columns: List[str], date_column: str = "created_at", since: Optional[datetime] = None,
+                 until: Optional[datetime] = None, project_id: Optional[int] = None,
+                 chunk_rows: int = EXPORT_CHUNK_ROWS) -> Iterator["pa.RecordBatch"]:
+    """Record batches of at most ``chunk_rows`` rows; ``since`` is inclusive, ``until`` exclusive."""
+    table = EXPORT_DATASETS[dataset][0]
+    schema = _schema(dataset, columns)
+    query, params = _query(table, columns, date_column, since, until, project_id)
+
+    conn = get_read_connection()
+    # Named cursor: Postgres keeps the result set and sends chunk_rows at a time
+    cursor = conn.cursor(name=f"export_{uuid.uuid4().hex}")
+    cursor.itersize = chunk_rows
+    try:
+        cursor.execute(query, params)
+        while True:
+            rows = cursor.fetchmany(chunk_rows)
+            if not rows:
+                break
+            values = list(zip(*rows))
+            yield pa.RecordBatch.from_arrays(
+                [pa.array(values[i], type=field.type) for i, field in enumerate(schema)], schema=schema,
+            )
+        conn.commit()
+    except BaseException:
+        conn.rollback()
+        raise
+    finally:
+        cursor.close()
+        conn.close()
+
+
+class _ChunkSink:
+    """Write-only file object that hands written bytes back to a generator between batches."""
+
+    def __init__(self):
+        self.closed = False
+        self._chunks: List[bytes] = []
+        self._position = 0
+
+    def write(self, data) -> int:
+        data = bytes(data)
+        self._chunks.append(data)
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def drain(self) -> bytes:
+        data, self._chunks = b"".join(self._chunks), []
+        return data
+
+
+def _open_writer(sink, fmt: str, schema):
+    if fmt == "parquet":
+        return pq.ParquetWriter(sink, schema, compression=EXPORT_PARQUET_COMPRESSION)
+    return pa.ipc.new_stream(sink, schema)
+
+
+def stream_export(dataset: str, columns: List[str], fmt: str = "parquet", **filters: Any) -> Iterator[bytes]:
+    """Encoded export as a byte stream, one piece per chunk; suitable for StreamingResponse."""
+    sink = _ChunkSink()
+    writer = _open_writer(pa.PythonFile(sink, mode="w"), fmt, _schema(dataset, columns))
+    try:
+        for batch in iter_batches(dataset, columns, **filters):
+            writer.write_batch(batch)
+            data = sink.drain()
+            if data:
+                yield data
+    finally:
+        # Footer (Parquet) or end-of-stream marker (Arrow); an empty range still yields a valid file
+        writer.close()
+    yield sink.drain()
+
+
+def export_to_file(path: str, dataset: str, columns: List[str], fmt: str = "parquet", **filters: Any) -> int:
+    rows = 0
+    with pa.OSFile(path, "wb") as sink, _open_writer(sink, fmt, _schema(dataset, columns)) as writer:
+        for batch in iter_batches(dataset, columns, **filters):
+            writer.write_batch(batch)
+            rows += batch.num_rows
+    return rows
+
+
+def main():
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser()
+    parser.add_argument("dataset", choices=list(EXPORT_DATASETS))
+    parser.add_argument("--output", required=True)
+    parser.add_argument("--format", choices=list(EXPORT_FORMATS), default="parquet")
+    parser.add_argument("--columns", help="comma-separated subset of the dataset's columns")
+    parser.add_argument("--date-column", default="created_at")
+    parser.add_argument("--since", type=datetime.fromisoformat, help="inclusive, ISO date or timestamp")
+    parser.add_argument("--until", type=datetime.fromisoformat, help="exclusive, ISO date or timestamp")
+    parser.add_argument("--project-id", type=int)
+    parser.add_argument("--chunk-rows", type=int, default=EXPORT_CHUNK_ROWS)
+    args = parser.parse_args()
+
+    try:
+        columns = plan_export(args.dataset, args.columns.split(",") if args.columns else None, args.date_column, args.format)
+    except (ExportError, RuntimeError) as e:
+        raise SystemExit(str(e))
+    start = time.perf_counter()
+    rows = export_to_file(
+        args.output, args.dataset, columns, args.format, date_column=args.date_column,
+        since=args.since, until=args.until, project_id=args.project_id, chunk_rows=args.chunk_rows,
+    )
+    print(f"exported {rows} {args.dataset} rows to {args.output} in {time.perf_counter() - start:.1f}s", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
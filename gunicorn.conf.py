@@ -0,0 +1,59 @@
+"""Gunicorn settings for the multi-worker deployment.
+
+    gunicorn -c gunicorn.conf.py main:app
+
+Every worker is a separate process with its own DB pool (DB_POOL_MAX connections),
+so Postgres must allow roughly workers * DB_POOL_MAX connections plus one LISTEN
+connection per worker. State that has to agree across workers (JWT revocations,
+chat sessions, rate limits) goes through STATE_BACKEND; see state_backend.py.
+"""
+import logging
+import multiprocessing
+import os
+import shutil
+import tempfile
+
+bind = os.getenv("BIND", "0.0.0.0:8000")
+workers = int(os.getenv("WEB_CONCURRENCY", str(multiprocessing.cpu_count())))
+worker_class = "uvicorn.workers.UvicornWorker"
+
+# Longer than a typical proxy/load balancer idle timeout, so the proxy closes first
+keepalive = int(os.getenv("KEEPALIVE_SECONDS", "75"))
+# In-flight requests get this long to finish on SIGTERM/reload before workers are killed
+graceful_timeout = int(os.getenv("GRACEFUL_TIMEOUT_SECONDS", "30"))
+timeout = int(os.getenv("WORKER_TIMEOUT_SECONDS", "120"))
+# Recycle workers now and then to bound slow leaks; jitter keeps them from restarting together
+max_requests = int(os.getenv("MAX_REQUESTS", "10000"))
+max_requests_jitter = int(os.getenv("MAX_REQUESTS_JITTER", "1000"))
+
+# Each worker imports the app itself: the job runner and archiver threads, the connection pools
+# and the LISTEN connection for live updates must not cross a fork, since threads do not
+# survive it and a socket shared between processes corrupts both sides' protocol state.
+preload_app = False
+
+# Workers write Prometheus metrics here and /metrics merges them (see metrics.py). Set in the
+# master before any worker imports prometheus_client, so every worker inherits it.
+prometheus_multiproc_dir = os.environ.setdefault(
+    "PROMETHEUS_MULTIPROC_DIR", os.path.join(tempfile.gettempdir(), "app-prometheus-multiproc"),
+)
+
+accesslog = os.getenv("ACCESS_LOG", None)
+loglevel = os.getenv("LOG_LEVEL", "info")
+
+
+def on_starting(server):
+    # Files left by a previous run would be summed into this one's counters
+    shutil.rmtree(prometheus_multiproc_dir, ignore_errors=True)
+    os.makedirs(prometheus_multiproc_dir, exist_ok=True)
+    if workers > 1 and os.getenv("STATE_BACKEND", "memory") == "memory":
+        logging.getLogger("gunicorn.error").warning(
+            "STATE_BACKEND=memory with %d workers: revocations, sessions and rate limits are per worker; "
+            "use STATE_BACKEND=sqlite or postgres", workers,
+        )
+
+
+def child_exit(server, worker):
+    from prometheus_client import multiprocess
+
+    # Drop the dead worker's live gauges; its counters and histograms keep counting in the totals
+    multiprocess.mark_process_dead(worker.pid)
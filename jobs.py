@@ -0,0 +1,307 @@
+"""Durable background jobs on Postgres (migrations/010).
+
+Request handlers ``enqueue`` a job inside their own transaction and return its id;
+``JobRunner`` threads claim jobs with ``FOR UPDATE SKIP LOCKED`` and run the handler
+registered for the job's kind. A failed attempt is retried with exponential
+backoff until ``max_attempts``; ``PermanentJobError`` fails the job at once.
+
+The handler's writes and the job's ``succeeded`` row commit in one transaction,
+so a crash after the work is done can never run it a second time. Progress is
+written on a separate connection so clients polling GET /jobs/{id} see it while
+the handler's transaction is still open.
+
+Workers run inside every app process (JOB_WORKERS, 0 to disable) or standalone:
+
+    python jobs.py --workers 4
+"""
+import argparse
+import json
+import logging
+import os
+import random
+import socket
+import threading
+import uuid
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from db_utils import get_db_connection
+
+logger = logging.getLogger(__name__)
+
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "2"))
+JOB_POLL_INTERVAL = float(os.getenv("JOB_POLL_INTERVAL", "1.0"))
+# A running job whose worker stops heartbeating for this long is handed to another worker
+JOB_LEASE_SECONDS = float(os.getenv("JOB_LEASE_SECONDS", "300"))
+JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", "5"))
+JOB_RETRY_BASE_SECONDS = float(os.getenv("JOB_RETRY_BASE_SECONDS", "5"))
+JOB_RETRY_MAX_SECONDS = float(os.getenv("JOB_RETRY_MAX_SECONDS", "600"))
+
+JOB_COLUMNS = (
+    "id", "kind", "status", "attempts", "max_attempts", "progress", "progress_message",
+    "result", "last_error", "created_by", "run_after", "created_at", "updated_at", "started_at", "finished_at",
+)
+
+CLAIM_SQL = '''
+    UPDATE app_jobs j
+    SET status = 'running', attempts = j.attempts + 1, locked_by = %(worker)s,
+        locked_until = NOW() + make_interval(secs => %(lease)s),
+        started_at = COALESCE(j.started_at, NOW()), updated_at = NOW()
+    WHERE j.id = (
+        SELECT id FROM app_jobs
+        WHERE (status = 'queued' AND run_after <= NOW())
+           OR (status = 'running' AND locked_until < NOW() AND attempts < max_attempts)
+        ORDER BY run_after, id
+        LIMIT 1
+        FOR UPDATE SKIP LOCKED
+    )
+    RETURNING j.id, j.kind, j.payload, j.attempts, j.max_attempts;
+'''
+
+# A lease that expired on the last attempt means the job hung or killed its worker every
+# time; give up on it rather than handing it out forever.
+FAIL_EXHAUSTED_SQL = '''
+    UPDATE app_jobs
+    SET status = 'failed', finished_at = NOW(), updated_at = NOW(), locked_by = NULL, locked_until = NULL,
+        last_error = 'lease expired on the final attempt' || COALESCE(': ' || last_error, '')
+    WHERE id IN (
+        SELECT id FROM app_jobs
+        WHERE status = 'running' AND locked_until < NOW() AND attempts >= max_attempts
+        FOR UPDATE SKIP LOCKED
+    )
+    RETURNING id, kind;
+'''
+
+_handlers: Dict[str, Callable] = {}
+
+
+class PermanentJobError(Exception):
+    """Raised by a handler when retrying cannot help (bad input, missing rows)."""
+
+
+def job_handler(kind: str):
+    """Register ``func(job, cursor) -> result`` as the handler for ``kind``.
+
+    The handler runs in a transaction on ``cursor`` which the runner commits
+    together with the job's result; it must not commit itself.
+    """
+    def register(func):
+        _handlers[kind] = func
+        return func
+    return register
+
+
+def enqueue(cursor, kind: str, payload: Dict[str, Any], dedupe_key: Optional[str] = None,
+            created_by: Optional[int] = None, max_attempts: int = JOB_MAX_ATTEMPTS) -> Tuple[int, bool]:
+    """Queue a job in the caller's transaction; returns (job id, created).
+
+    With ``dedupe_key`` an unfinished job of the same kind and key is returned
+    instead of queueing a second one.
+    """
+    for _ in range(3):
+        cursor.execute('''
+            INSERT INTO app_jobs (kind, payload, dedupe_key, created_by, max_attempts)
+            VALUES (%s, %s::jsonb, %s, %s, %s)
+            ON CONFLICT (kind, dedupe_key) WHERE dedupe_key IS NOT NULL AND status IN ('queued', 'running')
+            DO NOTHING
+            RETURNING id;
+        ''', (kind, json.dumps(payload, default=str), dedupe_key, created_by, max_attempts))
+        row = cursor.fetchone()
+        if row is not None:
+            return row[0], True
+        cursor.execute('''
+            SELECT id FROM app_jobs
+            WHERE kind = %s AND dedupe_key = %s AND status IN ('queued', 'running');
+        ''', (kind, dedupe_key))
+        row = cursor.fetchone()
+        if row is not None:
+            return row[0], False
+        # The conflicting job finished between the two statements; try again
+    raise RuntimeError(f"Could not enqueue {kind} job for {dedupe_key}")
+
+
+def fetch_job(cursor, job_id: int) -> Optional[Dict[str, Any]]:
+    cursor.execute(f"SELECT {', '.join(JOB_COLUMNS)} FROM app_jobs WHERE id = %s;", (job_id,))
+    row = cursor.fetchone()
+    return dict(zip(JOB_COLUMNS, row)) if row else None
+
+
+def retry_delay(attempt: int) -> float:
+    """Exponential backoff with full jitter, so retries of a shared failure spread out."""
+    return random.uniform(0, min(JOB_RETRY_MAX_SECONDS, JOB_RETRY_BASE_SECONDS * 2 ** (attempt - 1)))
+
+
+class Job:
+    def __init__(self, job_id: int, kind: str, payload: Dict[str, Any], attempt: int, worker: str):
+        self.id = job_id
+        self.kind = kind
+        self.payload = payload
+        self.attempt = attempt
+        self.worker = worker
+
+    def progress(self, fraction: float, message: Optional[str] = None):
+        """Record progress (0..1) and extend the lease; committed immediately on its own connection."""
+        conn = get_db_connection()
+        cursor = conn.cursor()
+        try:
+            cursor.execute('''
+                UPDATE app_jobs
+                SET progress = %s, progress_message = %s, updated_at = NOW(),
+                    locked_until = NOW() + make_interval(secs => %s)
+                WHERE id = %s AND locked_by = %s;
+            ''', (max(0.0, min(1.0, fraction)), message, JOB_LEASE_SECONDS, self.id, self.worker))
+            conn.commit()
+        except Exception as e:
+            conn.rollback()
+            # Progress is advisory; never fail the job over it
+            logger.warning(f"Could not record progress for job {self.id}: {str(e)}")
+        finally:
+            cursor.close()
+            conn.close()
+
+
+def _claim(worker: str) -> Optional[Job]:
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    try:
+        cursor.execute(FAIL_EXHAUSTED_SQL)
+        for job_id, kind in cursor.fetchall():
+            logger.error(f"Job {job_id} ({kind}) failed: lease expired on the final attempt")
+        cursor.execute(CLAIM_SQL, {"worker": worker, "lease": JOB_LEASE_SECONDS})
+        row = cursor.fetchone()
+        conn.commit()
+        return Job(row[0], row[1], row[2], row[3], worker) if row else None
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cursor.close()
+        conn.close()
+
+
+def _record_failure(job: Job, error: Exception, permanent: bool):
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    try:
+        delay = retry_delay(job.attempt)
+        # attempts already counts this one; requeue unless it was the last
+        cursor.execute('''
+            UPDATE app_jobs
+            SET status = CASE WHEN %(permanent)s OR attempts >= max_attempts THEN 'failed' ELSE 'queued' END,
+                run_after = NOW() + make_interval(secs => %(delay)s),
+                finished_at = CASE WHEN %(permanent)s OR attempts >= max_attempts THEN NOW() END,
+                last_error = %(error)s, locked_by = NULL, locked_until = NULL, updated_at = NOW()
+            WHERE id = %(id)s AND locked_by = %(worker)s
+            RETURNING status;
+        ''', {"permanent": permanent, "delay": delay, "error": str(error)[:2000], "id": job.id, "worker": job.worker})
+        row = cursor.fetchone()
+        conn.commit()
+        if row is None:
+            logger.warning(f"Job {job.id} ({job.kind}) lost its lease to another worker: {str(error)}")
+        elif row[0] == "queued":
+            logger.warning(f"Job {job.id} ({job.kind}) attempt {job.attempt} failed, retrying in {delay:.0f}s: {str(error)}")
+        else:
+            logger.error(f"Job {job.id} ({job.kind}) failed: {str(error)}")
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cursor.close()
+        conn.close()
+
+
+def run_job(job: Job):
+    handler = _handlers.get(job.kind)
+    if handler is None:
+        _record_failure(job, PermanentJobError(f"No handler registered for job kind {job.kind!r}"), permanent=True)
+        return
+
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    try:
+        result = handler(job, cursor)
+        cursor.execute('''
+            UPDATE app_jobs
+            SET status = 'succeeded', progress = 1, result = %s::jsonb, last_error = NULL,
+                locked_by = NULL, locked_until = NULL, finished_at = NOW(), updated_at = NOW()
+            WHERE id = %s AND locked_by = %s;
+        ''', (json.dumps(result, default=str), job.id, job.worker))
+        if cursor.rowcount != 1:
+            # Our lease expired and another worker took the job over; let its run stand
+            raise RuntimeError(f"lease on job {job.id} lost")
+        conn.commit()
+        logger.info(f"Job {job.id} ({job.kind}) succeeded")
+    except Exception as e:
+        conn.rollback()
+        _record_failure(job, e, permanent=isinstance(e, PermanentJobError))
+    finally:
+        cursor.close()
+        conn.close()
+
+
+class JobRunner:
+    def __init__(self, workers: int = JOB_WORKERS, poll_interval: float = JOB_POLL_INTERVAL):
+        self.workers = workers
+        self.poll_interval = poll_interval
+        self.worker_prefix = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+        self._stop = threading.Event()
+        self._wake = threading.Event()
+        self._threads = []
+
+    def start(self):
+        if not self._threads:
+            self._stop.clear()
+            for i in range(self.workers):
+                thread = threading.Thread(target=self._run, args=(f"{self.worker_prefix}:{i}",), name=f"job-worker-{i}", daemon=True)
+                thread.start()
+                self._threads.append(thread)
+
+    def stop(self):
+        self._stop.set()
+        self._wake.set()
+        for thread in self._threads:
+            thread.join(timeout=30)
+        self._threads = []
+
+    def wake(self):
+        """Skip the poll wait after enqueueing from this process."""
+        self._wake.set()
+
+    def _run(self, worker: str):
+        while not self._stop.is_set():
+            try:
+                job = _claim(worker)
+            except Exception as e:
+                logger.error(f"Job claim failed: {str(e)}")
+                job = None
+            if job is not None:
+                try:
+                    run_job(job)
+                except Exception as e:
+                    # Could not even record the outcome; the lease expiry hands the job out again
+                    logger.error(f"Job {job.id} ({job.kind}) bookkeeping failed: {str(e)}")
+                continue
+            self._wake.wait(self.poll_interval)
+            self._wake.clear()
+
+
+job_runner = JobRunner()
+
+
+def main():
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--workers", type=int, default=max(1, JOB_WORKERS))
+    args = parser.parse_args()
+
+    import distribution  # noqa: F401  registers its handlers
+
+    runner = JobRunner(workers=args.workers)
+    runner.start()
+    try:
+        runner._stop.wait()
+    except KeyboardInterrupt:
+        runner.stop()
+
+
+if __name__ == "__main__":
+    main()
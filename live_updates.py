@@ -0,0 +1,203 @@
+"""Funding progress fan-out: Postgres NOTIFY -> one listener per worker -> SSE clients.
+
+Write paths call ``notify_funding`` inside their transaction, so the event is only
+delivered once the write commits. Each worker process holds a single LISTEN
+connection; events are coalesced per project and pushed to that project's
+subscribers every LIVE_UPDATE_INTERVAL seconds. A viewer therefore costs one
+read when it connects and nothing afterwards, however many are watching.
+"""
+import asyncio
+import json
+import logging
+import os
+import select
+import threading
+from typing import Any, Dict, Optional, Set
+
+from db_utils import get_dedicated_connection
+
+logger = logging.getLogger(__name__)
+
+CHANNEL = "project_funding"
+LIVE_UPDATE_INTERVAL = float(os.getenv("LIVE_UPDATE_INTERVAL", "0.5"))
+LIVE_HEARTBEAT_SECONDS = float(os.getenv("LIVE_HEARTBEAT_SECONDS", "15"))
+
+FUNDING_STATE_SQL = '''
+    SELECT id, current_fund, fund_raise_total, fund_raise_count
+    FROM algo_projects
+    WHERE id = ANY(%s) AND deleted_at IS NULL
+'''
+
+
+def notify_funding(cursor, project_id: int, current_fund, fund_raise_total, fund_raise_count):
+    """Queue a funding event; Postgres delivers it when the surrounding transaction commits."""
+    payload = json.dumps({
+        "project_id": project_id,
+        "current_fund": current_fund,
+        "fund_raise_total": fund_raise_total,
+        "fund_raise_count": fund_raise_count,
+    }, default=float)
+    cursor.execute("SELECT pg_notify(%s, %s);", (CHANNEL, payload))
+
+
+def _state_from_row(row) -> Dict[str, Any]:
+    return {"project_id": row[0], "current_fund": row[1], "fund_raise_total": row[2], "fund_raise_count": row[3]}
+
+
+class FundingHub:
+    """Per-process LISTEN connection and subscriber registry.
+
+    The listener thread only writes into ``_pending``; everything touching
+    subscriber queues runs on the event loop.
+    """
+
+    def __init__(self, interval: float = LIVE_UPDATE_INTERVAL):
+        self.interval = interval
+        self._subscribers: Dict[int, Set[asyncio.Queue]] = {}
+        self._latest: Dict[int, Dict[str, Any]] = {}
+        self._pending: Dict[int, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._listener: Optional[threading.Thread] = None
+        self._flusher: Optional[asyncio.Task] = None
+
+    def _start(self):
+        if self._listener is None:
+            self._stop.clear()
+            self._listener = threading.Thread(target=self._listen, name="funding-listener", daemon=True)
+            self._listener.start()
+        if self._flusher is None:
+            self._flusher = asyncio.get_running_loop().create_task(self._flush_loop())
+
+    def stop(self):
+        self._stop.set()
+        if self._flusher is not None:
+            self._flusher.cancel()
+            self._flusher = None
+        if self._listener is not None:
+            self._listener.join(timeout=10)
+            self._listener = None
+
+    def _receive(self, payload: str):
+        try:
+            state = json.loads(payload)
+            project_id = int(state["project_id"])
+        except (ValueError, KeyError, TypeError):
+            logger.warning(f"Ignoring malformed {CHANNEL} payload: {payload!r}")
+            return
+        if project_id not in self._subscribers:
+            return
+        with self._lock:
+            # Later events overwrite earlier ones: only the newest state is pushed
+            self._pending[project_id] = state
+
+    def _listen(self):
+        backoff = 1.0
+        while not self._stop.is_set():
+            conn = None
+            try:
+                conn = get_dedicated_connection()
+                cursor = conn.cursor()
+                cursor.execute(f"LISTEN {CHANNEL};")
+                # Events sent while we were disconnected are lost; resync subscribed projects
+                subscribed = list(self._subscribers)
+                if subscribed:
+                    cursor.execute(FUNDING_STATE_SQL, (subscribed,))
+                    with self._lock:
+                        for row in cursor.fetchall():
+                            self._pending[row[0]] = _state_from_row(row)
+                backoff = 1.0
+                while not self._stop.is_set():
+                    if select.select([conn], [], [], 1.0) == ([], [], []):
+                        continue
+                    conn.poll()
+                    while conn.notifies:
+                        self._receive(conn.notifies.pop(0).payload)
+            except Exception as e:
+                logger.error(f"Funding listener error, reconnecting in {backoff:.0f}s: {str(e)}")
+                self._stop.wait(backoff)
+                backoff = min(backoff * 2, 30.0)
+            finally:
+                if conn is not None:
+                    conn.close()
+
+    async def _flush_loop(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            with self._lock:
+                pending, self._pending = self._pending, {}
+            for project_id, state in pending.items():
+                queues = self._subscribers.get(project_id)
+                if not queues:
+                    continue
+                self._latest[project_id] = state
+                for queue in queues:
+                    _offer(queue, state)
+
+    def subscribe(self, project_id: int) -> asyncio.Queue:
+        self._start()
+        queue: asyncio.Queue = asyncio.Queue(maxsize=1)
+        self._subscribers.setdefault(project_id, set()).add(queue)
+        return queue
+
+    def unsubscribe(self, project_id: int, queue: asyncio.Queue):
+        queues = self._subscribers.get(project_id)
+        if queues is None:
+            return
+        queues.discard(queue)
+        if not queues:
+            del self._subscribers[project_id]
+            self._latest.pop(project_id, None)
+
+    def latest(self, project_id: int) -> Optional[Dict[str, Any]]:
+        return self._latest.get(project_id)
+
+    def remember(self, state: Dict[str, Any]):
+        if state["project_id"] in self._subscribers:
+            self._latest.setdefault(state["project_id"], state)
+
+    def subscriber_count(self) -> int:
+        return sum(len(queues) for queues in self._subscribers.values())
+
+
+def _offer(queue: asyncio.Queue, state: Dict[str, Any]):
+    """Replace whatever the client has not consumed yet; slow clients only see the newest state."""
+    if queue.full():
+        queue.get_nowait()
+    queue.put_nowait(state)
+
+
+def fetch_funding_state(cursor, project_id: int) -> Optional[Dict[str, Any]]:
+    cursor.execute(FUNDING_STATE_SQL, ([project_id],))
+    row = cursor.fetchone()
+    return _state_from_row(row) if row else None
+
+
+def sse_event(state: Dict[str, Any], event: str = "funding") -> bytes:
+    return f"event: {event}\ndata: {json.dumps(state, default=float)}\n\n".encode("utf-8")
+
+
+async def stream_funding(hub: FundingHub, project_id: int, queue: asyncio.Queue, initial: Dict[str, Any], is_disconnected):
+    """SSE body: the current state, then coalesced updates and periodic heartbeats.
+
+    ``queue`` must come from ``hub.subscribe`` taken *before* ``initial`` was read,
+    so no commit can fall between the snapshot and the subscription.
+    """
+    hub.remember(initial)
+    try:
+        yield sse_event(initial)
+        while True:
+            try:
+                state = await asyncio.wait_for(queue.get(), timeout=LIVE_HEARTBEAT_SECONDS)
+            except asyncio.TimeoutError:
+                if await is_disconnected():
+                    return
+                # Comment line: keeps proxies from closing an idle stream
+                yield b": heartbeat\n\n"
+                continue
+            yield sse_event(state)
+    finally:
+        hub.unsubscribe(project_id, queue)
+
+
+funding_hub = FundingHub()
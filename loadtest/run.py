@@ -0,0 +1,280 @@
+"""Drive realistic traffic mixes against the app and report per-endpoint latency.
+
+Starts the stub services and a uvicorn instance of main:app (unless --app-url is
+given), signs in a pool of seeded users, then runs each scenario for --duration
+seconds with --concurrency client threads. Results are written as JSON with
+count, error count, throughput and p50/p95/p99 per endpoint, so two runs can be
+diffed directly.
+
+    python loadtest/seed.py --reset
+    python loadtest/run.py --scenarios browsing contribution_burst --duration 30 --output run.json
+"""
+import argparse
+import json
+import os
+import random
+import subprocess
+import sys
+import threading
+import time
+import uuid
+from collections import defaultdict
+from datetime import datetime
+
+import requests
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from loadtest import stubs  # noqa: E402
+from loadtest.seed import LOADTEST_PASSWORD  # noqa: E402
+
+
+class Context:
+    def __init__(self, base_url, users, projects, funds):
+        self.base_url = base_url.rstrip("/")
+        self.users = users
+        self.projects = projects
+        self.funds = funds
+        self.tokens = []
+
+    def auth(self):
+        return {"Authorization": f"Bearer {random.choice(self.tokens)}"}
+
+    def project_id(self):
+        return random.randint(1, self.projects)
+
+    def funded_project_id(self):
+        return 10 * random.randint(1, max(1, self.projects // 10))
+
+
+# Each operation returns (endpoint template, method, path, request kwargs).
+def op_signin(ctx):
+    user = random.randint(1, ctx.users)
+    return "POST /signin", "POST", "/signin", {"json": {"email": f"user{user}@loadtest.local", "password": LOADTEST_PASSWORD}}
+
+
+def op_profile(ctx):
+    return "GET /user/profile", "GET", "/user/profile", {"headers": ctx.auth()}
+
+
+def op_list_projects(ctx):
+    return "GET /projects", "GET", "/projects", {}
+
+
+def op_query_projects(ctx):
+    params = {"fund_id": random.randint(1, ctx.funds), "sort": random.choice(["id", "deadline", "progress"]), "limit": 20}
+    return "GET /projects/query", "GET", "/projects/query", {"params": params}
+
+
+def op_project_detail(ctx):
+    return "GET /projects/{project_id}", "GET", f"/projects/{ctx.project_id()}", {}
+
+
+def op_contributions(ctx):
+    return "GET /projects/{project_id}/contributions", "GET", f"/projects/{ctx.project_id()}/contributions", {}
+
+
+def op_timeseries(ctx):
+    return (
+        "GET /projects/{project_id}/contributions/timeseries", "GET",
+        f"/projects/{ctx.project_id()}/contributions/timeseries", {"params": {"interval": "day"}},
+    )
+
+
+def op_search(ctx):
+    return "GET /search", "GET", "/search", {"params": {"q": random.choice(["water", "school", "clinic village", "solar"])}}
+
+
+def op_stats(ctx):
+    return "GET /stats", "GET", "/stats", {}
+
+
+def op_contribute(ctx):
+    project_id = ctx.project_id()
+    body = {
+        "project_id": project_id,
+        "txid": uuid.uuid4().hex,
+        "amount": random.randint(1, 5),
+        "email": "donor@loadtest.local",
+        "name": "Load Donor",
+        "type_sender_wallet": "pera",
+        "sender_wallet_address": "SEND" + "0" * 54,
+        "receiver_wallet_address": "RECV" + "0" * 54,
+        "current_fund_wallet": 0,
+        "time_round": datetime.utcnow().isoformat(),
+    }
+    return "POST /projects/{project_id}/contributions", "POST", f"/projects/{project_id}/contributions", {"json": body}
+
+
+def op_distribute(ctx):
+    return (
+        "POST /projects/{project_id}/distribute_fund", "POST",
+        f"/projects/{ctx.funded_project_id()}/distribute_fund", {"headers": ctx.auth()},
+    )
+
+
+def op_algod_status(ctx):
+    return "GET /algorand/status", "GET", "/algorand/status", {}
+
+
+# PUT /projects/{project_id}/addFund is deliberately in no mix: contribution bursts go through
+# POST /contributions, the path payment webhooks take, and addFund's write target is not part
+# of what these runs measure.
+SCENARIOS = {
+    "signin_storm": [(0.9, op_signin), (0.1, op_profile)],
+    "browsing": [
+        (0.25, op_list_projects), (0.25, op_project_detail), (0.15, op_contributions),
+        (0.1, op_query_projects), (0.1, op_search), (0.05, op_timeseries), (0.05, op_stats),
+        (0.05, op_algod_status),
+    ],
+    "contribution_burst": [(0.8, op_contribute), (0.2, op_project_detail)],
+    "distributions": [(0.3, op_distribute), (0.7, op_project_detail)],
+}
+
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, max(0, int(round(pct / 100 * len(sorted_values))) - 1))
+    return sorted_values[index]
+
+
+def summarize(samples, elapsed):
+    latencies = sorted(latency for latency, _ in samples)
+    errors = sum(1 for _, ok in samples if not ok)
+    return {
+        "count": len(samples),
+        "errors": errors,
+        "throughput_rps": round(len(samples) / elapsed, 2),
+        "p50_ms": percentile(latencies, 50),
+        "p95_ms": percentile(latencies, 95),
+        "p99_ms": percentile(latencies, 99),
+        "max_ms": latencies[-1] if latencies else None,
+    }
+
+
+def run_scenario(ctx, name, duration, concurrency):
+    ops = SCENARIOS[name]
+    weights = [weight for weight, _ in ops]
+    funcs = [func for _, func in ops]
+    deadline = time.monotonic() + duration
+    per_thread = []
+
+    def worker():
+        session = requests.Session()
+        samples = defaultdict(list)
+        per_thread.append(samples)
+        while time.monotonic() < deadline:
+            endpoint, method, path, kwargs = random.choices(funcs, weights)[0](ctx)
+            start = time.perf_counter()
+            try:
+                response = session.request(method, ctx.base_url + path, timeout=30, **kwargs)
+                ok = response.status_code < 500 and response.status_code not in (429, 503)
+            except requests.RequestException:
+                ok = False
+            samples[endpoint].append(((time.perf_counter() - start) * 1e3, ok))
+
+    started = time.monotonic()
+    threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.monotonic() - started
+
+    merged = defaultdict(list)
+    for samples in per_thread:
+        for endpoint, values in samples.items():
+            merged[endpoint].extend(values)
+    everything = [sample for values in merged.values() for sample in values]
+    return {
+        "scenario": name,
+        "duration_s": round(elapsed, 2),
+        "concurrency": concurrency,
+        "total": summarize(everything, elapsed),
+        "endpoints": {endpoint: summarize(values, elapsed) for endpoint, values in sorted(merged.items())},
+    }
+
+
+def start_app(port, stub_port):
+    env = dict(os.environ)
+    env.setdefault("API_TOKEN", "loadtest")
+    env.setdefault("GOOGLE_API_KEY", "loadtest")
+    env["ALGOD_ADDRESS"] = f"http://127.0.0.1:{stub_port}"
+    env["PROXY_PREFIX"] = ""
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1", "--port", str(port), "--log-level", "warning"],
+        cwd=ROOT, env=env,
+    )
+    base_url = f"http://127.0.0.1:{port}"
+    for _ in range(100):
+        try:
+            if requests.get(base_url + "/health-check", timeout=1).ok:
+                return process, base_url
+        except requests.RequestException:
+            pass
+        time.sleep(0.2)
+    process.terminate()
+    raise RuntimeError("app did not become healthy")
+
+
+def sign_in_pool(ctx, size):
+    session = requests.Session()
+    for user in random.sample(range(1, ctx.users + 1), min(size, ctx.users)):
+        response = session.post(ctx.base_url + "/signin", json={"email": f"user{user}@loadtest.local", "password": LOADTEST_PASSWORD})
+        if response.ok:
+            ctx.tokens.append(response.json()["body"]["token"])
+    if not ctx.tokens:
+        raise RuntimeError("could not sign in any seeded user; run loadtest/seed.py first")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--scenarios", nargs="+", default=list(SCENARIOS), choices=list(SCENARIOS))
+    parser.add_argument("--duration", type=float, default=30)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--app-url", help="use an already running app instead of starting one")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--stub-port", type=int, default=8980)
+    parser.add_argument("--stub-latency-ms", type=float, default=20)
+    parser.add_argument("--users", type=int, default=2000, help="must match loadtest/seed.py")
+    parser.add_argument("--projects", type=int, default=10000, help="must match loadtest/seed.py")
+    parser.add_argument("--funds", type=int, default=200, help="must match loadtest/seed.py")
+    parser.add_argument("--output", help="write JSON results here instead of stdout")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+    random.seed(args.seed)
+
+    stub_server = stubs.serve(args.stub_port, args.stub_latency_ms)
+    process = None
+    try:
+        if args.app_url:
+            base_url = args.app_url
+        else:
+            process, base_url = start_app(args.port, args.stub_port)
+
+        ctx = Context(base_url, args.users, args.projects, args.funds)
+        sign_in_pool(ctx, 50)
+
+        results = {
+            "started_at": datetime.utcnow().isoformat(),
+            "args": vars(args),
+            "scenarios": [run_scenario(ctx, name, args.duration, args.concurrency) for name in args.scenarios],
+        }
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait()
+        stub_server.shutdown()
+
+    output = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output)
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
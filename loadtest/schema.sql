@@ -0,0 +1,94 @@
+-- Base tables for a throwaway load-test database, reconstructed from the queries in
+-- main.py / db_utils.py. Production already has these; apply migrations/ on top.
+
+CREATE TABLE IF NOT EXISTS algo_users (
+    id SERIAL PRIMARY KEY,
+    email TEXT UNIQUE NOT NULL,
+    username TEXT,
+    password TEXT NOT NULL,
+    birthday DATE,
+    follow_count INT DEFAULT 0,
+    wallet_name TEXT,
+    wallet_address TEXT,
+    created_at TIMESTAMP NOT NULL DEFAULT NOW(),
+    updated_at TIMESTAMP NOT NULL DEFAULT NOW(),
+    deleted_at TIMESTAMP
+);
+
+CREATE TABLE IF NOT EXISTS algo_funds (
+    id SERIAL PRIMARY KEY,
+    name_fund TEXT,
+    user_id INT REFERENCES algo_users (id),
+    members TEXT[],
+    description TEXT,
+    logo TEXT,
+    created_at TIMESTAMP NOT NULL DEFAULT NOW(),
+    updated_at TIMESTAMP NOT NULL DEFAULT NOW(),
+    deleted_at TIMESTAMP
+);
+
+CREATE TABLE IF NOT EXISTS algo_projects (
+    id SERIAL PRIMARY KEY,
+    user_id INT,
+    name TEXT,
+    description TEXT,
+    fund_id INT,
+    current_fund DOUBLE PRECISION DEFAULT 0,
+    fund_raise_total DOUBLE PRECISION,
+    fund_raise_count INT DEFAULT 0,
+    deadline TIMESTAMP,
+    project_hash TEXT,
+    is_verify BOOLEAN,
+    status TEXT,
+    created_at TIMESTAMP NOT NULL DEFAULT NOW(),
+    updated_at TIMESTAMP NOT NULL DEFAULT NOW(),
+    deleted_at TIMESTAMP,
+    linkcardImage TEXT[],
+    type TEXT
+);
+
+CREATE TABLE IF NOT EXISTS algo_contributions (
+    id SERIAL PRIMARY KEY,
+    project_id INT NOT NULL,
+    txid TEXT,
+    amount DOUBLE PRECISION,
+    email TEXT,
+    sodienthoai TEXT,
+    address TEXT,
+    name TEXT,
+    type_sender_wallet TEXT,
+    sender_wallet_address TEXT,
+    time_round TIMESTAMP,
+    created_at TIMESTAMP NOT NULL DEFAULT NOW(),
+    updated_at TIMESTAMP NOT NULL DEFAULT NOW()
+);
+
+CREATE TABLE IF NOT EXISTS algo_receivers (
+    id SERIAL PRIMARY KEY,
+    project_id INT NOT NULL,
+    email TEXT,
+    sodienthoai TEXT,
+    address TEXT,
+    name TEXT,
+    type_receiver_wallet TEXT,
+    receiver_wallet_address TEXT,
+    created_at TIMESTAMP NOT NULL DEFAULT NOW(),
+    updated_at TIMESTAMP NOT NULL DEFAULT NOW()
+);
+
+CREATE TABLE IF NOT EXISTS algo_receivers_transaction (
+    id SERIAL PRIMARY KEY,
+    receiver_id INT NOT NULL,
+    project_id INT NOT NULL,
+    transaction_count INT,
+    amount DOUBLE PRECISION,
+    time_round TIMESTAMP,
+    created_at TIMESTAMP NOT NULL DEFAULT NOW(),
+    updated_at TIMESTAMP NOT NULL DEFAULT NOW()
+);
+
+CREATE TABLE IF NOT EXISTS chat_history (
+    user_id TEXT,
+    request_id TEXT,
+    chat JSONB
+);
@@ -0,0 +1,104 @@
+"""Create the base schema, apply migrations and seed synthetic data for load tests.
+
+Uses the same DB_* environment variables as the app; point them at a throwaway
+database. Every seeded user has the password LOADTEST_PASSWORD.
+
+    python loadtest/seed.py --users 5000 --projects 20000 --reset
+"""
+import argparse
+import os
+import sys
+import time
+
+import bcrypt
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from db_utils import get_db_connection  # noqa: E402
+from migrate import migrate  # noqa: E402
+
+LOADTEST_PASSWORD = "loadtest-password"
+
+# Derived tables are listed too: TRUNCATE does not fire the row triggers that maintain them
+TABLES = (
+    "algo_receivers_transaction", "algo_contributions", "algo_receivers",
+    "algo_projects", "algo_funds", "algo_users", "chat_history",
+    "algo_fund_stats", "algo_contribution_rollups",
+    "algo_projects_archive", "algo_receivers_archive", "algo_contributions_archive",
+    "algo_receivers_transaction_archive", "app_jobs",
+)
+
+SEED_SQL = '''
+INSERT INTO algo_users (email, username, password, birthday, wallet_name, wallet_address)
+SELECT 'user' || g || '@loadtest.local', 'user' || g, %(password)s, DATE '1990-01-01' + (g %% 9000),
+       'pera', 'WALLET' || lpad(g::text, 52, '0')
+FROM generate_series(1, %(users)s) g;
+
+INSERT INTO algo_funds (name_fund, user_id, members, description, logo)
+SELECT 'Fund ' || g, 1 + (g %% %(users)s),
+       ARRAY[(1 + (g %% %(users)s))::text, (1 + ((g * 7) %% %(users)s))::text],
+       'Community fund ' || g || ' supporting water, school and clinic projects', 'https://cdn.loadtest.local/logo.png'
+FROM generate_series(1, %(funds)s) g;
+
+-- Every 10th project is fully funded so distribute_fund has work to do.
+INSERT INTO algo_projects (user_id, name, description, fund_id, current_fund, fund_raise_total,
+                           fund_raise_count, deadline, project_hash, is_verify, status, linkcardImage, type)
+SELECT 1 + (g %% %(users)s), 'Project ' || g,
+       'Build ' || (ARRAY['water', 'school', 'clinic', 'solar', 'bridge'])[1 + g %% 5] || ' for village ' || g,
+       1 + (g %% %(funds)s),
+       CASE WHEN g %% 10 = 0 THEN 1000 ELSE (g %% 900) END, 1000, 0,
+       NOW() + ((g %% 90) || ' days')::interval, md5(g::text), g %% 2 = 0,
+       (ARRAY['active', 'pending', 'closed'])[1 + g %% 3],
+       ARRAY['https://cdn.loadtest.local/' || g || '.png'], (ARRAY['charity', 'startup'])[1 + g %% 2]
+FROM generate_series(1, %(projects)s) g;
+
+INSERT INTO algo_receivers (project_id, email, sodienthoai, address, name, type_receiver_wallet, receiver_wallet_address)
+SELECT p, 'receiver' || p || '_' || r || '@loadtest.local', '0900' || lpad(r::text, 6, '0'), 'Address ' || r,
+       'Receiver ' || r, 'pera', 'RECV' || lpad((p * 100 + r)::text, 54, '0')
+FROM generate_series(1, %(projects)s) p, generate_series(1, %(receivers)s) r;
+
+INSERT INTO algo_contributions (project_id, txid, amount, email, name, type_sender_wallet,
+                                sender_wallet_address, time_round)
+SELECT 1 + (g %% %(projects)s), 'SEEDTX' || g, 1 + (g %% 50), 'donor' || g || '@loadtest.local',
+       'Donor ' || g, 'pera', 'SEND' || lpad(g::text, 54, '0'), NOW() - ((g %% 2160) || ' hours')::interval
+FROM generate_series(1, %(contributions)s) g;
+
+ANALYZE;
+'''
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--users", type=int, default=2000)
+    parser.add_argument("--funds", type=int, default=200)
+    parser.add_argument("--projects", type=int, default=10000)
+    parser.add_argument("--receivers", type=int, default=3, help="receivers per project")
+    parser.add_argument("--contributions", type=int, default=200000)
+    parser.add_argument("--reset", action="store_true", help="truncate the app tables first")
+    args = parser.parse_args()
+
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    try:
+        with open(os.path.join(os.path.dirname(os.path.abspath(__file__)), "schema.sql")) as f:
+            cursor.execute(f.read())
+        conn.commit()
+        migrate(conn)
+
+        if args.reset:
+            cursor.execute(f"TRUNCATE {', '.join(TABLES)} RESTART IDENTITY CASCADE")
+            conn.commit()
+
+        start = time.perf_counter()
+        password = bcrypt.hashpw(LOADTEST_PASSWORD.encode("utf-8"), bcrypt.gensalt()).decode("utf-8")
+        cursor.execute(SEED_SQL, {**vars(args), "password": password})
+        conn.commit()
+        print(f"seeded {vars(args)} in {time.perf_counter() - start:.1f}s")
+    finally:
+        cursor.close()
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
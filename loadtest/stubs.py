@@ -0,0 +1,78 @@
+"""Local stand-ins for the external services the app talks to.
+
+Serves the algod REST endpoints used by test_algorand.py (point ALGOD_ADDRESS at
+it) and a minimal generative-model endpoint for LLM-backed routes, each with a
+configurable artificial latency so load tests do not depend on remote services.
+
+    python loadtest/stubs.py --port 8980 --latency-ms 20
+"""
+import argparse
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+ALGOD_STATUS = {
+    "catchup-time": 0,
+    "last-round": 40000000,
+    "last-version": "https://github.com/algorandfoundation/specs/tree/stub",
+    "next-version": "https://github.com/algorandfoundation/specs/tree/stub",
+    "next-version-round": 40000001,
+    "next-version-supported": True,
+    "stopped-at-unsupported-round": False,
+    "time-since-last-round": 1000000000,
+}
+
+
+def make_handler(latency: float):
+    class StubHandler(BaseHTTPRequestHandler):
+        def _reply(self, payload, status=200):
+            time.sleep(latency)
+            body = json.dumps(payload).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            if self.path.startswith("/v2/status"):
+                self._reply(ALGOD_STATUS)
+            elif self.path.startswith("/health"):
+                self._reply({"status": "ok"})
+            else:
+                self._reply({"message": "not stubbed"}, status=404)
+
+        def do_POST(self):
+            length = int(self.headers.get("Content-Length", 0))
+            self.rfile.read(length)
+            if ":generateContent" in self.path:
+                self._reply({
+                    "candidates": [{
+                        "content": {"parts": [{"text": "stub response"}], "role": "model"},
+                        "finishReason": "STOP",
+                    }],
+                    "usageMetadata": {"promptTokenCount": 1, "candidatesTokenCount": 2, "totalTokenCount": 3},
+                })
+            else:
+                self._reply({"message": "not stubbed"}, status=404)
+
+        def log_message(self, format, *args):
+            pass
+
+    return StubHandler
+
+
+def serve(port: int, latency_ms: float) -> ThreadingHTTPServer:
+    """Start the stub server on a daemon thread and return it."""
+    server = ThreadingHTTPServer(("127.0.0.1", port), make_handler(latency_ms / 1000))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--port", type=int, default=8980)
+    parser.add_argument("--latency-ms", type=float, default=20)
+    args = parser.parse_args()
+    ThreadingHTTPServer(("127.0.0.1", args.port), make_handler(args.latency_ms / 1000)).serve_forever()
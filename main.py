@@ -1,24 +1,65 @@
+import csv
+import hmac
 import json
 import logging
 import os
+import time
 from datetime import datetime, timedelta
 from logging import getLogger
 from typing import Dict, List
 
 import bcrypt  # type: ignore
 import requests
-from db_utils import get_db_connection
+from admission import AdmissionController, AdmissionMiddleware, load_rules
+from archiver import ARCHIVER_ENABLED, archiver, restore_project
+from auth_cache import VerifiedTokenCache
+from compression import CompressionMiddleware
+from distribution import DISTRIBUTE_FUNDS_JOB, DistributionError, check_distributable
+from db_utils import (
+    DB_REPLICA_DSNS,
+    DB_REPLICA_MAX_LAG_SECONDS,
+    PoolTimeout,
+    execute_prepared,
+    get_db_connection,
+    get_read_connection,
+    read_from_primary,
+    register_statement,
+)
 from dotenv import load_dotenv  # type: ignore
-from fastapi import FastAPI, HTTPException, Depends, Query, status
+from export import EXPORT_FORMATS, ExportError, plan_export, stream_export
+from fastapi import FastAPI, File, HTTPException, Depends, Header, Query, Request, UploadFile, status
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse  # type: ignore
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse  # type: ignore
 from langchain_core.messages import HumanMessage, SystemMessage
 from langchain_google_genai import ChatGoogleGenerativeAI
+from live_updates import fetch_funding_state, funding_hub, notify_funding, stream_funding
+import metrics
+import slow_query
+from metrics import MetricsMiddleware
+from profiling import ProfilingMiddleware, profile_store
 from pydantic import BaseModel, EmailStr, constr
+from receiver_import import detect_format, import_receivers, iter_records
 from request_models import MermaidRequest, RequestModel, UserRequest
+from etags import if_none_match, make_etag, not_modified, set_etag
+from project_repository import (
+    PROGRESS_EXPR,
+    PROJECT_SORT_KEYS,
+    add_project_funding,
+    fetch_project,
+    fetch_project_version,
+    fetch_projects,
+    fetch_table_versions,
+    patch_project,
+    project_exists,
+    query_projects,
+)
+from serializers import FastJSONResponse, row_mapper
+from state_backend import get_state_backend
 from user_session import ChatSession, ChatSessionManager
 from typing import List, Optional
 import jwt
+from jobs import enqueue, fetch_job, job_runner
 from fastapi.security import OAuth2PasswordBearer
 from test_algorand import router as algorand_router
 
@@ -31,13 +72,20 @@ SECRET_KEY = os.getenv("SECRET_KEY", "Android@123")  # Ensure you have a strong
 JWT_EXPIRATION_TIME = 60
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="signin")
+optional_oauth2_scheme = OAuth2PasswordBearer(tokenUrl="signin", auto_error=False)
+
+# Verified tokens are cached until their exp so get_current_user skips jwt.decode on repeat requests
+token_cache = VerifiedTokenCache(
+    maxsize=int(os.getenv("JWT_CACHE_SIZE", "10000")),
+    store=get_state_backend(),
+    sync_interval=float(os.getenv("JWT_REVOCATION_SYNC_SECONDS", "5")),
+)
 
 # Load environment variables from .env file
 load_dotenv()
 
 logging.basicConfig(level=logging.INFO)
 logger = getLogger(__name__)
-conn = get_db_connection()
 PROXY_PREFIX = os.getenv("PROXY_PREFIX", "/api")
 app = FastAPI(root_path=PROXY_PREFIX)
 
@@ -51,6 +99,10 @@ class ModelKWArgs(BaseModel):
     }
 
 
+# Admission control sits inside CORS so 429/503 rejections still carry CORS headers
+admission_controller = AdmissionController(load_rules(), state_backend=get_state_backend())
+app.add_middleware(AdmissionMiddleware, controller=admission_controller)
+
 origins = [
     "*",
 ]
@@ -60,16 +112,119 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    # Browsers hide non-safelisted response headers from cross-origin scripts unless listed here
+    expose_headers=["X-Next-After", "Idempotent-Replay", "X-Profile-Id", "ETag", "Location", "Retry-After"],
 )
 
+app.add_middleware(CompressionMiddleware)
+
+# Outside admission and CORS so queueing time and rejections are part of the measured latency
+metrics.install(admission_controller)
+slow_query.install()
+app.add_middleware(MetricsMiddleware)
+# Off unless PROFILE_SECRET is set or a route is armed via /admin/profiling
+app.add_middleware(ProfilingMiddleware)
+
 app.include_router(algorand_router)
 
+
+@app.exception_handler(PoolTimeout)
+async def pool_timeout_handler(request: Request, exc: PoolTimeout):
+    # Exhausted pool: shed the request quickly, like admission control does, instead of queueing forever
+    logger.warning(f"{request.method} {request.url.path}: {str(exc)}")
+    return JSONResponse(status_code=503, content={"detail": "Database busy, retry shortly"}, headers={"Retry-After": "1"})
+
+# Read-your-writes: after a successful write the client is pinned to the primary for as
+# long as a replica may lag, so its next GET cannot miss what it just wrote. Browsers on
+# the same origin carry the pin in a cookie; bearer-token clients (cross-origin UIs,
+# scripts) do not send it back, so for them the pin is keyed on the user id in the
+# shared state backend, where every worker sees it.
+READ_PRIMARY_COOKIE = "db_read_primary_until"
+READ_PRIMARY_NAMESPACE = "read_primary"
+
+
+def _bearer_user_id(request: Request) -> Optional[str]:
+    scheme, _, token = request.headers.get("authorization", "").partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        return None
+    user_id = token_cache.get(token)
+    if user_id is None:
+        try:
+            user_id = jwt.decode(token, SECRET_KEY, algorithms=["HS256"]).get("sub")
+        except jwt.PyJWTError:
+            return None
+    return str(user_id) if user_id is not None else None
+
+
+def _user_pinned_to_primary(user_id: str) -> bool:
+    return get_state_backend().get(READ_PRIMARY_NAMESPACE, user_id) is not None
+
+
+def _pin_user_to_primary(user_id: str):
+    get_state_backend().set(READ_PRIMARY_NAMESPACE, user_id, "1", ttl=DB_REPLICA_MAX_LAG_SECONDS)
+
+
+if DB_REPLICA_DSNS:
+    @app.middleware("http")
+    async def route_reads_after_writes(request: Request, call_next):
+        try:
+            pinned = float(request.cookies.get(READ_PRIMARY_COOKIE, 0)) > time.time()
+        except ValueError:
+            pinned = False
+        # Token verification may hit the state backend; keep it off the event loop
+        user_id = await run_in_threadpool(_bearer_user_id, request) if "authorization" in request.headers else None
+        if not pinned and user_id is not None:
+            try:
+                pinned = await run_in_threadpool(_user_pinned_to_primary, user_id)
+            except Exception as e:
+                # Unknown pin state: the primary is always safe to read from
+                logger.error(f"Read-your-writes pin lookup failed: {str(e)}")
+                pinned = True
+        token = read_from_primary.set(pinned)
+        try:
+            response = await call_next(request)
+        finally:
+            read_from_primary.reset(token)
+
+        if request.method not in ("GET", "HEAD", "OPTIONS") and response.status_code < 400:
+            response.set_cookie(
+                READ_PRIMARY_COOKIE,
+                str(time.time() + DB_REPLICA_MAX_LAG_SECONDS),
+                max_age=int(DB_REPLICA_MAX_LAG_SECONDS) + 1,
+                httponly=True,
+            )
+            if user_id is not None:
+                try:
+                    await run_in_threadpool(_pin_user_to_primary, user_id)
+                except Exception as e:
+                    logger.error(f"Could not pin user {user_id} to the primary: {str(e)}")
+        return response
+
 # fix the region_name -> us-west-2
-session_manager = ChatSessionManager(conn=conn)
+session_manager = ChatSessionManager(store=get_state_backend())
 
 
 API_TOKEN = os.environ["API_TOKEN"]
 
+
+def require_admin(x_admin_token: Optional[str] = Header(None)):
+    if x_admin_token is None or not hmac.compare_digest(x_admin_token.encode(), API_TOKEN.encode()):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Admin token required")
+
+
+# Separate scrape credential so Prometheus does not need the admin token; unset means admin only
+METRICS_TOKEN = os.getenv("METRICS_TOKEN", "")
+
+
+def require_metrics_access(
+    authorization: Optional[str] = Header(None),
+    x_admin_token: Optional[str] = Header(None),
+):
+    scheme, _, token = (authorization or "").partition(" ")
+    if METRICS_TOKEN and scheme.lower() == "bearer" and hmac.compare_digest(token.encode(), METRICS_TOKEN.encode()):
+        return
+    require_admin(x_admin_token)
+
 # USERS API
 class SignInRequest(BaseModel):
     email: str
@@ -158,7 +313,13 @@ def sign_in(sign_in_request: SignInRequest):
 
 
 @app.post("/signout")
-def sign_out():
+def sign_out(token: Optional[str] = Depends(optional_oauth2_scheme)):
+    if token:
+        try:
+            payload = jwt.decode(token, SECRET_KEY, algorithms=["HS256"])
+            token_cache.revoke(token, payload.get("exp", time.time() + JWT_EXPIRATION_TIME * 60))
+        except jwt.PyJWTError:
+            pass  # expired or invalid tokens are already rejected by get_current_user
     return JSONResponse(status_code=200, content={"statusCode": 200, "body": "Signed out successfully"})
 
 
@@ -222,11 +383,18 @@ class UpdateUserRequest(BaseModel):
 
 
 def get_current_user(token: str = Depends(oauth2_scheme)):
+    user_id = token_cache.get(token)
+    if user_id is not None:
+        return user_id
+    if token_cache.is_revoked(token):
+        raise HTTPException(status_code=401, detail="Token has been revoked")
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=["HS256"])
         user_id = payload.get("sub")
         if user_id is None:
             raise HTTPException(status_code=401, detail="Invalid token")
+        if "exp" in payload:
+            token_cache.put(token, user_id, payload["exp"])
         return user_id
     except jwt.ExpiredSignatureError:
         raise HTTPException(status_code=401, detail="Token has expired")
@@ -331,33 +499,64 @@ def get_current_user_info(current_user: int = Depends(get_current_user)):
         cursor.close()
         conn.close()
 
+user_row_to_dict = row_mapper("id", "email", "username", "birthday", "created_at", "wallet_name", "wallet_address")
+
+USER_DIRECTORY_SELECT = "SELECT id, email, username, birthday, created_at, wallet_name, wallet_address FROM algo_users"
+# Must stay identical to the trigram index expression in migrations/007
+USER_SEARCH_EXPR = "(lower(email) || ' ' || lower(coalesce(username, '')))"
+
+
+def like_escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
 @app.get("/users", response_model=List[UserResponse])
-def get_users(current_user: int = Depends(get_current_user), email: Optional[str] = Query(None)):
-    conn = get_db_connection()
+def get_users(
+    current_user: int = Depends(get_current_user),
+    email: Optional[str] = Query(None),
+    q: Optional[str] = Query(None, min_length=1, max_length=100),
+    match: str = Query("prefix", pattern="^(prefix|contains)$"),
+    limit: int = Query(50, ge=1, le=200),
+    after: Optional[int] = Query(None, ge=0),
+):
+    """Live users, one page at a time in id order.
+
+    ``q`` matches the start of the email or username (``match=prefix``) or any
+    part of either (``match=contains``, trigram-indexed). Pass the id in the
+    X-Next-After response header as ``after`` to get the next page.
+    """
+    conn = get_read_connection()
     cursor = conn.cursor()
 
     try:
+        conditions = ["deleted_at IS NULL"]
+        params: List = []
         if email:
-            cursor.execute('SELECT id, email, username, birthday, created_at, wallet_name, wallet_address FROM algo_users WHERE email = %s', (email,))
-        else:
-            cursor.execute('SELECT id, email, username, birthday, created_at, wallet_name, wallet_address FROM algo_users')
-
-        users = cursor.fetchall()
-
-        user_list = [
-            {
-                "id": user[0],
-                "email": user[1],
-                "username": user[2],
-                "birthday": user[3].strftime('%Y-%m-%d'),
-                "created_at": user[4].strftime('%Y-%m-%d %H:%M:%S'),
-                "wallet_name": user[5],
-                "wallet_address": user[6]
-            }
-            for user in users
-        ]
-
-        return JSONResponse(status_code=200, content={"statusCode": 200, "body": user_list})
+            conditions.append("email = %s")
+            params.append(email)
+        if q:
+            pattern = like_escape(q.lower())
+            if match == "prefix":
+                conditions.append("(lower(email) LIKE %s OR lower(username) LIKE %s)")
+                params.extend([pattern + "%", pattern + "%"])
+            else:
+                conditions.append(f"{USER_SEARCH_EXPR} LIKE %s")
+                params.append("%" + pattern + "%")
+        if after is not None:
+            conditions.append("id > %s")
+            params.append(after)
+
+        # One extra row tells us whether there is a next page without a COUNT(*)
+        cursor.execute(
+            f"{USER_DIRECTORY_SELECT} WHERE {' AND '.join(conditions)} ORDER BY id LIMIT %s;",
+            params + [limit + 1],
+        )
+        rows = cursor.fetchall()
+
+        user_list = [user_row_to_dict(user) for user in rows[:limit]]
+        headers = {"X-Next-After": str(user_list[-1]["id"])} if len(rows) > limit else None
+
+        return FastJSONResponse(status_code=200, content={"statusCode": 200, "body": user_list}, headers=headers)
     
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error: {str(e)}")
@@ -439,7 +638,7 @@ def get_funds_by_user(user_id: int, current_user: int = Depends(get_current_user
     if user_id != current_user:
         raise HTTPException(status_code=403, detail="Access forbidden: you do not have permission to access these funds")
 
-    conn = get_db_connection()
+    conn = get_read_connection()
     cursor = conn.cursor()
 
     try:
@@ -489,7 +688,7 @@ def get_one_fund_by_user(fund_id: int, user_id: int, current_user: int = Depends
     if user_id != current_user:
         raise HTTPException(status_code=403, detail="Access forbidden: you do not have permission to access these funds")
 
-    conn = get_db_connection()
+    conn = get_read_connection()
     cursor = conn.cursor()
    
     try:
@@ -668,16 +867,23 @@ class ContributionResponse(BaseModel):
     project_current_fund: float
     fund_raise_count: int
 
+contribution_row_to_dict = row_mapper(
+    "id", "project_id", "txid", "amount", "email", "sodienthoai", "address", "name",
+    "type_sender_wallet", "sender_wallet_address", "time_round",
+    "created_at", "updated_at", "project_current_fund", "fund_raise_count"
+)
+
 @app.get("/projects/{project_id}/contributions", response_model=List[ContributionResponse])
 def get_contributions_by_project_id(project_id: int):
-    conn = get_db_connection()
+    conn = get_read_connection()
     cursor = conn.cursor()
 
     try:
         cursor.execute('''
-            SELECT c.id, c.project_id, c.txid, c.amount, c.email, c.sodienthoai, c.address, c.name,
-                   c.type_sender_wallet, c.sender_wallet_address, c.time_round, 
-                   c.created_at, c.updated_at, p.current_fund, p.fund_raise_count
+            SELECT c.id, c.project_id, COALESCE(c.txid, ''), c.amount, COALESCE(c.email, ''),
+                   COALESCE(c.sodienthoai, ''), COALESCE(c.address, ''), COALESCE(c.name, ''),
+                   COALESCE(c.type_sender_wallet, ''), COALESCE(c.sender_wallet_address, ''), c.time_round, 
+                   c.created_at, c.updated_at, p.current_fund, COALESCE(p.fund_raise_count, 0)
             FROM algo_contributions AS c
             JOIN algo_projects AS p ON c.project_id = p.id
             WHERE c.project_id = %s;
@@ -688,32 +894,9 @@ def get_contributions_by_project_id(project_id: int):
         if not contributions:
             raise HTTPException(status_code=404, detail="No contributions found for this project.")
 
-        response = []
-        for contrib in contributions:
-            if len(contrib) < 15:  
-                raise HTTPException(status_code=500, detail=f"Unexpected number of columns returned: {len(contrib)}")
-
-            contribution = ContributionResponse(
-                id=contrib[0],
-                project_id=contrib[1],
-                txid=contrib[2] or "",  
-                amount=contrib[3],
-                email=contrib[4] or "",
-                sodienthoai=contrib[5] or "",
-                address=contrib[6] or "",
-                name=contrib[7] or "",
-                type_sender_wallet=contrib[8] or "",
-                sender_wallet_address=contrib[9] or "",
-                time_round=contrib[10].isoformat() if contrib[10] else None,
-                created_at=contrib[11].isoformat() if contrib[11] else None,
-                updated_at=contrib[12].isoformat() if contrib[12] else None,
-                project_current_fund=contrib[13],
-                fund_raise_count=contrib[14] if len(contrib) > 14 else 0
-            )
-
-            response.append(contribution.dict())
+        response = [contribution_row_to_dict(contrib) for contrib in contributions]
 
-        return JSONResponse(status_code=200, content={"statusCode": 200, "body": response})
+        return FastJSONResponse(status_code=200, content={"statusCode": 200, "body": response})
 
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error: {str(e)}")
@@ -721,6 +904,49 @@ def get_contributions_by_project_id(project_id: int):
         cursor.close()
         conn.close()
 
+register_statement("receiver_wallet_by_project", '''
+    SELECT receiver_wallet_address
+    FROM algo_receivers
+    WHERE project_id = $1
+    LIMIT 1
+''')
+
+# Idempotent on (project_id, txid): a replayed webhook gets the original id back with
+# created = false, and the caller must then leave the project counters alone.
+register_statement("insert_contribution", '''
+    WITH inserted AS (
+        INSERT INTO algo_contributions (
+            project_id, txid, amount, email, sodienthoai, address, name,
+            type_sender_wallet, sender_wallet_address, time_round
+        )
+        VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9, $10)
+        ON CONFLICT (project_id, txid) DO NOTHING
+        RETURNING id
+    )
+    SELECT id, TRUE FROM inserted
+    UNION ALL
+    SELECT id, FALSE FROM algo_contributions
+    WHERE project_id = $1 AND txid = $2 AND NOT EXISTS (SELECT 1 FROM inserted)
+''')
+
+register_statement("contribution_by_txid", '''
+    SELECT c.id, c.project_id, COALESCE(c.txid, ''), c.amount, COALESCE(c.email, ''),
+           COALESCE(c.sodienthoai, ''), COALESCE(c.address, ''), COALESCE(c.name, ''),
+           COALESCE(c.type_sender_wallet, ''), COALESCE(c.sender_wallet_address, ''), c.time_round,
+           c.created_at, c.updated_at, p.current_fund, COALESCE(p.fund_raise_count, 0)
+    FROM algo_contributions AS c
+    JOIN algo_projects AS p ON c.project_id = p.id
+    WHERE c.project_id = $1 AND c.txid = $2
+''')
+
+register_statement("bump_project_counters", '''
+    UPDATE algo_projects
+    SET current_fund = current_fund + $1,
+        fund_raise_count = fund_raise_count + 1
+    WHERE id = $2
+    RETURNING current_fund, fund_raise_count, fund_raise_total
+''')
+
 @app.post("/projects/{project_id}/contributions", response_model=ContributionResponse)
 def insert_contribution(
     project_id: int,
@@ -734,12 +960,7 @@ def insert_contribution(
     cursor = conn.cursor()
 
     try:
-        cursor.execute('''
-            SELECT receiver_wallet_address
-            FROM algo_receivers
-            WHERE project_id = %s
-            LIMIT 1;  -- Assuming you want one receiver, adjust as needed
-        ''', (project_id,))
+        execute_prepared(cursor, "receiver_wallet_by_project", (project_id,))
         
         receiver_wallet_address_row = cursor.fetchone()
         if not receiver_wallet_address_row:
@@ -747,31 +968,38 @@ def insert_contribution(
 
         receiver_wallet_address = receiver_wallet_address_row[0]
 
-        cursor.execute('''
-            INSERT INTO algo_contributions (
-                project_id, txid, amount, email, sodienthoai, address, name, 
-                type_sender_wallet, sender_wallet_address, time_round
-            )
-            VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-            RETURNING id;
-        ''', (
+        execute_prepared(cursor, "insert_contribution", (
             project_id, contribution.txid, contribution.amount, contribution.email,
             contribution.sodienthoai, contribution.address, contribution.name,
             contribution.type_sender_wallet, contribution.sender_wallet_address,
             contribution.time_round
         ))
 
-        contribution_id = cursor.fetchone()[0]
+        inserted = cursor.fetchone()
+        if inserted is None or not inserted[1]:
+            # Replay of a txid we already recorded: answer with the original row and
+            # today's counters without touching them. (None: the conflicting insert
+            # committed after this statement's snapshot was taken.)
+            conn.rollback()
+            execute_prepared(cursor, "contribution_by_txid", (project_id, contribution.txid))
+            original = cursor.fetchone()
+            conn.rollback()
+            if original is None:
+                raise HTTPException(status_code=409, detail="Contribution with this txid is being recorded, retry later.")
+            response_ = contribution_row_to_dict(original)
+            response_["receiver_wallet_address"] = receiver_wallet_address
+            return FastJSONResponse(
+                status_code=200,
+                content={"statusCode": 200, "body": response_},
+                headers={"Idempotent-Replay": "true"},
+            )
 
-        cursor.execute('''
-            UPDATE algo_projects
-            SET current_fund = current_fund + %s,
-                fund_raise_count = fund_raise_count + 1
-            WHERE id = %s
-            RETURNING current_fund, fund_raise_count;
-        ''', (contribution.amount, project_id))
+        contribution_id = inserted[0]
+
+        execute_prepared(cursor, "bump_project_counters", (contribution.amount, project_id))
 
-        updated_fund, updated_raise_count = cursor.fetchone()
+        updated_fund, updated_raise_count, fund_raise_total = cursor.fetchone()
+        notify_funding(cursor, project_id, updated_fund, fund_raise_total, updated_raise_count)
         conn.commit()
         
         response_ = {
@@ -785,13 +1013,16 @@ def insert_contribution(
             "name": contribution.name or "",
             "type_sender_wallet": contribution.type_sender_wallet,
             "sender_wallet_address": contribution.sender_wallet_address,
-            "time_round": contribution.time_round.strftime('%Y-%m-%d %H:%M:%S'),
+            "time_round": contribution.time_round,
             "project_current_fund": updated_fund,  # Use updated fund from algo_projects
             "fund_raise_count": updated_raise_count,
             "receiver_wallet_address": receiver_wallet_address  # Include in the response
         }
-        return JSONResponse(status_code=200, content={"statusCode": 200, "body": response_})
-    
+        return FastJSONResponse(status_code=200, content={"statusCode": 200, "body": response_})
+
+    except HTTPException:
+        conn.rollback()
+        raise
     except Exception as e:
         conn.rollback()
         raise HTTPException(status_code=500, detail=f"Error: {str(e)}")
@@ -799,148 +1030,222 @@ def insert_contribution(
         cursor.close()
         conn.close()
 
+contribution_bucket_row_to_dict = row_mapper("bucket", "amount", "count")
+
+@app.get("/projects/{project_id}/contributions/timeseries")
+def get_contribution_timeseries(
+    project_id: int,
+    interval: str = Query("day", pattern="^(hour|day|week)$"),
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    limit: int = Query(500, ge=1, le=5000),
+):
+    conn = get_read_connection()
+    cursor = conn.cursor()
+
+    try:
+        conditions = ["project_id = %s", "granularity = %s"]
+        params: list = [project_id, interval]
+        if start is not None:
+            conditions.append("bucket >= date_trunc(%s, %s::timestamp)")
+            params.extend([interval, start])
+        if end is not None:
+            conditions.append("bucket < %s")
+            params.append(end)
+        params.append(limit)
+
+        # Most recent `limit` buckets, returned oldest first for charting
+        cursor.execute(f'''
+            SELECT bucket, amount, contribution_count
+            FROM (
+                SELECT bucket, amount, contribution_count
+                FROM algo_contribution_rollups
+                WHERE {" AND ".join(conditions)}
+                ORDER BY bucket DESC
+                LIMIT %s
+            ) recent
+            ORDER BY bucket;
+        ''', params)
+
+        buckets = [contribution_bucket_row_to_dict(row) for row in cursor.fetchall()]
+
+        return FastJSONResponse(status_code=200, content={
+            "statusCode": 200,
+            "body": {"project_id": project_id, "interval": interval, "buckets": buckets}
+        })
+
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error: {str(e)}")
+
+    finally:
+        cursor.close()
+        conn.close()
+
+@app.patch("/projects/{project_id}", response_model=ProjectResponse)
 @app.put("/projects/{project_id}", response_model=ProjectResponse)
 def update_project(project_id: int, project_request: CreateProjectRequest, current_user: dict = Depends(get_current_user)):
+    """Partial update: only supplied fields change, in a single UPDATE ... RETURNING."""
     conn = get_db_connection()
     cursor = conn.cursor()
-    updated_at = datetime.now()
 
     try:
-        cursor.execute('SELECT * FROM algo_projects WHERE id = %s', (project_id,))
-        current_project = cursor.fetchone()
+        fields = project_request.dict(exclude_none=True)
+        updated_project = patch_project(cursor, project_id, fields)
 
-        if not current_project:
+        if not updated_project:
+            conn.rollback()
             raise HTTPException(status_code=404, detail="Project not found.")
 
-        updated_fields = {
-            "user_id": project_request.user_id if project_request.user_id is not None else current_project[1],
-            "name": project_request.name if project_request.name is not None else current_project[2],
-            "description": project_request.description if project_request.description is not None else current_project[3],
-            "fund_id": project_request.fund_id if project_request.fund_id is not None else current_project[4],
-            "current_fund": project_request.current_fund if project_request.current_fund is not None else current_project[5],
-            "fund_raise_total": project_request.fund_raise_total if project_request.fund_raise_total is not None else current_project[6],
-            "fund_raise_count": project_request.fund_raise_count if project_request.fund_raise_count is not None else current_project[7],
-            "deadline": project_request.deadline if project_request.deadline is not None else current_project[8],
-            "project_hash": project_request.project_hash if project_request.project_hash is not None else current_project[9],
-            "is_verify": project_request.is_verify if project_request.is_verify is not None else current_project[10],
-            "status": project_request.status if project_request.status is not None else current_project[11],
-            "linkcardImage": project_request.linkcardImage if project_request.linkcardImage is not None else current_project[12], 
-            "type": project_request.type if project_request.type is not None else current_project[13],  
-        }
-
-        cursor.execute('''
-            UPDATE algo_projects 
-            SET user_id = %s, name = %s, description = %s, fund_id = %s, current_fund = %s, 
-                fund_raise_total = %s, fund_raise_count = %s, deadline = %s, 
-                project_hash = %s, is_verify = %s, status = %s, linkcardImage = %s, type = %s, updated_at = %s 
-            WHERE id = %s;
-        ''', (
-            updated_fields["user_id"],
-            updated_fields["name"],
-            updated_fields["description"],
-            updated_fields["fund_id"],
-            updated_fields["current_fund"],
-            updated_fields["fund_raise_total"],
-            updated_fields["fund_raise_count"],
-            updated_fields["deadline"],
-            updated_fields["project_hash"],
-            updated_fields["is_verify"],
-            updated_fields["status"],
-            updated_fields["linkcardImage"],
-            updated_fields["type"],  
-            updated_at,
-            project_id
-        ))
-
+        if "current_fund" in fields or "fund_raise_total" in fields or "fund_raise_count" in fields:
+            notify_funding(
+                cursor, project_id, updated_project["current_fund"],
+                updated_project["fund_raise_total"], updated_project["fund_raise_count"],
+            )
         conn.commit()
 
-        return {
-            "id": project_id,
-            "user_id": updated_fields["user_id"],
-            "name": updated_fields["name"],
-            "description": updated_fields["description"],
-            "fund_id": updated_fields["fund_id"],
-            "current_fund": updated_fields["current_fund"],
-            "fund_raise_total": updated_fields["fund_raise_total"],
-            "fund_raise_count": updated_fields["fund_raise_count"],
-            "deadline": updated_fields["deadline"],
-            "project_hash": updated_fields["project_hash"],
-            "is_verify": updated_fields["is_verify"],
-            "status": updated_fields["status"],
-            "linkcardImage": updated_fields["linkcardImage"],  
-            "type": updated_fields["type"],  
-            "created_at": current_project[14], 
-            "updated_at": updated_at
-        }
+        return updated_project
+    except HTTPException:
+        raise
     except Exception as e:
         conn.rollback()
         raise HTTPException(status_code=500, detail=f"Error: {str(e)}")
     finally:
         cursor.close()
         conn.close()
-      
 
-@app.get("/projects/{project_id}", response_model=ProjectResponse)
-def get_project(project_id: int):
+
+# Declared before /projects/{project_id} so "query" is not parsed as a project id
+@app.get("/projects/query", response_model=List[ProjectResponse])
+def query_projects_endpoint(
+    user_id: Optional[int] = None,
+    fund_id: Optional[int] = None,
+    status: Optional[str] = None,
+    type: Optional[str] = None,
+    is_verify: Optional[bool] = None,
+    deadline_from: Optional[datetime] = None,
+    deadline_to: Optional[datetime] = None,
+    min_progress: Optional[float] = Query(None, ge=0),
+    max_progress: Optional[float] = Query(None, ge=0),
+    sort: str = Query("id", pattern="^(" + "|".join(PROJECT_SORT_KEYS) + ")$"),
+    order: str = Query("desc", pattern="^(asc|desc)$"),
+    limit: int = Query(50, ge=1, le=200),
+    offset: int = Query(0, ge=0),
+):
+    conn = get_read_connection()
+    cursor = conn.cursor()
+
+    try:
+        project_list = query_projects(
+            cursor,
+            {
+                "user_id": user_id,
+                "fund_id": fund_id,
+                "status": status,
+                "type": type,
+                "is_verify": is_verify,
+                "deadline_from": deadline_from,
+                "deadline_to": deadline_to,
+                "min_progress": min_progress,
+                "max_progress": max_progress,
+            },
+            sort=sort,
+            order=order,
+            limit=limit,
+            offset=offset,
+        )
+        return FastJSONResponse(status_code=200, content={"statusCode": 200, "body": project_list})
+
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error: {str(e)}")
+
+    finally:
+        cursor.close()
+        conn.close()
+
+register_statement("receivers_by_project", '''
+    SELECT email, sodienthoai, address, name, type_receiver_wallet, receiver_wallet_address
+    FROM algo_receivers
+    WHERE project_id = $1
+''')
+
+project_receiver_row_to_dict = row_mapper(
+    "email", "phone", "address", "name", "type_receiver_wallet", "receiver_wallet_address"
+)
+
+def read_funding_state(project_id: int):
+    # Primary, not a replica: the snapshot must include every commit already NOTIFY'd from the primary
     conn = get_db_connection()
     cursor = conn.cursor()
+    try:
+        return fetch_funding_state(cursor, project_id)
+    finally:
+        cursor.close()
+        conn.close()
 
+
+@app.get("/projects/{project_id}/live")
+async def stream_project_funding(project_id: int, request: Request):
+    """Server-sent events with the project's funding progress, pushed as contributions commit."""
+    # Subscribe before reading the snapshot so no update can slip in between
+    queue = funding_hub.subscribe(project_id)
     try:
-        cursor.execute('''
-            SELECT p.*, f.name_fund, f.logo, f.description 
-            FROM algo_projects p
-            LEFT JOIN algo_funds f ON p.fund_id = f.id
-            WHERE p.id = %s AND p.deleted_at IS NULL;
-        ''', (project_id,))
-        
-        project = cursor.fetchone()
+        initial = funding_hub.latest(project_id) or await run_in_threadpool(read_funding_state, project_id)
+    except Exception as e:
+        funding_hub.unsubscribe(project_id, queue)
+        raise HTTPException(status_code=500, detail=f"Error: {str(e)}")
+    if initial is None:
+        funding_hub.unsubscribe(project_id, queue)
+        raise HTTPException(status_code=404, detail="Project not found")
+
+    return StreamingResponse(
+        stream_funding(funding_hub, project_id, queue, initial, request.is_disconnected),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
 
-        if project is None:
+
+@app.on_event("shutdown")
+def stop_funding_hub():
+    funding_hub.stop()
+
+
+@app.on_event("startup")
+def start_archiver():
+    if ARCHIVER_ENABLED:
+        archiver.start()
+
+
+@app.on_event("shutdown")
+def stop_archiver():
+    archiver.stop()
+
+
+@app.get("/projects/{project_id}", response_model=ProjectResponse)
+def get_project(project_id: int, request: Request):
+    conn = get_read_connection()
+    cursor = conn.cursor()
+
+    try:
+        version = fetch_project_version(cursor, project_id)
+        if version is None:
             raise HTTPException(status_code=404, detail="Project not found")
 
-        project_data = {
-            "id": project[0],
-            "user_id": project[1],
-            "name": project[2],
-            "description": project[3],
-            "fund_id": project[4],
-            "current_fund": project[5],
-            "fund_raise_total": project[6],
-            "fund_raise_count": project[7],
-            "deadline": project[8].strftime('%Y-%m-%d %H:%M:%S') if project[8] else None,
-            "project_hash": project[9],
-            "is_verify": project[10],
-            "status": project[11],
-            "linkcardImage": project[15],
-            "type": project[16],
-            "created_at": project[12].strftime('%Y-%m-%d %H:%M:%S') if project[12] else None,
-            "updated_at": project[13].strftime('%Y-%m-%d %H:%M:%S') if project[13] else None,
-            "deleted_at": project[14].strftime('%Y-%m-%d %H:%M:%S') if project[14] else None,
-            "fund_name": project[17],
-            "fund_logo": project[18],
-            "fund_description": project[19],
-            "receivers": []  
-        }
+        etag = make_etag(project_id, *version)
+        if if_none_match(request, etag):
+            return not_modified(etag)
 
-        cursor.execute('''
-            SELECT email, sodienthoai, address, name, type_receiver_wallet, receiver_wallet_address
-            FROM algo_receivers
-            WHERE project_id = %s;
-        ''', (project_id,))
-        
-        receivers = cursor.fetchall()
-
-        for receiver in receivers:
-            project_data["receivers"].append({
-                "email": receiver[0],
-                "phone": receiver[1],
-                "address": receiver[2],
-                "name": receiver[3],
-                "type_receiver_wallet": receiver[4],
-                "receiver_wallet_address": receiver[5]
-            })
+        project_data = fetch_project(cursor, project_id)
 
-        return JSONResponse(status_code=200, content={"statusCode": 200, "body": project_data})
+        if project_data is None:
+            raise HTTPException(status_code=404, detail="Project not found")
+
+        execute_prepared(cursor, "receivers_by_project", (project_id,))
+
+        project_data["receivers"] = [project_receiver_row_to_dict(receiver) for receiver in cursor.fetchall()]
+
+        return set_etag(FastJSONResponse(status_code=200, content={"statusCode": 200, "body": project_data}), etag)
     
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error: {str(e)}")
@@ -951,43 +1256,17 @@ def get_project(project_id: int):
 
 
 @app.get("/projects", response_model=List[ProjectResponse])
-def get_projects():
-    conn = get_db_connection()
+def get_projects(request: Request):
+    conn = get_read_connection()
     cursor = conn.cursor()
 
     try:
-        cursor.execute('''
-            SELECT p.*, f.name_fund, f.logo, f.description 
-            FROM algo_projects p
-            LEFT JOIN algo_funds f ON p.fund_id = f.id
-            WHERE p.deleted_at IS NULL
-            ORDER BY p.id DESC;
-        ''')
-        projects = cursor.fetchall()
+        etag = make_etag("projects", *fetch_table_versions(cursor, "algo_projects", "algo_funds"))
+        if if_none_match(request, etag):
+            return not_modified(etag)
 
-        project_list = [{
-            "id": project[0],
-            "user_id": project[1],
-            "name": project[2],
-            "description": project[3],
-            "fund_id": project[4],
-            "current_fund": project[5],
-            "fund_raise_total": project[6],
-            "fund_raise_count": project[7],
-            "deadline": project[8].strftime('%Y-%m-%d %H:%M:%S') if project[8] else None,
-            "project_hash": project[9],
-            "is_verify": project[10],
-            "status": project[11],
-            "linkcardImage": project[15], 
-            "type": project[16], 
-            "created_at": project[12].strftime('%Y-%m-%d %H:%M:%S') if project[12] else None,
-            "updated_at": project[13].strftime('%Y-%m-%d %H:%M:%S') if project[13] else None,
-            "deleted_at": project[14].strftime('%Y-%m-%d %H:%M:%S') if project[14] else None,
-            "fund_name": project[17],
-            "fund_logo": project[18],
-            "fund_description": project[19]
-        } for project in projects]
-        return JSONResponse(status_code=200, content={"statusCode": 200, "body": project_list})
+        project_list = fetch_projects(cursor)
+        return set_etag(FastJSONResponse(status_code=200, content={"statusCode": 200, "body": project_list}), etag)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error: {str(e)}")
     finally:
@@ -1000,47 +1279,13 @@ def filter_projects(
     fund_id: int,
     current_user: dict = Depends(get_current_user)
 ):
-    conn = get_db_connection()
+    conn = get_read_connection()
     cursor = conn.cursor()
 
     try:
-        query = '''
-            SELECT p.*, f.name_fund, f.logo, f.description 
-            FROM algo_projects p
-            LEFT JOIN algo_funds f ON p.fund_id = f.id
-            WHERE p.deleted_at IS NULL
-            AND p.user_id = %s
-            AND p.fund_id = %s
-            ORDER BY p.id DESC;
-        '''
-
-        cursor.execute(query, (user_id, fund_id))
-        projects = cursor.fetchall()
-
-        project_list = [{
-            "id": project[0],
-            "user_id": project[1],
-            "name": project[2],
-            "description": project[3],
-            "fund_id": project[4],
-            "current_fund": project[5],
-            "fund_raise_total": project[6],
-            "fund_raise_count": project[7],
-            "deadline": project[8].strftime('%Y-%m-%d %H:%M:%S') if project[8] else None,
-            "project_hash": project[9],
-            "is_verify": project[10],
-            "status": project[11],
-            "linkcardImage": project[15], 
-            "type": project[16], 
-            "created_at": project[12].strftime('%Y-%m-%d %H:%M:%S') if project[12] else None,
-            "updated_at": project[13].strftime('%Y-%m-%d %H:%M:%S') if project[13] else None,
-            "deleted_at": project[14].strftime('%Y-%m-%d %H:%M:%S') if project[14] else None,
-            "fund_name": project[17],
-            "fund_logo": project[18],
-            "fund_description": project[19]
-        } for project in projects]
+        project_list = fetch_projects(cursor, user_id=user_id, fund_id=fund_id)
         
-        return JSONResponse(status_code=200, content={"statusCode": 200, "body": project_list})
+        return FastJSONResponse(status_code=200, content={"statusCode": 200, "body": project_list})
     
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error: {str(e)}")
@@ -1049,6 +1294,57 @@ def filter_projects(
         cursor.close()
         conn.close()
 
+# SEARCH API
+search_row_to_dict = row_mapper("kind", "id", "name", "description", "fund_id", "logo", "rank")
+
+SEARCH_KINDS = {
+    "project": '''
+        SELECT 'project' AS kind, p.id, p.name, p.description, p.fund_id, NULL AS logo,
+               ts_rank(p.search_vector, q.query) AS rank
+        FROM algo_projects p, q
+        WHERE p.search_vector @@ q.query AND p.deleted_at IS NULL
+    ''',
+    "fund": '''
+        SELECT 'fund' AS kind, f.id, f.name_fund, f.description, f.id, f.logo,
+               ts_rank(f.search_vector, q.query) AS rank
+        FROM algo_funds f, q
+        WHERE f.search_vector @@ q.query AND f.deleted_at IS NULL
+    ''',
+}
+
+@app.get("/search")
+def search(
+    q: str = Query(..., min_length=1, max_length=200),
+    kind: Optional[str] = Query(None, pattern="^(project|fund)$"),
+    limit: int = Query(20, ge=1, le=100),
+    offset: int = Query(0, ge=0, le=10000),
+):
+    conn = get_read_connection()
+    cursor = conn.cursor()
+
+    try:
+        branches = [SEARCH_KINDS[kind]] if kind else list(SEARCH_KINDS.values())
+        cursor.execute(f'''
+            WITH q AS (SELECT websearch_to_tsquery('simple', %s) AS query)
+            {" UNION ALL ".join(branches)}
+            ORDER BY rank DESC, id DESC
+            LIMIT %s OFFSET %s;
+        ''', (q, limit, offset))
+
+        results = [search_row_to_dict(row) for row in cursor.fetchall()]
+
+        return FastJSONResponse(status_code=200, content={
+            "statusCode": 200,
+            "body": {"results": results, "limit": limit, "offset": offset}
+        })
+
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error: {str(e)}")
+
+    finally:
+        cursor.close()
+        conn.close()
+
 @app.delete("/projects/{project_id}", status_code=204)
 def delete_project(project_id: int, current_user: dict = Depends(get_current_user)):
     conn = get_db_connection()
@@ -1088,33 +1384,20 @@ def update_project_funding(project_id: int, funding_request: UpdateProjectFundin
     updated_at = datetime.now()
 
     try:
-        cursor.execute('SELECT * FROM algo_projects WHERE id = %s', (project_id,))
-        current_project = cursor.fetchone()
+        updated_project = add_project_funding(cursor, project_id, funding_request.current_fund)
 
-        if not current_project:
-            raise HTTPException(status_code=404, detail="Project not found.")
-
-        current_fund = current_project[5]  
-        fund_raise_total = current_project[6] 
-        fund_raise_count = current_project[7] 
-
-        new_current_fund = current_fund + funding_request.current_fund
-        if new_current_fund > fund_raise_total:
+        if not updated_project:
+            exists = project_exists(cursor, project_id)
+            conn.rollback()
+            if not exists:
+                raise HTTPException(status_code=404, detail="Project not found.")
             raise HTTPException(status_code=400, detail="Current fund exceeds the total fundraising goal.")
 
+        # A manual top-up is recorded as a contribution without a txid (NULLs never collide in
+        # the (project_id, txid) unique index); time_round places it in the chart rollups.
         cursor.execute('''
-            UPDATE algo_projects 
-            SET current_fund = %s, fund_raise_count = fund_raise_count + 1, updated_at = %s 
-            WHERE id = %s;
-        ''', (
-            new_current_fund,
-            updated_at,
-            project_id
-        ))
-
-        cursor.execute('''
-            INSERT INTO algo_s (project_id, amount, email, sodienthoai, address, name, type_sender_wallet, sender_wallet_address, created_at, updated_at) 
-            VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s);
+            INSERT INTO algo_contributions (project_id, amount, email, sodienthoai, address, name, type_sender_wallet, sender_wallet_address, time_round, created_at, updated_at) 
+            VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s);
         ''', (
             project_id,
             funding_request.current_fund,
@@ -1125,27 +1408,19 @@ def update_project_funding(project_id: int, funding_request: UpdateProjectFundin
             funding_request.type_sender_wallet,
             funding_request.sender_wallet_address,
             updated_at,
+            updated_at,
             updated_at
         ))
 
+        notify_funding(
+            cursor, project_id, updated_project["current_fund"],
+            updated_project["fund_raise_total"], updated_project["fund_raise_count"],
+        )
         conn.commit()
 
-        return {
-            "id": project_id,
-            "user_id": current_project[1],
-            "name": current_project[2],
-            "description": current_project[3],
-            "fund_id": current_project[4],
-            "current_fund": new_current_fund,
-            "fund_raise_total": fund_raise_total,
-            "fund_raise_count": fund_raise_count + 1,
-            "deadline": current_project[8],
-            "project_hash": current_project[9],
-            "is_verify": current_project[10],
-            "status": current_project[11],
-            "created_at": current_project[12],
-            "updated_at": updated_at
-        }
+        return updated_project
+    except HTTPException:
+        raise
     except Exception as e:
         conn.rollback()
         raise HTTPException(status_code=500, detail=f"Error: {str(e)}")
@@ -1195,13 +1470,20 @@ class ReceiverResponse(BaseModel):
     created_at: str 
     updated_at: str 
 
+RECEIVER_FIELDS = (
+    "id", "project_id", "email", "sodienthoai", "address", "name",
+    "type_receiver_wallet", "receiver_wallet_address", "created_at", "updated_at"
+)
+RECEIVER_COLUMNS = ", ".join(RECEIVER_FIELDS)
+receiver_row_to_dict = row_mapper(*RECEIVER_FIELDS)
+
 @app.get("/receivers", response_model=List[ReceiverResponse])
 def get_receivers(email: Optional[str] = None, current_user: dict = Depends(get_current_user)):
     conn = get_db_connection()
     cursor = conn.cursor()
     
     try:
-        query = "SELECT * FROM algo_receivers"
+        query = f"SELECT {RECEIVER_COLUMNS} FROM algo_receivers"
         params = []
 
         if email:
@@ -1209,25 +1491,9 @@ def get_receivers(email: Optional[str] = None, current_user: dict = Depends(get_
             params.append(email)
 
         cursor.execute(query, params)
-        receivers = cursor.fetchall()
-        
-        response = [
-            {
-                "id": receiver[0],
-                "project_id": receiver[1],
-                "email": receiver[2],
-                "sodienthoai": receiver[3],
-                "address": receiver[4],
-                "name": receiver[5],
-                "type_receiver_wallet": receiver[6],
-                "receiver_wallet_address": receiver[7],
-                "created_at": receiver[8].isoformat() if receiver[8] else None,  
-                "updated_at": receiver[9].isoformat() if receiver[9] else None 
-            }
-            for receiver in receivers
-        ]
+        response = [receiver_row_to_dict(receiver) for receiver in cursor.fetchall()]
 
-        return JSONResponse(status_code=200, content=response)
+        return FastJSONResponse(status_code=200, content=response)
 
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error: {str(e)}")
@@ -1283,6 +1549,38 @@ def create_receiver(receiver: ReceiverCreate, current_user: dict = Depends(get_c
         conn.close()
 
 
+@app.post("/receivers/bulk")
+def bulk_create_receivers(
+    file: UploadFile = File(...),
+    format: Optional[str] = Query(None, pattern="^(csv|ndjson)$"),
+    current_user: dict = Depends(get_current_user),
+):
+    """Import receivers from a CSV (header row) or NDJSON upload in one transaction.
+
+    Rows failing the ReceiverCreate rules or pointing at unknown projects are
+    reported with their row number; the remaining rows are still imported.
+    """
+    conn = get_db_connection()
+    cursor = conn.cursor()
+
+    try:
+        fmt = format or detect_format(file.filename, file.content_type)
+        report = import_receivers(cursor, iter_records(file.file, fmt), ReceiverCreate)
+        conn.commit()
+        return FastJSONResponse(status_code=200, content={"statusCode": 200, "body": report.to_dict()})
+
+    except (UnicodeDecodeError, csv.Error) as e:
+        conn.rollback()
+        raise HTTPException(status_code=400, detail=f"Unreadable upload: {str(e)}")
+    except Exception as e:
+        conn.rollback()
+        raise HTTPException(status_code=500, detail=f"Error: {str(e)}")
+
+    finally:
+        cursor.close()
+        conn.close()
+
+
 @app.put("/receivers/{receiver_id}", response_model=ReceiverResponse)
 def update_receiver(receiver_id: int, receiver: ReceiverCreate, current_user: dict = Depends(get_current_user)):
     conn = get_db_connection()
@@ -1382,70 +1680,231 @@ class TransactionResponse(BaseModel):
     created_at: str
     updated_at: str
 
-@app.post("/projects/{project_id}/distribute_fund", response_model=List[TransactionResponse])
+@app.post("/projects/{project_id}/distribute_fund", status_code=status.HTTP_202_ACCEPTED)
 def distribute_funds(project_id: int, current_user: dict = Depends(get_current_user)):
+    """Queue the payout and return its job id; poll GET /jobs/{id} for progress and the transactions."""
     conn = get_db_connection()
     cursor = conn.cursor()
 
     try:
-        cursor.execute('''
-            SELECT current_fund, fund_raise_total FROM algo_projects WHERE id = %s;
-        ''', (project_id,))
-        project = cursor.fetchone()
+        # Cheap checks up front so obvious mistakes still fail the request itself
+        check_distributable(cursor, project_id)
+        job_id, created = enqueue(
+            cursor, DISTRIBUTE_FUNDS_JOB, {"project_id": project_id},
+            dedupe_key=str(project_id), created_by=int(current_user),
+        )
+        conn.commit()
+        if created:
+            job_runner.wake()
+        return FastJSONResponse(
+            status_code=status.HTTP_202_ACCEPTED,
+            content={"statusCode": 202, "body": {"job_id": job_id, "status_url": f"/jobs/{job_id}"}},
+            headers={"Location": f"/jobs/{job_id}"},
+        )
+
+    except DistributionError as e:
+        conn.rollback()
+        raise HTTPException(status_code=e.status_code, detail=e.detail)
+    except Exception as e:
+        conn.rollback()
+        raise HTTPException(status_code=500, detail=f"Error: {str(e)}")
 
-        if not project:
-            raise HTTPException(status_code=404, detail="Project not found.")
+    finally:
+        cursor.close()
+        conn.close()
 
-        current_fund, fund_raise_total = project
-        if current_fund != fund_raise_total:
-            raise HTTPException(status_code=400, detail="Current fund does not equal fund raise total.")
-
-        cursor.execute('SELECT * FROM algo_receivers WHERE project_id = %s;', (project_id,))
-        receivers = cursor.fetchall()
-
-        if not receivers:
-            raise HTTPException(status_code=404, detail="No receivers found for this project.")
-
-        num_receivers = len(receivers)
-        amount_per_receiver = current_fund / num_receivers
-
-        transactions = []
-        for i, receiver in enumerate(receivers):
-            receiver_id = receiver[0]
-            cursor.execute('''
-                INSERT INTO algo_receivers_transaction (receiver_id, project_id, transaction_count, amount, time_round, created_at, updated_at)
-                VALUES (%s, %s, %s, %s, %s, %s, %s) RETURNING id;
-            ''', (
-                receiver_id,
-                project_id,
-                i + 1, 
-                amount_per_receiver,
-                datetime.now(), 
-                datetime.now(),
-                datetime.now() 
-            ))
-            transaction_id = cursor.fetchone()[0]
-            transactions.append({
-                "receiver_id": receiver_id,
-                "project_id": project_id,
-                "transaction_count": i + 1,
-                "amount": amount_per_receiver,
-                "time_round": datetime.now().isoformat(),
-                "created_at": datetime.now().isoformat(),
-                "updated_at": datetime.now().isoformat(),
-            })
 
-        conn.commit()
-        return transactions
+@app.get("/jobs/{job_id}")
+def get_job(job_id: int, current_user: dict = Depends(get_current_user)):
+    conn = get_db_connection()
+    cursor = conn.cursor()
 
+    try:
+        job = fetch_job(cursor, job_id)
+        # Other users' jobs read as missing rather than forbidden, so ids cannot be probed
+        if job is None or str(job["created_by"]) != str(current_user):
+            raise HTTPException(status_code=404, detail="Job not found")
+        return FastJSONResponse(status_code=200, content={"statusCode": 200, "body": job})
+
+    except HTTPException:
+        raise
     except Exception as e:
-        conn.rollback()
         raise HTTPException(status_code=500, detail=f"Error: {str(e)}")
 
     finally:
         cursor.close()
         conn.close()
 
+
+@app.on_event("startup")
+def start_job_runner():
+    job_runner.start()
+
+
+@app.on_event("shutdown")
+def stop_job_runner():
+    job_runner.stop()
+
+# STATS API
+fund_stats_row_to_dict = row_mapper(
+    "fund_id", "name_fund", "active_projects", "total_raised", "total_goal",
+    "contribution_count", "average_completion_ratio", "updated_at"
+)
+top_project_row_to_dict = row_mapper(
+    "id", "name", "fund_id", "current_fund", "fund_raise_total", "completion_ratio"
+)
+
+@app.get("/stats")
+def get_stats(top: int = Query(10, ge=0, le=100)):
+    conn = get_read_connection()
+    cursor = conn.cursor()
+
+    try:
+        cursor.execute('''
+            SELECT s.fund_id, f.name_fund, s.active_projects, s.total_raised, s.total_goal,
+                   s.contribution_count,
+                   s.completion_ratio_sum / NULLIF(s.completion_ratio_projects, 0),
+                   s.updated_at
+            FROM algo_fund_stats s
+            LEFT JOIN algo_funds f ON f.id = s.fund_id
+            ORDER BY s.fund_id;
+        ''')
+        funds = [fund_stats_row_to_dict(row) for row in cursor.fetchall()]
+
+        cursor.execute('''
+            SELECT COALESCE(SUM(active_projects), 0), COALESCE(SUM(total_raised), 0),
+                   COALESCE(SUM(total_goal), 0), COALESCE(SUM(contribution_count), 0),
+                   COALESCE(SUM(completion_ratio_sum), 0), COALESCE(SUM(completion_ratio_projects), 0)
+            FROM algo_fund_stats;
+        ''')
+        active_projects, total_raised, total_goal, contribution_count, ratio_sum, ratio_projects = cursor.fetchone()
+
+        top_projects = []
+        if top:
+            # Backward scan of idx_algo_projects_live_progress; stops after `top` rows
+            cursor.execute(f'''
+                SELECT p.id, p.name, p.fund_id, p.current_fund, p.fund_raise_total, {PROGRESS_EXPR}
+                FROM algo_projects p
+                WHERE p.deleted_at IS NULL AND {PROGRESS_EXPR} IS NOT NULL
+                ORDER BY {PROGRESS_EXPR} DESC, p.id DESC
+                LIMIT %s;
+            ''', (top,))
+            top_projects = [top_project_row_to_dict(row) for row in cursor.fetchall()]
+
+        return FastJSONResponse(status_code=200, content={"statusCode": 200, "body": {
+            "platform": {
+                "active_projects": active_projects,
+                "total_raised": total_raised,
+                "total_goal": total_goal,
+                "contribution_count": contribution_count,
+                "average_completion_ratio": ratio_sum / ratio_projects if ratio_projects else None,
+            },
+            "funds": funds,
+            "top_projects": top_projects,
+        }})
+
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error: {str(e)}")
+
+    finally:
+        cursor.close()
+        conn.close()
+
+@app.get("/admission/stats", dependencies=[Depends(require_admin)])
+def admission_stats():
+    return admission_controller.snapshot()
+
+
+@app.get("/admin/slow-queries", dependencies=[Depends(require_admin)])
+def slow_queries(
+    limit: int = Query(slow_query.SLOW_QUERY_TOP_N, ge=1, le=500),
+    order_by: str = Query("total_ms", pattern="^(total_ms|max_ms|calls|slow_calls|errors)$"),
+):
+    return {"statusCode": 200, "body": {
+        "threshold_ms": slow_query.SLOW_QUERY_THRESHOLD_MS,
+        "statements": slow_query.slow_query_log.top(limit, order_by),
+        "recent_plans": list(slow_query.slow_query_log.recent_plans),
+    }}
+
+
+class ProfilingArmRequest(BaseModel):
+    path_prefix: str
+    count: int = 1
+
+
+@app.post("/admin/profiling", dependencies=[Depends(require_admin)])
+def arm_profiling(request: ProfilingArmRequest):
+    if request.count < 1:
+        raise HTTPException(status_code=400, detail="count must be at least 1")
+    profile_store.arm(request.path_prefix, request.count)
+    return {"statusCode": 200, "body": {"armed": profile_store.armed()}}
+
+
+@app.delete("/admin/profiling", dependencies=[Depends(require_admin)])
+def disarm_profiling(path_prefix: Optional[str] = None):
+    profile_store.disarm(path_prefix)
+    return {"statusCode": 200, "body": {"armed": profile_store.armed()}}
+
+
+@app.get("/admin/profiles", dependencies=[Depends(require_admin)])
+def list_profiles():
+    return {"statusCode": 200, "body": profile_store.list()}
+
+
+@app.get("/admin/profiles/{profile_id}", dependencies=[Depends(require_admin)])
+def get_profile(profile_id: str):
+    profile = profile_store.get(profile_id)
+    if profile is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    # Collapsed stacks: feed to flamegraph.pl or drop into speedscope
+    return PlainTextResponse(content=profile["collapsed"] + "\n")
+
+
+@app.post("/admin/projects/{project_id}/restore", dependencies=[Depends(require_admin)])
+def restore_archived_project(project_id: int, undelete: bool = True):
+    try:
+        restored = restore_project(project_id, undelete=undelete)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error: {str(e)}")
+    if not restored:
+        raise HTTPException(status_code=404, detail="Project is not archived")
+    return {"statusCode": 200, "body": {"id": project_id, "undeleted": undelete}}
+
+
+@app.get("/admin/exports/{dataset}", dependencies=[Depends(require_admin)])
+def export_dataset(
+    dataset: str,
+    format: str = Query("parquet"),
+    columns: Optional[str] = Query(None, description="comma-separated column subset"),
+    date_column: str = Query("created_at"),
+    since: Optional[datetime] = Query(None, description="inclusive"),
+    until: Optional[datetime] = Query(None, description="exclusive"),
+    project_id: Optional[int] = None,
+):
+    """Stream contributions or payouts as Parquet or an Arrow IPC stream, one chunk at a time."""
+    try:
+        column_list = plan_export(dataset, columns.split(",") if columns else None, date_column, format)
+    except ExportError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except RuntimeError as e:
+        raise HTTPException(status_code=501, detail=str(e))
+
+    extension = "parquet" if format == "parquet" else "arrows"
+    return StreamingResponse(
+        stream_export(
+            dataset, column_list, format, date_column=date_column, since=since, until=until, project_id=project_id,
+        ),
+        media_type=EXPORT_FORMATS[format],
+        headers={"Content-Disposition": f'attachment; filename="{dataset}.{extension}"'},
+    )
+
+
+@app.get("/metrics", include_in_schema=False, dependencies=[Depends(require_metrics_access)])
+def prometheus_metrics():
+    body, content_type = metrics.render_latest()
+    return PlainTextResponse(content=body, media_type=content_type)
+
+
 @app.get("/health-check")
 def health_check():
     return {"status": "ok"}
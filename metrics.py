@@ -0,0 +1,222 @@
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+
+import db_utils
+
+logger = logging.getLogger(__name__)
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+REQUEST_LATENCY = Histogram(
+    "http_request_duration_seconds", "HTTP request latency by route template and status",
+    ["method", "route", "status"], buckets=LATENCY_BUCKETS,
+)
+DB_QUERY_LATENCY = Histogram(
+    "db_query_duration_seconds", "Statement latency by query name",
+    ["query"], buckets=LATENCY_BUCKETS,
+)
+DB_ROWS_RETURNED = Histogram(
+    "db_rows_returned", "Rows returned per SELECT-like statement",
+    ["query"], buckets=(0, 1, 10, 100, 1000, 10000, 100000),
+)
+DB_POOL_WAIT = Histogram(
+    "db_pool_wait_seconds", "Time spent waiting for a pooled DB connection",
+    buckets=(0.0001, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1, 5),
+)
+EXTERNAL_CALL_LATENCY = Histogram(
+    "external_call_duration_seconds", "Latency of calls to algod, the LLM and other services",
+    ["service", "operation", "outcome"], buckets=LATENCY_BUCKETS,
+)
+
+
+def observe_query(name, query, params, seconds, cursor, error):
+    DB_QUERY_LATENCY.labels(name).observe(seconds)
+    if error is None and cursor.description is not None:
+        DB_ROWS_RETURNED.labels(name).observe(max(cursor.rowcount, 0))
+
+
+@contextmanager
+def observe_external(service: str, operation: str):
+    """Time a call to an external service, e.g. ``with observe_external("algod", "status"):``."""
+    start = time.perf_counter()
+    outcome = "error"
+    try:
+        yield
+        outcome = "ok"
+    finally:
+        EXTERNAL_CALL_LATENCY.labels(service, operation, outcome).observe(time.perf_counter() - start)
+
+
+# State that already lives in the app, exported at scrape time: name -> (type, help, label names)
+APP_STATE_METRICS = {
+    "db_statement_prepare": ("counter", "PREPAREs per registered statement", ["statement"]),
+    "db_statement_execute_seconds": ("counter", "Time spent executing registered statements", ["statement"]),
+    "db_statement_execute": ("counter", "Executions per registered statement", ["statement"]),
+    "db_statement_plan_seconds": (
+        "counter", "Planning time of sampled executions (DB_PLAN_SAMPLE_RATE); compare per-sample means "
+        "between DB_PREPARED_STATEMENTS=1 and =0 for the saving", ["statement"],
+    ),
+    "db_statement_plan": ("counter", "Executions whose planning time was sampled", ["statement"]),
+    "admission_queue_depth": ("gauge", "Requests waiting for admission", ["limiter"]),
+    "admission_inflight": ("gauge", "Requests admitted and running", ["limiter"]),
+    "admission_rejected": ("counter", "Requests rejected by admission control", ["route", "status"]),
+}
+
+# Set (by gunicorn.conf.py) when several worker processes serve the app. Each process then
+# writes its metrics to files in this directory and /metrics aggregates all of them.
+PROMETHEUS_MULTIPROC_DIR = os.getenv("PROMETHEUS_MULTIPROC_DIR")
+METRICS_PUBLISH_INTERVAL = float(os.getenv("METRICS_PUBLISH_INTERVAL", "5"))
+
+
+def app_state_samples(admission_controller):
+    """Yield (metric name, label values, value) for this process's statement stats and admission state."""
+    for name, stats in db_utils.statement_stats().items():
+        yield "db_statement_prepare", [name], stats["prepare_count"]
+        yield "db_statement_execute_seconds", [name], stats["execute_seconds"]
+        yield "db_statement_execute", [name], stats["execute_count"]
+        yield "db_statement_plan_seconds", [name], stats["plan_seconds"]
+        yield "db_statement_plan", [name], stats["plan_count"]
+
+    if admission_controller is not None:
+        snapshot = admission_controller.snapshot()
+        yield "admission_queue_depth", ["global"], snapshot["queue_depth"]
+        yield "admission_inflight", ["global"], snapshot["inflight"]
+        for route, state in snapshot["routes"].items():
+            yield "admission_queue_depth", [route], state["queue_depth"]
+            yield "admission_inflight", [route], state["inflight"]
+        for entry in snapshot["rejected"]:
+            yield "admission_rejected", [entry["route"], str(entry["status"])], entry["count"]
+
+
+class AppStateCollector:
+    """Single-process export of app state: read directly at scrape time."""
+
+    def __init__(self):
+        self.admission_controller = None
+
+    def collect(self):
+        families = {
+            name: (CounterMetricFamily if kind == "counter" else GaugeMetricFamily)(name, doc, labels=labels)
+            for name, (kind, doc, labels) in APP_STATE_METRICS.items()
+        }
+        for name, label_values, value in app_state_samples(self.admission_controller):
+            families[name].add_metric(label_values, value)
+        yield from families.values()
+
+
+class AppStatePublisher:
+    """Multiprocess export of app state.
+
+    A scrape reaches one worker only, so every worker copies its own state into
+    file-backed metrics every METRICS_PUBLISH_INTERVAL seconds: counters are
+    advanced by the delta since the last copy (and survive the worker's exit),
+    gauges are summed over live workers.
+    """
+
+    def __init__(self, interval: float = METRICS_PUBLISH_INTERVAL):
+        self.interval = interval
+        self.admission_controller = None
+        self.metrics = {
+            name: Counter(name, doc, labels) if kind == "counter" else Gauge(name, doc, labels, multiprocess_mode="livesum")
+            for name, (kind, doc, labels) in APP_STATE_METRICS.items()
+        }
+        self._published: Dict[tuple, float] = {}
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def publish(self):
+        with self._lock:
+            for name, label_values, value in app_state_samples(self.admission_controller):
+                metric = self.metrics[name].labels(*label_values)
+                if APP_STATE_METRICS[name][0] == "gauge":
+                    metric.set(value)
+                    continue
+                key = (name, tuple(label_values))
+                delta = value - self._published.get(key, 0)
+                if delta > 0:
+                    metric.inc(delta)
+                    self._published[key] = value
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="metrics-publisher", daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            time.sleep(self.interval)
+            try:
+                self.publish()
+            except Exception as e:
+                logger.error(f"Publishing app state metrics failed: {str(e)}")
+
+
+if PROMETHEUS_MULTIPROC_DIR:
+    app_state_collector = AppStatePublisher()
+else:
+    app_state_collector = AppStateCollector()
+    REGISTRY.register(app_state_collector)
+
+
+def install(admission_controller=None):
+    """Hook DB instrumentation and expose the admission controller; call once at startup."""
+    if observe_query not in db_utils.QUERY_HOOKS:
+        db_utils.QUERY_HOOKS.append(observe_query)
+    if DB_POOL_WAIT.observe not in db_utils.POOL_WAIT_HOOKS:
+        db_utils.POOL_WAIT_HOOKS.append(DB_POOL_WAIT.observe)
+    app_state_collector.admission_controller = admission_controller
+    if isinstance(app_state_collector, AppStatePublisher):
+        app_state_collector.start()
+
+
+def render_latest():
+    if PROMETHEUS_MULTIPROC_DIR:
+        # Bring this worker's numbers up to date, then merge the files of every worker
+        app_state_collector.publish()
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry), CONTENT_TYPE_LATEST
+    return generate_latest(REGISTRY), CONTENT_TYPE_LATEST
+
+
+class MetricsMiddleware:
+    """ASGI middleware recording request latency labelled by the matched route template."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status_holder = [500]
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status_holder[0] = message["status"]
+            await send(message)
+
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            # FastAPI stores the matched APIRoute in the (shared) scope during routing
+            route = getattr(scope.get("route"), "path", None) or "unmatched"
+            REQUEST_LATENCY.labels(scope["method"], route, str(status_holder[0])).observe(time.perf_counter() - start)
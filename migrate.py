@@ -0,0 +1,58 @@
+import logging
+import os
+import sys
+
+from db_utils import get_db_connection
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+MIGRATIONS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "migrations")
+
+
+def pending_migrations(applied: set[str]) -> list[str]:
+    return sorted(
+        name for name in os.listdir(MIGRATIONS_DIR)
+        if name.endswith(".sql") and name not in applied
+    )
+
+
+def migrate(conn):
+    """Apply migrations/*.sql in filename order, each in its own transaction."""
+    cursor = conn.cursor()
+    try:
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS schema_migrations (
+                name TEXT PRIMARY KEY,
+                applied_at TIMESTAMP NOT NULL DEFAULT NOW()
+            )
+        ''')
+        conn.commit()
+
+        cursor.execute('SELECT name FROM schema_migrations')
+        applied = {row[0] for row in cursor.fetchall()}
+
+        for name in pending_migrations(applied):
+            with open(os.path.join(MIGRATIONS_DIR, name)) as f:
+                sql = f.read()
+            try:
+                cursor.execute(sql)
+                cursor.execute('INSERT INTO schema_migrations (name) VALUES (%s)', (name,))
+                conn.commit()
+                logger.info(f"Applied migration {name}")
+            except Exception as e:
+                conn.rollback()
+                logger.error(f"Migration {name} failed: {str(e)}")
+                raise
+    finally:
+        cursor.close()
+
+
+if __name__ == "__main__":
+    conn = get_db_connection()
+    try:
+        migrate(conn)
+    except Exception:
+        sys.exit(1)
+    finally:
+        conn.close()
@@ -0,0 +1,25 @@
+-- Full-text search over projects and funds.
+-- The tsvector columns are generated, so every INSERT/UPDATE keeps them current.
+-- 'simple' config: titles and descriptions are mixed Vietnamese/English, so no stemming.
+
+ALTER TABLE algo_projects
+    ADD COLUMN IF NOT EXISTS search_vector tsvector
+    GENERATED ALWAYS AS (
+        setweight(to_tsvector('simple', coalesce(name, '')), 'A') ||
+        setweight(to_tsvector('simple', coalesce(description, '')), 'B')
+    ) STORED;
+
+ALTER TABLE algo_funds
+    ADD COLUMN IF NOT EXISTS search_vector tsvector
+    GENERATED ALWAYS AS (
+        setweight(to_tsvector('simple', coalesce(name_fund, '')), 'A') ||
+        setweight(to_tsvector('simple', coalesce(description, '')), 'B')
+    ) STORED;
+
+CREATE INDEX IF NOT EXISTS idx_algo_projects_search_vector
+    ON algo_projects USING GIN (search_vector)
+    WHERE deleted_at IS NULL;
+
+CREATE INDEX IF NOT EXISTS idx_algo_funds_search_vector
+    ON algo_funds USING GIN (search_vector)
+    WHERE deleted_at IS NULL;
@@ -0,0 +1,35 @@
+-- Indexes backing GET /projects/query (project_repository.query_projects).
+-- All are partial on live rows, matching the `p.deleted_at IS NULL` every query carries.
+-- Trailing `id` serves the tie-breaker so filter + sort stays an index scan; multi-filter
+-- combinations are answered by the leading composite or a BitmapAnd of these.
+
+CREATE INDEX IF NOT EXISTS idx_algo_projects_live_id
+    ON algo_projects (id) WHERE deleted_at IS NULL;
+
+CREATE INDEX IF NOT EXISTS idx_algo_projects_live_user_fund
+    ON algo_projects (user_id, fund_id, id) WHERE deleted_at IS NULL;
+
+CREATE INDEX IF NOT EXISTS idx_algo_projects_live_fund
+    ON algo_projects (fund_id, id) WHERE deleted_at IS NULL;
+
+CREATE INDEX IF NOT EXISTS idx_algo_projects_live_status
+    ON algo_projects (status, id) WHERE deleted_at IS NULL;
+
+CREATE INDEX IF NOT EXISTS idx_algo_projects_live_type
+    ON algo_projects (type, id) WHERE deleted_at IS NULL;
+
+CREATE INDEX IF NOT EXISTS idx_algo_projects_live_is_verify
+    ON algo_projects (is_verify, id) WHERE deleted_at IS NULL;
+
+CREATE INDEX IF NOT EXISTS idx_algo_projects_live_deadline
+    ON algo_projects (deadline, id) WHERE deleted_at IS NULL;
+
+CREATE INDEX IF NOT EXISTS idx_algo_projects_live_current_fund
+    ON algo_projects (current_fund, id) WHERE deleted_at IS NULL;
+
+CREATE INDEX IF NOT EXISTS idx_algo_projects_live_fund_raise_total
+    ON algo_projects (fund_raise_total, id) WHERE deleted_at IS NULL;
+
+-- Must match project_repository.PROGRESS_EXPR exactly for the planner to use it.
+CREATE INDEX IF NOT EXISTS idx_algo_projects_live_progress
+    ON algo_projects ((current_fund::float8 / NULLIF(fund_raise_total, 0)), id) WHERE deleted_at IS NULL;
@@ -0,0 +1,86 @@
+-- Per-fund dashboard aggregates, maintained row-by-row from algo_projects.
+-- Every write path (create/update/delete project, addFund, contributions bumping
+-- current_fund) goes through algo_projects, so the trigger keeps this exact without
+-- the handlers having to know about it. Projects without a fund are kept under fund_id 0.
+-- Platform totals are the SUM over this (small) table, which avoids a single hot row
+-- that every contribution in every fund would have to lock.
+
+CREATE TABLE IF NOT EXISTS algo_fund_stats (
+    fund_id INT PRIMARY KEY,
+    active_projects INT NOT NULL DEFAULT 0,
+    total_raised NUMERIC NOT NULL DEFAULT 0,
+    total_goal NUMERIC NOT NULL DEFAULT 0,
+    contribution_count BIGINT NOT NULL DEFAULT 0,
+    completion_ratio_sum DOUBLE PRECISION NOT NULL DEFAULT 0,
+    completion_ratio_projects INT NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP NOT NULL DEFAULT NOW()
+);
+
+CREATE OR REPLACE FUNCTION algo_fund_stats_apply(
+    p_fund_id INT, p_sign INT, p_current NUMERIC, p_goal NUMERIC, p_count BIGINT
+) RETURNS VOID AS $$
+DECLARE
+    v_ratio DOUBLE PRECISION := p_current::float8 / NULLIF(p_goal, 0);
+BEGIN
+    INSERT INTO algo_fund_stats AS s (
+        fund_id, active_projects, total_raised, total_goal, contribution_count,
+        completion_ratio_sum, completion_ratio_projects, updated_at
+    )
+    VALUES (
+        COALESCE(p_fund_id, 0), p_sign, p_sign * COALESCE(p_current, 0), p_sign * COALESCE(p_goal, 0),
+        p_sign * COALESCE(p_count, 0), p_sign * COALESCE(v_ratio, 0),
+        CASE WHEN v_ratio IS NULL THEN 0 ELSE p_sign END, NOW()
+    )
+    ON CONFLICT (fund_id) DO UPDATE SET
+        active_projects = s.active_projects + EXCLUDED.active_projects,
+        total_raised = s.total_raised + EXCLUDED.total_raised,
+        total_goal = s.total_goal + EXCLUDED.total_goal,
+        contribution_count = s.contribution_count + EXCLUDED.contribution_count,
+        completion_ratio_sum = s.completion_ratio_sum + EXCLUDED.completion_ratio_sum,
+        completion_ratio_projects = s.completion_ratio_projects + EXCLUDED.completion_ratio_projects,
+        updated_at = NOW();
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION algo_fund_stats_on_project_change() RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP = 'UPDATE'
+       AND OLD.fund_id IS NOT DISTINCT FROM NEW.fund_id
+       AND OLD.current_fund IS NOT DISTINCT FROM NEW.current_fund
+       AND OLD.fund_raise_total IS NOT DISTINCT FROM NEW.fund_raise_total
+       AND OLD.fund_raise_count IS NOT DISTINCT FROM NEW.fund_raise_count
+       AND (OLD.deleted_at IS NULL) = (NEW.deleted_at IS NULL) THEN
+        RETURN NULL;
+    END IF;
+
+    IF TG_OP IN ('UPDATE', 'DELETE') AND OLD.deleted_at IS NULL THEN
+        PERFORM algo_fund_stats_apply(OLD.fund_id, -1, OLD.current_fund, OLD.fund_raise_total, OLD.fund_raise_count);
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') AND NEW.deleted_at IS NULL THEN
+        PERFORM algo_fund_stats_apply(NEW.fund_id, 1, NEW.current_fund, NEW.fund_raise_total, NEW.fund_raise_count);
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_algo_fund_stats ON algo_projects;
+CREATE TRIGGER trg_algo_fund_stats
+    AFTER INSERT OR UPDATE OR DELETE ON algo_projects
+    FOR EACH ROW EXECUTE FUNCTION algo_fund_stats_on_project_change();
+
+-- Backfill from the live catalogue.
+TRUNCATE algo_fund_stats;
+INSERT INTO algo_fund_stats (
+    fund_id, active_projects, total_raised, total_goal, contribution_count,
+    completion_ratio_sum, completion_ratio_projects
+)
+SELECT COALESCE(fund_id, 0),
+       COUNT(*),
+       COALESCE(SUM(current_fund), 0),
+       COALESCE(SUM(fund_raise_total), 0),
+       COALESCE(SUM(fund_raise_count), 0),
+       COALESCE(SUM(current_fund::float8 / NULLIF(fund_raise_total, 0)), 0),
+       COUNT(current_fund::float8 / NULLIF(fund_raise_total, 0))
+FROM algo_projects
+WHERE deleted_at IS NULL
+GROUP BY COALESCE(fund_id, 0);
@@ -0,0 +1,53 @@
+-- Hourly/daily/weekly contribution buckets per project for the campaign charts.
+-- Kept current by a row trigger on algo_contributions, so a chart query reads one
+-- primary-key range of O(buckets) rows instead of every contribution.
+
+CREATE TABLE IF NOT EXISTS algo_contribution_rollups (
+    project_id INT NOT NULL,
+    granularity TEXT NOT NULL CHECK (granularity IN ('hour', 'day', 'week')),
+    bucket TIMESTAMP NOT NULL,
+    amount NUMERIC NOT NULL DEFAULT 0,
+    contribution_count BIGINT NOT NULL DEFAULT 0,
+    PRIMARY KEY (project_id, granularity, bucket)
+);
+
+CREATE OR REPLACE FUNCTION algo_contribution_rollups_apply(
+    p_project_id INT, p_time TIMESTAMP, p_amount NUMERIC, p_sign INT
+) RETURNS VOID AS $$
+BEGIN
+    INSERT INTO algo_contribution_rollups AS r (project_id, granularity, bucket, amount, contribution_count)
+    SELECT p_project_id, g, date_trunc(g, p_time), p_sign * COALESCE(p_amount, 0), p_sign
+    FROM unnest(ARRAY['hour', 'day', 'week']) AS g
+    ON CONFLICT (project_id, granularity, bucket) DO UPDATE SET
+        amount = r.amount + EXCLUDED.amount,
+        contribution_count = r.contribution_count + EXCLUDED.contribution_count;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION algo_contribution_rollups_on_change() RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        PERFORM algo_contribution_rollups_apply(
+            OLD.project_id, COALESCE(OLD.time_round, OLD.created_at), OLD.amount, -1);
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        PERFORM algo_contribution_rollups_apply(
+            NEW.project_id, COALESCE(NEW.time_round, NEW.created_at, NOW()::timestamp), NEW.amount, 1);
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_algo_contribution_rollups ON algo_contributions;
+CREATE TRIGGER trg_algo_contribution_rollups
+    AFTER INSERT OR DELETE OR UPDATE OF project_id, amount, time_round ON algo_contributions
+    FOR EACH ROW EXECUTE FUNCTION algo_contribution_rollups_on_change();
+
+-- Backfill from existing contributions.
+TRUNCATE algo_contribution_rollups;
+INSERT INTO algo_contribution_rollups (project_id, granularity, bucket, amount, contribution_count)
+SELECT c.project_id, g, date_trunc(g, COALESCE(c.time_round, c.created_at)), SUM(COALESCE(c.amount, 0)), COUNT(*)
+FROM algo_contributions c
+CROSS JOIN unnest(ARRAY['hour', 'day', 'week']) AS g
+WHERE COALESCE(c.time_round, c.created_at) IS NOT NULL
+GROUP BY 1, 2, 3;
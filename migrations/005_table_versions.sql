@@ -0,0 +1,53 @@
+-- Change counters backing the ETags of the project read endpoints.
+-- Each write bumps one of 16 shard rows per table, so concurrent writers to different
+-- projects rarely queue on the same row (a single counter row would serialize every
+-- contribution on the platform). The table version is the SUM over its shards.
+-- The counter moves in the writer's transaction, so a reader never sees a version
+-- that is newer than the data it then reads.
+
+CREATE TABLE IF NOT EXISTS algo_table_versions (
+    table_name TEXT NOT NULL,
+    shard INT NOT NULL,
+    version BIGINT NOT NULL DEFAULT 0,
+    PRIMARY KEY (table_name, shard)
+);
+
+INSERT INTO algo_table_versions (table_name, shard)
+SELECT t, s
+FROM unnest(ARRAY['algo_projects', 'algo_funds', 'algo_receivers']) t, generate_series(0, 15) s
+ON CONFLICT DO NOTHING;
+
+-- TG_ARGV[0] names the column that picks the shard: the row id, or project_id for
+-- receivers so that a project's receivers always land on shard project_id % 16.
+CREATE OR REPLACE FUNCTION algo_bump_table_version() RETURNS TRIGGER AS $$
+DECLARE
+    v_row JSONB := to_jsonb(CASE WHEN TG_OP = 'DELETE' THEN OLD ELSE NEW END);
+BEGIN
+    UPDATE algo_table_versions
+    SET version = version + 1
+    WHERE table_name = TG_TABLE_NAME
+      AND shard = COALESCE((v_row ->> TG_ARGV[0])::BIGINT, 0) % 16;
+    IF TG_OP = 'UPDATE' AND (to_jsonb(OLD) ->> TG_ARGV[0]) IS DISTINCT FROM (v_row ->> TG_ARGV[0]) THEN
+        UPDATE algo_table_versions
+        SET version = version + 1
+        WHERE table_name = TG_TABLE_NAME
+          AND shard = COALESCE((to_jsonb(OLD) ->> TG_ARGV[0])::BIGINT, 0) % 16;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS algo_projects_version ON algo_projects;
+CREATE TRIGGER algo_projects_version
+AFTER INSERT OR UPDATE OR DELETE ON algo_projects
+FOR EACH ROW EXECUTE FUNCTION algo_bump_table_version('id');
+
+DROP TRIGGER IF EXISTS algo_funds_version ON algo_funds;
+CREATE TRIGGER algo_funds_version
+AFTER INSERT OR UPDATE OR DELETE ON algo_funds
+FOR EACH ROW EXECUTE FUNCTION algo_bump_table_version('id');
+
+DROP TRIGGER IF EXISTS algo_receivers_version ON algo_receivers;
+CREATE TRIGGER algo_receivers_version
+AFTER INSERT OR UPDATE OR DELETE ON algo_receivers
+FOR EACH ROW EXECUTE FUNCTION algo_bump_table_version('project_id');
@@ -0,0 +1,24 @@
+-- One contribution per on-chain transaction and project, so a retried webhook
+-- becomes a no-op (INSERT ... ON CONFLICT DO NOTHING) instead of a second row that
+-- also bumps current_fund. Existing duplicates have already been counted twice and
+-- need a manual reconciliation; refuse to guess which row to keep.
+
+DO $$
+DECLARE
+    v_duplicates BIGINT;
+BEGIN
+    SELECT COUNT(*) INTO v_duplicates
+    FROM (
+        SELECT 1 FROM algo_contributions
+        WHERE txid IS NOT NULL
+        GROUP BY project_id, txid
+        HAVING COUNT(*) > 1
+    ) d;
+    IF v_duplicates > 0 THEN
+        RAISE EXCEPTION '% (project_id, txid) pairs occur more than once in algo_contributions; reconcile them before applying this migration', v_duplicates;
+    END IF;
+END;
+$$;
+
+CREATE UNIQUE INDEX IF NOT EXISTS algo_contributions_project_txid_key
+    ON algo_contributions (project_id, txid);
@@ -0,0 +1,25 @@
+-- User directory / member picker: prefix search on email and username, and
+-- substring search over both via trigrams. All partial on live users, matching
+-- the WHERE clause of GET /users.
+
+CREATE INDEX IF NOT EXISTS idx_algo_users_email_prefix
+    ON algo_users (lower(email) text_pattern_ops)
+    WHERE deleted_at IS NULL;
+
+CREATE INDEX IF NOT EXISTS idx_algo_users_username_prefix
+    ON algo_users (lower(username) text_pattern_ops)
+    WHERE deleted_at IS NULL;
+
+-- pg_trgm needs CREATE privilege on the database. Without it, substring search
+-- still works, just as a scan, and the rest of this migration still applies.
+DO $$
+BEGIN
+    CREATE EXTENSION IF NOT EXISTS pg_trgm;
+    -- Must stay identical to USER_SEARCH_EXPR in main.py
+    CREATE INDEX IF NOT EXISTS idx_algo_users_search_trgm
+        ON algo_users USING GIN ((lower(email) || ' ' || lower(coalesce(username, ''))) gin_trgm_ops)
+        WHERE deleted_at IS NULL;
+EXCEPTION WHEN insufficient_privilege OR undefined_file OR feature_not_supported THEN
+    RAISE NOTICE 'pg_trgm unavailable (%), substring user search will not be indexed', SQLERRM;
+END;
+$$;
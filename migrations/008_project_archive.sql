@@ -0,0 +1,44 @@
+-- Archive for projects soft-deleted longer than ARCHIVE_AFTER_DAYS (see archiver.py).
+-- The archiver moves a project together with its receivers, contributions and
+-- distribution history, so the live tables and their indexes only hold the active
+-- catalogue. Archive tables mirror the live columns (generated columns become plain
+-- ones) plus archived_at; they carry no defaults so ids are always copied verbatim.
+
+CREATE TABLE IF NOT EXISTS algo_projects_archive (
+    LIKE algo_projects,
+    archived_at TIMESTAMP NOT NULL DEFAULT NOW(),
+    PRIMARY KEY (id)
+);
+
+CREATE TABLE IF NOT EXISTS algo_receivers_archive (
+    LIKE algo_receivers,
+    archived_at TIMESTAMP NOT NULL DEFAULT NOW(),
+    PRIMARY KEY (id)
+);
+CREATE INDEX IF NOT EXISTS idx_algo_receivers_archive_project ON algo_receivers_archive (project_id);
+
+CREATE TABLE IF NOT EXISTS algo_contributions_archive (
+    LIKE algo_contributions,
+    archived_at TIMESTAMP NOT NULL DEFAULT NOW(),
+    PRIMARY KEY (id)
+);
+CREATE INDEX IF NOT EXISTS idx_algo_contributions_archive_project ON algo_contributions_archive (project_id);
+
+CREATE TABLE IF NOT EXISTS algo_receivers_transaction_archive (
+    LIKE algo_receivers_transaction,
+    archived_at TIMESTAMP NOT NULL DEFAULT NOW(),
+    PRIMARY KEY (id)
+);
+CREATE INDEX IF NOT EXISTS idx_algo_receivers_transaction_archive_project ON algo_receivers_transaction_archive (project_id);
+
+-- Archiver candidates: only the (few) dead rows, so it never scans the live catalogue.
+CREATE INDEX IF NOT EXISTS idx_algo_projects_deleted_at
+    ON algo_projects (deleted_at, id) WHERE deleted_at IS NOT NULL;
+
+-- Per-project child lookups used by the detail page, distribution and the archiver.
+CREATE INDEX IF NOT EXISTS idx_algo_receivers_project ON algo_receivers (project_id);
+CREATE INDEX IF NOT EXISTS idx_algo_receivers_transaction_project ON algo_receivers_transaction (project_id);
+
+-- Live-row partial indexes for the fund endpoints, like the project ones in 002.
+CREATE INDEX IF NOT EXISTS idx_algo_funds_live_user
+    ON algo_funds (user_id, id) WHERE deleted_at IS NULL;
@@ -0,0 +1,21 @@
+-- Cross-worker state for STATE_BACKEND=postgres (state_backend.PostgresStateBackend):
+-- JWT revocations and chat sessions in app_state, request-rate token buckets in
+-- app_rate_buckets. Buckets are UNLOGGED: losing them on a crash only resets limits.
+
+CREATE TABLE IF NOT EXISTS app_state (
+    namespace TEXT NOT NULL,
+    key TEXT NOT NULL,
+    value TEXT NOT NULL,
+    expires_at TIMESTAMPTZ,
+    PRIMARY KEY (namespace, key)
+);
+
+CREATE INDEX IF NOT EXISTS idx_app_state_expires_at
+    ON app_state (namespace, expires_at) WHERE expires_at IS NOT NULL;
+
+CREATE UNLOGGED TABLE IF NOT EXISTS app_rate_buckets (
+    key TEXT PRIMARY KEY,
+    tokens DOUBLE PRECISION NOT NULL,
+    admitted BOOLEAN NOT NULL,
+    updated_at TIMESTAMPTZ NOT NULL
+);
@@ -0,0 +1,34 @@
+-- Durable background jobs (see jobs.py). Workers claim the oldest runnable row with
+-- FOR UPDATE SKIP LOCKED, so any number of workers across processes and hosts can
+-- poll the same table without blocking each other. A claim is a lease: a job whose
+-- worker died is picked up again once locked_until has passed.
+
+CREATE TABLE IF NOT EXISTS app_jobs (
+    id BIGSERIAL PRIMARY KEY,
+    kind TEXT NOT NULL,
+    payload JSONB NOT NULL DEFAULT '{}',
+    status TEXT NOT NULL DEFAULT 'queued' CHECK (status IN ('queued', 'running', 'succeeded', 'failed')),
+    attempts INT NOT NULL DEFAULT 0,
+    max_attempts INT NOT NULL DEFAULT 5,
+    run_after TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    locked_by TEXT,
+    locked_until TIMESTAMPTZ,
+    progress DOUBLE PRECISION NOT NULL DEFAULT 0,
+    progress_message TEXT,
+    result JSONB,
+    last_error TEXT,
+    dedupe_key TEXT,
+    created_by INT,
+    created_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    updated_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    started_at TIMESTAMPTZ,
+    finished_at TIMESTAMPTZ
+);
+
+-- Claim paths: runnable queued jobs and expired leases. Both stay small however long the history grows.
+CREATE INDEX IF NOT EXISTS idx_app_jobs_queued ON app_jobs (run_after, id) WHERE status = 'queued';
+CREATE INDEX IF NOT EXISTS idx_app_jobs_running ON app_jobs (locked_until) WHERE status = 'running';
+
+-- At most one unfinished job per (kind, dedupe_key), e.g. one distribution per project.
+CREATE UNIQUE INDEX IF NOT EXISTS app_jobs_active_dedupe_key
+    ON app_jobs (kind, dedupe_key) WHERE dedupe_key IS NOT NULL AND status IN ('queued', 'running');
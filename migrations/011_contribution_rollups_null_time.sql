@@ -0,0 +1,45 @@
+-- A contribution with neither time_round nor created_at has no bucket. 004 counted such
+-- rows on INSERT (bucketed at NOW()) but then failed on their UPDATE/DELETE with a NULL
+-- bucket, which also aborted any archiver batch containing one. Skip them in every path,
+-- as the backfill already did, and rebuild the rollups so earlier NOW() buckets go away.
+-- amount is cast explicitly: a double precision column has no implicit cast to NUMERIC, so
+-- 004's call did not resolve there and every contribution insert raised.
+
+CREATE OR REPLACE FUNCTION algo_contribution_rollups_apply(
+    p_project_id INT, p_time TIMESTAMP, p_amount NUMERIC, p_sign INT
+) RETURNS VOID AS $$
+BEGIN
+    IF p_time IS NULL THEN
+        RETURN;
+    END IF;
+    INSERT INTO algo_contribution_rollups AS r (project_id, granularity, bucket, amount, contribution_count)
+    SELECT p_project_id, g, date_trunc(g, p_time), p_sign * COALESCE(p_amount, 0), p_sign
+    FROM unnest(ARRAY['hour', 'day', 'week']) AS g
+    ON CONFLICT (project_id, granularity, bucket) DO UPDATE SET
+        amount = r.amount + EXCLUDED.amount,
+        contribution_count = r.contribution_count + EXCLUDED.contribution_count;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION algo_contribution_rollups_on_change() RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        PERFORM algo_contribution_rollups_apply(
+            OLD.project_id, COALESCE(OLD.time_round, OLD.created_at), OLD.amount::numeric, -1);
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        PERFORM algo_contribution_rollups_apply(
+            NEW.project_id, COALESCE(NEW.time_round, NEW.created_at), NEW.amount::numeric, 1);
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+LOCK TABLE algo_contributions IN SHARE MODE;
+TRUNCATE algo_contribution_rollups;
+INSERT INTO algo_contribution_rollups (project_id, granularity, bucket, amount, contribution_count)
+SELECT c.project_id, g, date_trunc(g, COALESCE(c.time_round, c.created_at)), SUM(COALESCE(c.amount, 0)), COUNT(*)
+FROM algo_contributions c
+CROSS JOIN unnest(ARRAY['hour', 'day', 'week']) AS g
+WHERE COALESCE(c.time_round, c.created_at) IS NOT NULL
+GROUP BY 1, 2, 3;
@@ -0,0 +1,43 @@
+-- algo_fund_stats keeps one row per fund, so every write that changes a project's totals
+-- (contributions, addFund, create/update/delete) updates that fund's row and holds its
+-- lock until commit: writes are serialized per fund, while different funds still proceed
+-- in parallel. Keep transactions that touch algo_projects short for that reason.
+--
+-- Moving a project between funds updates two stats rows. 003 always did the old fund
+-- first, so moving one project A -> B while another moves B -> A locked the rows in
+-- opposite orders and could deadlock. Apply the two halves in fund_id order instead, so
+-- concurrent moves queue on the lower fund rather than waiting on each other.
+--
+-- The arguments are cast explicitly: where the amount columns are double precision (as in
+-- loadtest/schema.sql) there is no implicit cast to the NUMERIC parameters, so 003's calls
+-- failed to resolve and every write to algo_projects raised.
+
+CREATE OR REPLACE FUNCTION algo_fund_stats_on_project_change() RETURNS TRIGGER AS $$
+DECLARE
+    v_remove BOOLEAN := TG_OP IN ('UPDATE', 'DELETE') AND OLD.deleted_at IS NULL;
+    v_add BOOLEAN := TG_OP IN ('INSERT', 'UPDATE') AND NEW.deleted_at IS NULL;
+BEGIN
+    IF TG_OP = 'UPDATE'
+       AND OLD.fund_id IS NOT DISTINCT FROM NEW.fund_id
+       AND OLD.current_fund IS NOT DISTINCT FROM NEW.current_fund
+       AND OLD.fund_raise_total IS NOT DISTINCT FROM NEW.fund_raise_total
+       AND OLD.fund_raise_count IS NOT DISTINCT FROM NEW.fund_raise_count
+       AND (OLD.deleted_at IS NULL) = (NEW.deleted_at IS NULL) THEN
+        RETURN NULL;
+    END IF;
+
+    IF v_remove AND v_add AND COALESCE(NEW.fund_id, 0) < COALESCE(OLD.fund_id, 0) THEN
+        PERFORM algo_fund_stats_apply(NEW.fund_id, 1, NEW.current_fund::numeric, NEW.fund_raise_total::numeric, NEW.fund_raise_count::bigint);
+        PERFORM algo_fund_stats_apply(OLD.fund_id, -1, OLD.current_fund::numeric, OLD.fund_raise_total::numeric, OLD.fund_raise_count::bigint);
+        RETURN NULL;
+    END IF;
+
+    IF v_remove THEN
+        PERFORM algo_fund_stats_apply(OLD.fund_id, -1, OLD.current_fund::numeric, OLD.fund_raise_total::numeric, OLD.fund_raise_count::bigint);
+    END IF;
+    IF v_add THEN
+        PERFORM algo_fund_stats_apply(NEW.fund_id, 1, NEW.current_fund::numeric, NEW.fund_raise_total::numeric, NEW.fund_raise_count::bigint);
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
@@ -0,0 +1,21 @@
+-- Indexes backing export.py date-range exports. A range export orders by
+-- (date_column, id), so each of these serves both the range filter and the sort and the
+-- named cursor can stream from the first row instead of walking the whole primary key.
+
+CREATE INDEX IF NOT EXISTS idx_algo_contributions_created_at_id
+    ON algo_contributions (created_at, id);
+
+CREATE INDEX IF NOT EXISTS idx_algo_contributions_time_round_id
+    ON algo_contributions (time_round, id);
+
+CREATE INDEX IF NOT EXISTS idx_algo_contributions_updated_at_id
+    ON algo_contributions (updated_at, id);
+
+CREATE INDEX IF NOT EXISTS idx_algo_receivers_transaction_created_at_id
+    ON algo_receivers_transaction (created_at, id);
+
+CREATE INDEX IF NOT EXISTS idx_algo_receivers_transaction_time_round_id
+    ON algo_receivers_transaction (time_round, id);
+
+CREATE INDEX IF NOT EXISTS idx_algo_receivers_transaction_updated_at_id
+    ON algo_receivers_transaction (updated_at, id);
@@ -0,0 +1,268 @@
+"""Opt-in sampling profiler for individual requests.
+
+A request is profiled when it carries a valid ``X-Profile`` header or matches a
+route armed through the admin endpoint. Endpoints are wrapped so that, for a
+profiled request, the wrapper records which thread runs it and its own frame.
+A sampler thread then reads that thread's stack from ``sys._current_frames()``
+every PROFILE_INTERVAL_MS and keeps it only while it passes through that frame,
+so concurrent requests to the same route (in the threadpool or interleaved on
+the event loop) never leak into each other's profile. Profiles are stored in the
+collapsed-stack format read by flamegraph.pl and speedscope.
+
+The header value is ``<expires>:<hex hmac-sha256 of "<METHOD> <path> <expires>">``
+keyed with PROFILE_SECRET, so a captured header cannot be replayed against
+other routes or after it expires. Requests that are not profiled only pay for
+one dict lookup and, when a secret is configured, one header scan.
+"""
+import asyncio
+import contextvars
+import functools
+import hashlib
+import hmac
+import itertools
+import os
+import sys
+import threading
+import time
+from collections import Counter, OrderedDict
+from typing import Optional
+
+PROFILE_SECRET = os.getenv("PROFILE_SECRET", "")
+PROFILE_INTERVAL_MS = float(os.getenv("PROFILE_INTERVAL_MS", "5"))
+PROFILE_MAX_SECONDS = float(os.getenv("PROFILE_MAX_SECONDS", "30"))
+PROFILE_KEEP = int(os.getenv("PROFILE_KEEP", "50"))
+
+PROFILE_HEADER = b"x-profile"
+
+
+def sign(method: str, path: str, expires: int, secret: str = PROFILE_SECRET) -> str:
+    message = f"{method.upper()} {path} {expires}".encode("utf-8")
+    digest = hmac.new(secret.encode("utf-8"), message, hashlib.sha256).hexdigest()
+    return f"{expires}:{digest}"
+
+
+def verify(value: str, method: str, path: str, secret: str = PROFILE_SECRET) -> bool:
+    if not secret:
+        return False
+    expires, _, _ = value.partition(":")
+    try:
+        if int(expires) < time.time():
+            return False
+        expected = sign(method, path, int(expires), secret)
+    except ValueError:
+        return False
+    return hmac.compare_digest(expected, value)
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+class RequestSampler:
+    """Samples the thread running this request's endpoint, once the endpoint wrapper has bound it."""
+
+    def __init__(self, scope, interval: float):
+        self.scope = scope
+        self.interval = interval
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self._target = None  # (thread ident, endpoint wrapper frame)
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="request-profiler", daemon=True)
+
+    def bind(self, ident: int, frame):
+        self._target = (ident, frame)
+
+    def start(self):
+        self.started = time.perf_counter()
+        self._thread.start()
+
+    def stop(self):
+        # Called on the event loop: signal only, the thread exits at its next wake-up
+        self._stop.set()
+        self.duration = time.perf_counter() - self.started
+
+    def _run(self):
+        deadline = time.monotonic() + PROFILE_MAX_SECONDS
+        while not self._stop.wait(self.interval) and time.monotonic() < deadline:
+            if self._target is None:
+                continue
+            ident, target = self._target
+            frame = sys._current_frames().get(ident)
+            labels = []
+            found = False
+            while frame is not None:
+                labels.append(_frame_label(frame))
+                found = found or frame is target
+                frame = frame.f_back
+            with self._lock:
+                if self._stop.is_set():
+                    return
+                self.samples += 1
+                if found:
+                    self.stacks[";".join(reversed(labels))] += 1
+        self._target = None
+
+    def collapsed(self) -> str:
+        with self._lock:
+            return "\n".join(f"{stack} {count}" for stack, count in self.stacks.most_common())
+
+
+_active_sampler: contextvars.ContextVar = contextvars.ContextVar("active_profile_sampler", default=None)
+
+
+def _bind_thread(func):
+    """Wrap an endpoint so a profiled request's sampler learns the thread and frame running it.
+
+    The contextvar set by the middleware is copied into threadpool threads, so
+    this works for sync endpoints as well as async ones.
+    """
+    if asyncio.iscoroutinefunction(func):
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            sampler = _active_sampler.get()
+            if sampler is not None:
+                sampler.bind(threading.get_ident(), sys._getframe())
+            return await func(*args, **kwargs)
+    else:
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            sampler = _active_sampler.get()
+            if sampler is not None:
+                sampler.bind(threading.get_ident(), sys._getframe())
+            return func(*args, **kwargs)
+    wrapper.__profiling_bound__ = True
+    return wrapper
+
+
+def instrument_routes(app):
+    """Wrap every route endpoint of a FastAPI app with ``_bind_thread`` (idempotent)."""
+    for route in getattr(app, "routes", []):
+        dependant = getattr(route, "dependant", None)
+        if dependant is not None and not getattr(dependant.call, "__profiling_bound__", False):
+            dependant.call = _bind_thread(dependant.call)
+
+
+class ProfileStore:
+    def __init__(self, keep: int = PROFILE_KEEP):
+        self.keep = keep
+        self._lock = threading.Lock()
+        self._profiles: OrderedDict = OrderedDict()
+        self._ids = itertools.count(1)
+        # path prefix -> remaining requests to profile
+        self._armed: dict[str, int] = {}
+
+    def arm(self, path_prefix: str, count: int = 1):
+        with self._lock:
+            self._armed[path_prefix] = count
+
+    def disarm(self, path_prefix: Optional[str] = None):
+        with self._lock:
+            if path_prefix is None:
+                self._armed.clear()
+            else:
+                self._armed.pop(path_prefix, None)
+
+    def armed(self) -> dict:
+        with self._lock:
+            return dict(self._armed)
+
+    def take(self, path: str) -> bool:
+        """Consume one armed slot matching ``path``; called only when something is armed."""
+        with self._lock:
+            for prefix, remaining in self._armed.items():
+                if path.startswith(prefix):
+                    if remaining <= 1:
+                        del self._armed[prefix]
+                    else:
+                        self._armed[prefix] = remaining - 1
+                    return True
+        return False
+
+    def new_id(self) -> str:
+        with self._lock:
+            return str(next(self._ids))
+
+    def add(self, profile_id: str, scope, sampler: RequestSampler, status: int):
+        route = getattr(scope.get("route"), "path", None) or scope["path"]
+        with self._lock:
+            self._profiles[profile_id] = {
+                "id": profile_id,
+                "method": scope["method"],
+                "route": route,
+                "path": scope["path"],
+                "status": status,
+                "duration_ms": round(sampler.duration * 1e3, 2),
+                "samples": sampler.samples,
+                "interval_ms": sampler.interval * 1e3,
+                "collapsed": sampler.collapsed(),
+            }
+            while len(self._profiles) > self.keep:
+                self._profiles.popitem(last=False)
+
+    def get(self, profile_id: str) -> Optional[dict]:
+        with self._lock:
+            return self._profiles.get(profile_id)
+
+    def list(self) -> list[dict]:
+        with self._lock:
+            return [
+                {key: value for key, value in profile.items() if key != "collapsed"}
+                for profile in reversed(self._profiles.values())
+            ]
+
+
+profile_store = ProfileStore()
+
+
+class ProfilingMiddleware:
+    """ASGI middleware starting a RequestSampler for requests that asked for one."""
+
+    def __init__(self, app, store: ProfileStore = profile_store, secret: str = PROFILE_SECRET,
+                 interval_ms: float = PROFILE_INTERVAL_MS):
+        self.app = app
+        self.store = store
+        self.secret = secret
+        self.interval = interval_ms / 1e3
+        self._instrumented = False
+
+    def _requested(self, scope) -> bool:
+        if self.store._armed and self.store.take(scope["path"]):
+            return True
+        if not self.secret:
+            return False
+        for name, value in scope["headers"]:
+            if name == PROFILE_HEADER:
+                return verify(value.decode("latin-1"), scope["method"], scope["path"], self.secret)
+        return False
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self._requested(scope):
+            await self.app(scope, receive, send)
+            return
+
+        if not self._instrumented:
+            # Routes are all registered by the time the first request arrives
+            instrument_routes(scope["app"])
+            self._instrumented = True
+
+        sampler = RequestSampler(scope, self.interval)
+        profile_id = self.store.new_id()
+        status_holder = [500]
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status_holder[0] = message["status"]
+                message["headers"] = list(message.get("headers", [])) + [(b"x-profile-id", profile_id.encode())]
+            await send(message)
+
+        sampler.start()
+        token = _active_sampler.set(sampler)
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _active_sampler.reset(token)
+            sampler.stop()
+            self.store.add(profile_id, scope, sampler, status_holder[0])
@@ -0,0 +1,215 @@
+from typing import Any, Dict, List, Optional
+
+from db_utils import execute_prepared, register_statement
+from serializers import row_mapper
+
+# (SQL expression, response key) pairs; the SELECT list and the mapper are built
+# from the same tuple so they can never drift apart.
+PROJECT_COLUMNS = (
+    ("p.id", "id"),
+    ("p.user_id", "user_id"),
+    ("p.name", "name"),
+    ("p.description", "description"),
+    ("p.fund_id", "fund_id"),
+    ("p.current_fund", "current_fund"),
+    ("p.fund_raise_total", "fund_raise_total"),
+    ("p.fund_raise_count", "fund_raise_count"),
+    ("p.deadline", "deadline"),
+    ("p.project_hash", "project_hash"),
+    ("p.is_verify", "is_verify"),
+    ("p.status", "status"),
+    ("p.linkcardImage", "linkcardImage"),
+    ("p.type", "type"),
+    ("p.created_at", "created_at"),
+    ("p.updated_at", "updated_at"),
+    ("p.deleted_at", "deleted_at"),
+)
+
+FUND_COLUMNS = (
+    ("f.name_fund", "fund_name"),
+    ("f.logo", "fund_logo"),
+    ("f.description", "fund_description"),
+)
+
+PROJECT_WITH_FUND_COLUMNS = PROJECT_COLUMNS + FUND_COLUMNS
+
+
+def _select_list(columns) -> str:
+    return ", ".join(expr for expr, _ in columns)
+
+
+project_to_dict = row_mapper(*(key for _, key in PROJECT_COLUMNS))
+project_with_fund_to_dict = row_mapper(*(key for _, key in PROJECT_WITH_FUND_COLUMNS))
+
+PROJECT_SELECT = f"SELECT {_select_list(PROJECT_COLUMNS)} FROM algo_projects p"
+PROJECT_WITH_FUND_SELECT = f'''
+    SELECT {_select_list(PROJECT_WITH_FUND_COLUMNS)}
+    FROM algo_projects p
+    LEFT JOIN algo_funds f ON p.fund_id = f.id
+'''
+
+register_statement("project_detail", PROJECT_WITH_FUND_SELECT + " WHERE p.id = $1 AND p.deleted_at IS NULL")
+
+
+# Everything the detail response depends on; any change to it changes the ETag.
+# Receivers are covered by their table-version shard (migrations/005).
+register_statement("project_etag", '''
+    SELECT p.updated_at, p.current_fund, p.fund_raise_count, f.updated_at,
+           (SELECT version FROM algo_table_versions
+            WHERE table_name = 'algo_receivers' AND shard = $1 % 16)
+    FROM algo_projects p
+    LEFT JOIN algo_funds f ON p.fund_id = f.id
+    WHERE p.id = $1 AND p.deleted_at IS NULL
+''')
+
+
+def fetch_project_version(cursor, project_id: int) -> Optional[tuple]:
+    """Version components of a live project for its ETag, or None if it does not exist.
+
+    Read before the body: if a write lands in between, the body is newer than the tag
+    and the next request simply refetches.
+    """
+    execute_prepared(cursor, "project_etag", (project_id,))
+    return cursor.fetchone()
+
+
+def fetch_table_versions(cursor, *tables: str) -> tuple:
+    """Current change counters of ``tables``, in the order given."""
+    cursor.execute(
+        "SELECT table_name, SUM(version) FROM algo_table_versions WHERE table_name = ANY(%s) GROUP BY table_name;",
+        (list(tables),),
+    )
+    versions = dict(cursor.fetchall())
+    return tuple(versions.get(table) for table in tables)
+
+
+def fetch_project(cursor, project_id: int) -> Optional[Dict[str, Any]]:
+    """Live project joined with its fund, or None."""
+    execute_prepared(cursor, "project_detail", (project_id,))
+    row = cursor.fetchone()
+    return project_with_fund_to_dict(row) if row else None
+
+
+# Funding progress as a ratio; must stay identical to the expression index in migrations/002
+PROGRESS_EXPR = "(p.current_fund::float8 / NULLIF(p.fund_raise_total, 0))"
+
+# Whitelisted filters: name -> SQL predicate with one placeholder. Values are always bound.
+PROJECT_FILTERS = {
+    "user_id": "p.user_id = %s",
+    "fund_id": "p.fund_id = %s",
+    "status": "p.status = %s",
+    "type": "p.type = %s",
+    "is_verify": "p.is_verify = %s",
+    "deadline_from": "p.deadline >= %s",
+    "deadline_to": "p.deadline < %s",
+    "min_progress": f"{PROGRESS_EXPR} >= %s",
+    "max_progress": f"{PROGRESS_EXPR} <= %s",
+}
+
+# Whitelisted sort keys: name -> SQL expression. p.id is always appended as tie-breaker.
+PROJECT_SORT_KEYS = {
+    "id": "p.id",
+    "deadline": "p.deadline",
+    "current_fund": "p.current_fund",
+    "fund_raise_total": "p.fund_raise_total",
+    "progress": PROGRESS_EXPR,
+}
+
+
+def query_projects(
+    cursor,
+    filters: Optional[Dict[str, Any]] = None,
+    sort: str = "id",
+    order: str = "desc",
+    limit: Optional[int] = None,
+    offset: int = 0,
+) -> List[Dict[str, Any]]:
+    """Live projects joined with their fund, filtered and sorted by whitelisted keys only.
+
+    Raises ValueError for unknown filter or sort names so callers can map it to a 400.
+    """
+    conditions = ["p.deleted_at IS NULL"]
+    params: List[Any] = []
+    for name, value in (filters or {}).items():
+        if value is None:
+            continue
+        if name not in PROJECT_FILTERS:
+            raise ValueError(f"Unsupported filter: {name}")
+        conditions.append(PROJECT_FILTERS[name])
+        params.append(value)
+
+    if sort not in PROJECT_SORT_KEYS:
+        raise ValueError(f"Unsupported sort key: {sort}")
+    if order not in ("asc", "desc"):
+        raise ValueError(f"Unsupported sort order: {order}")
+    direction = order.upper()
+    order_by = f"{PROJECT_SORT_KEYS[sort]} {direction}"
+    if sort != "id":
+        order_by += f", p.id {direction}"
+
+    query = PROJECT_WITH_FUND_SELECT + f" WHERE {' AND '.join(conditions)} ORDER BY {order_by}"
+    if limit is not None:
+        query += " LIMIT %s OFFSET %s"
+        params.extend([limit, offset])
+
+    cursor.execute(query + ";", params)
+    return [project_with_fund_to_dict(row) for row in cursor.fetchall()]
+
+
+def fetch_projects(cursor, user_id: Optional[int] = None, fund_id: Optional[int] = None) -> List[Dict[str, Any]]:
+    """Live projects joined with their fund, newest first, optionally narrowed by owner/fund."""
+    return query_projects(cursor, {"user_id": user_id, "fund_id": fund_id})
+
+
+def project_exists(cursor, project_id: int) -> bool:
+    """Whether a project row exists, soft-deleted or not (the update paths do not filter those)."""
+    cursor.execute("SELECT 1 FROM algo_projects WHERE id = %s;", (project_id,))
+    return cursor.fetchone() is not None
+
+
+# Columns a client may change. In the update statement each is COALESCE(new, current),
+# so a NULL/omitted value keeps what is stored and the merge happens under the row lock.
+PROJECT_UPDATABLE_COLUMNS = (
+    "user_id", "name", "description", "fund_id", "current_fund", "fund_raise_total",
+    "fund_raise_count", "deadline", "project_hash", "is_verify", "status", "linkcardImage", "type",
+)
+
+register_statement("update_project", f'''
+    UPDATE algo_projects AS p
+    SET {", ".join(f"{column} = COALESCE(${i}, p.{column})" for i, column in enumerate(PROJECT_UPDATABLE_COLUMNS, 1))},
+        updated_at = NOW()
+    WHERE p.id = ${len(PROJECT_UPDATABLE_COLUMNS) + 1}
+    RETURNING {_select_list(PROJECT_COLUMNS)}
+''')
+
+# The goal check is part of the WHERE clause, so two concurrent top-ups can never
+# together overshoot fund_raise_total.
+register_statement("add_project_funding", f'''
+    UPDATE algo_projects AS p
+    SET current_fund = p.current_fund + $1,
+        fund_raise_count = p.fund_raise_count + 1,
+        updated_at = NOW()
+    WHERE p.id = $2 AND p.current_fund + $1 <= p.fund_raise_total
+    RETURNING {_select_list(PROJECT_COLUMNS)}
+''')
+
+
+def patch_project(cursor, project_id: int, fields: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """Write the non-None ``fields`` in one statement; returns the updated project or None if missing.
+
+    Raises ValueError for names outside PROJECT_UPDATABLE_COLUMNS.
+    """
+    unknown = set(fields) - set(PROJECT_UPDATABLE_COLUMNS)
+    if unknown:
+        raise ValueError(f"Unsupported fields: {', '.join(sorted(unknown))}")
+    params = [fields.get(column) for column in PROJECT_UPDATABLE_COLUMNS]
+    execute_prepared(cursor, "update_project", (*params, project_id))
+    row = cursor.fetchone()
+    return project_to_dict(row) if row else None
+
+
+def add_project_funding(cursor, project_id: int, amount) -> Optional[Dict[str, Any]]:
+    """Atomically add ``amount`` unless it would exceed the goal; None if missing or over the goal."""
+    execute_prepared(cursor, "add_project_funding", (amount, project_id))
+    row = cursor.fetchone()
+    return project_to_dict(row) if row else None
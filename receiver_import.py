@@ -0,0 +1,148 @@
+import csv
+import io
+import json
+import logging
+import os
+from typing import Any, Dict, Iterable, Iterator, List, Tuple
+
+from pydantic import ValidationError
+
+logger = logging.getLogger(__name__)
+
+RECEIVER_IMPORT_COLUMNS = (
+    "project_id", "email", "sodienthoai", "address", "name", "type_receiver_wallet", "receiver_wallet_address",
+)
+# Valid rows are sent to COPY in chunks of this size, so memory stays flat for any file size
+RECEIVER_IMPORT_CHUNK_ROWS = int(os.getenv("RECEIVER_IMPORT_CHUNK_ROWS", "5000"))
+# Rows beyond this many errors are still counted, just not itemised in the response
+RECEIVER_IMPORT_MAX_ERRORS = int(os.getenv("RECEIVER_IMPORT_MAX_ERRORS", "1000"))
+
+STAGING_TABLE_SQL = f'''
+    CREATE TEMP TABLE receiver_import_staging (
+        row_number INT NOT NULL,
+        {", ".join(f"{column} {'INT' if column == 'project_id' else 'TEXT'}" for column in RECEIVER_IMPORT_COLUMNS)}
+    ) ON COMMIT DROP
+'''
+
+MISSING_PROJECT_SQL = '''
+    SELECT s.row_number, s.project_id
+    FROM receiver_import_staging s
+    LEFT JOIN algo_projects p ON p.id = s.project_id
+    WHERE p.id IS NULL
+    ORDER BY s.row_number
+'''
+
+MERGE_SQL = f'''
+    INSERT INTO algo_receivers ({", ".join(RECEIVER_IMPORT_COLUMNS)}, created_at, updated_at)
+    SELECT {", ".join(f"s.{column}" for column in RECEIVER_IMPORT_COLUMNS)}, NOW(), NOW()
+    FROM receiver_import_staging s
+    JOIN algo_projects p ON p.id = s.project_id
+    ORDER BY s.row_number
+'''
+
+
+def detect_format(filename: str, content_type: str) -> str:
+    if (filename or "").lower().endswith((".ndjson", ".jsonl")) or "ndjson" in (content_type or ""):
+        return "ndjson"
+    return "csv"
+
+
+def iter_records(binary_file, fmt: str) -> Iterator[Tuple[int, Any]]:
+    """Yield (row number, raw record) from an uploaded file without reading it all in.
+
+    A record that cannot be parsed is yielded as an Exception so it is reported
+    like any other invalid row.
+    """
+    text = io.TextIOWrapper(binary_file, encoding="utf-8-sig", newline="")
+    if fmt == "ndjson":
+        row_number = 0
+        for line in text:
+            if not line.strip():
+                continue
+            row_number += 1
+            try:
+                yield row_number, json.loads(line)
+            except ValueError as e:
+                yield row_number, e
+    else:
+        for row_number, record in enumerate(csv.DictReader(text), 1):
+            # Empty CSV cells mean "not provided", like an omitted JSON field
+            yield row_number, {key: value for key, value in record.items() if key and value not in ("", None)}
+
+
+def _format_errors(error: Exception) -> List[str]:
+    if isinstance(error, ValidationError):
+        return [f"{'.'.join(str(part) for part in item['loc'])}: {item['msg']}" for item in error.errors()]
+    return [str(error)]
+
+
+class ImportReport:
+    def __init__(self):
+        self.received = 0
+        self.inserted = 0
+        self.failed = 0
+        self.errors: List[Dict[str, Any]] = []
+
+    def fail(self, row_number: int, messages: List[str]):
+        self.failed += 1
+        if len(self.errors) < RECEIVER_IMPORT_MAX_ERRORS:
+            self.errors.append({"row": row_number, "errors": messages})
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "received": self.received,
+            "inserted": self.inserted,
+            "failed": self.failed,
+            "errors": sorted(self.errors, key=lambda error: error["row"]),
+            "errors_truncated": self.failed > len(self.errors),
+        }
+
+
+def _copy_chunk(cursor, rows: List[List[Any]]):
+    buffer = io.StringIO()
+    csv.writer(buffer).writerows(rows)
+    buffer.seek(0)
+    cursor.copy_expert(
+        f"COPY receiver_import_staging (row_number, {', '.join(RECEIVER_IMPORT_COLUMNS)}) FROM STDIN WITH (FORMAT csv)",
+        buffer,
+    )
+
+
+def import_receivers(cursor, records: Iterable[Tuple[int, Any]], model) -> ImportReport:
+    """Validate ``records`` with ``model`` and insert the valid ones in the caller's transaction.
+
+    Invalid rows and rows pointing at unknown projects are reported, never fatal.
+    The caller commits.
+    """
+    report = ImportReport()
+    cursor.execute(STAGING_TABLE_SQL)
+
+    chunk: List[List[Any]] = []
+    for row_number, record in records:
+        report.received += 1
+        if isinstance(record, Exception):
+            report.fail(row_number, _format_errors(record))
+            continue
+        if not isinstance(record, dict):
+            report.fail(row_number, ["expected an object per line"])
+            continue
+        try:
+            receiver = model(**record)
+        except ValidationError as e:
+            report.fail(row_number, _format_errors(e))
+            continue
+        chunk.append([row_number] + [getattr(receiver, column) for column in RECEIVER_IMPORT_COLUMNS])
+        if len(chunk) >= RECEIVER_IMPORT_CHUNK_ROWS:
+            _copy_chunk(cursor, chunk)
+            chunk = []
+    if chunk:
+        _copy_chunk(cursor, chunk)
+
+    cursor.execute(MISSING_PROJECT_SQL)
+    for row_number, project_id in cursor.fetchall():
+        report.fail(row_number, [f"project_id: project {project_id} not found"])
+
+    cursor.execute(MERGE_SQL)
+    report.inserted = cursor.rowcount
+    logger.info(f"Receiver import: {report.inserted} inserted, {report.failed} failed of {report.received}")
+    return report
@@ -0,0 +1,33 @@
+from decimal import Decimal
+from typing import Any, Callable, Dict, Sequence
+
+import orjson
+from fastapi.responses import JSONResponse
+
+
+def _default(obj: Any):
+    # orjson handles datetime/date/UUID natively; NUMERIC columns come back as Decimal
+    if isinstance(obj, Decimal):
+        return float(obj)
+    raise TypeError
+
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse rendered with orjson; datetimes are encoded as ISO 8601."""
+
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content, default=_default, option=orjson.OPT_NON_STR_KEYS)
+
+
+def row_mapper(*fields: str) -> Callable[[Sequence[Any]], Dict[str, Any]]:
+    """Compile a function mapping a DB row tuple to a dict keyed by ``fields``.
+
+    ``fields`` must follow the column order of the SELECT. The generated function
+    is a single dict literal, which avoids per-row zip/loop overhead on big lists.
+    """
+    body = ", ".join(f"{field!r}: row[{i}]" for i, field in enumerate(fields))
+    namespace: Dict[str, Any] = {}
+    exec(f"def to_dict(row):\n    return {{{body}}}\n", namespace)
+    to_dict = namespace["to_dict"]
+    to_dict.fields = fields
+    return to_dict
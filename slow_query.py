@@ -0,0 +1,146 @@
+import functools
+import logging
+import os
+import random
+import re
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+import psycopg2.extensions
+
+import db_utils
+
+logger = logging.getLogger(__name__)
+
+SLOW_QUERY_THRESHOLD_MS = float(os.getenv("SLOW_QUERY_THRESHOLD_MS", "200"))
+SLOW_QUERY_EXPLAIN_SAMPLE_RATE = float(os.getenv("SLOW_QUERY_EXPLAIN_SAMPLE_RATE", "0.1"))
+SLOW_QUERY_TOP_N = int(os.getenv("SLOW_QUERY_TOP_N", "50"))
+# Distinct normalized statements tracked before the cheapest ones are evicted
+SLOW_QUERY_MAX_STATEMENTS = int(os.getenv("SLOW_QUERY_MAX_STATEMENTS", "1000"))
+
+_LITERALS = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+_PLACEHOLDERS = re.compile(r"%\(\w+\)s|%s|\$\d+")
+_WHITESPACE = re.compile(r"\s+")
+_WRITE_KEYWORDS = re.compile(r"\b(INSERT|UPDATE|DELETE|MERGE|CREATE|ALTER|DROP|TRUNCATE|COPY|CALL|PREPARE)\b", re.IGNORECASE)
+
+
+@functools.lru_cache(maxsize=2048)
+def normalize(query: str) -> str:
+    """Statement shape with literals and placeholders replaced by '?', for grouping."""
+    query = _LITERALS.sub("?", query)
+    query = _PLACEHOLDERS.sub("?", query)
+    return _WHITESPACE.sub(" ", query).strip()
+
+
+def redact(params) -> str:
+    """Show parameter types only; values may be emails, wallet addresses or passwords."""
+    if params is None:
+        return "[]"
+    values = params.values() if isinstance(params, dict) else params
+    return "[" + ", ".join(f"<{type(value).__name__}>" for value in values) + "]"
+
+
+class SlowQueryLog:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stats: dict[str, dict] = {}
+        self.recent_plans: deque = deque(maxlen=20)
+        # One background connection at a time for EXPLAIN; drop samples when it is busy
+        self._explainer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="explain")
+        self._explain_pending = threading.BoundedSemaphore(4)
+
+    def observe(self, name, query, params, seconds, cursor, error):
+        if not isinstance(query, str):
+            return
+        if name in db_utils.PREPARED_STATEMENTS:
+            # EXECUTE/PREPARE text is not informative; group by the registered SQL instead
+            query = db_utils.PREPARED_STATEMENTS[name]
+        statement = normalize(query)
+        duration_ms = seconds * 1e3
+        slow = duration_ms >= SLOW_QUERY_THRESHOLD_MS
+
+        with self._lock:
+            stats = self._stats.get(statement)
+            if stats is None:
+                if len(self._stats) >= SLOW_QUERY_MAX_STATEMENTS:
+                    cheapest = min(self._stats, key=lambda key: self._stats[key]["total_ms"])
+                    del self._stats[cheapest]
+                stats = self._stats[statement] = {
+                    "statement": statement, "name": name, "calls": 0, "errors": 0, "slow_calls": 0,
+                    "total_ms": 0.0, "max_ms": 0.0, "last_error": None, "last_plan": None,
+                }
+            stats["calls"] += 1
+            stats["total_ms"] += duration_ms
+            stats["max_ms"] = max(stats["max_ms"], duration_ms)
+            if slow:
+                stats["slow_calls"] += 1
+            if error is not None:
+                stats["errors"] += 1
+                stats["last_error"] = f"{type(error).__name__}: {str(error).strip()}"
+
+        if error is not None:
+            logger.error(f"Query failed [{name}] {statement} params={redact(params)}: {type(error).__name__}: {str(error).strip()}")
+        elif slow:
+            logger.warning(f"Slow query [{name}] {duration_ms:.1f}ms {statement} params={redact(params)}")
+            if random.random() < SLOW_QUERY_EXPLAIN_SAMPLE_RATE:
+                self._schedule_explain(statement, query, params, duration_ms)
+
+    def _schedule_explain(self, statement, query, params, duration_ms):
+        # EXPLAIN ANALYZE executes the statement, so only read-only ones are sampled
+        if not statement.upper().startswith(("SELECT", "WITH")) or _WRITE_KEYWORDS.search(statement):
+            return
+        if not self._explain_pending.acquire(blocking=False):
+            return
+        if "$" in query:
+            # Registered statements use $n placeholders; bind them the way execute_prepared does
+            query, params = db_utils.to_pyformat(query, params or ())
+        self._explainer.submit(self._explain, statement, query, params, duration_ms)
+
+    def _explain(self, statement, query, params, duration_ms):
+        try:
+            conn = db_utils.get_db_connection()
+            # Plain cursor: the EXPLAIN must not go through QUERY_HOOKS and count in the stats it explains
+            cursor = conn.cursor(cursor_factory=psycopg2.extensions.cursor)
+            try:
+                cursor.execute("EXPLAIN (ANALYZE, BUFFERS) " + query, params)
+                plan = "\n".join(row[0] for row in cursor.fetchall())
+            finally:
+                conn.rollback()
+                cursor.close()
+                conn.close()
+            entry = {
+                "statement": statement,
+                "duration_ms": round(duration_ms, 2),
+                "captured_at": datetime.utcnow().isoformat(),
+                "plan": plan,
+            }
+            with self._lock:
+                self.recent_plans.append(entry)
+                if statement in self._stats:
+                    self._stats[statement]["last_plan"] = plan
+        except Exception as e:
+            logger.error(f"EXPLAIN failed for {statement}: {str(e)}")
+        finally:
+            self._explain_pending.release()
+
+    def top(self, n: int = SLOW_QUERY_TOP_N, order_by: str = "total_ms") -> list[dict]:
+        with self._lock:
+            entries = [dict(stats) for stats in self._stats.values()]
+        for entry in entries:
+            entry["mean_ms"] = entry["total_ms"] / entry["calls"] if entry["calls"] else 0.0
+        return sorted(entries, key=lambda entry: entry[order_by], reverse=True)[:n]
+
+    def reset(self):
+        with self._lock:
+            self._stats.clear()
+            self.recent_plans.clear()
+
+
+slow_query_log = SlowQueryLog()
+
+
+def install():
+    if slow_query_log.observe not in db_utils.QUERY_HOOKS:
+        db_utils.QUERY_HOOKS.append(slow_query_log.observe)
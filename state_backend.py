@@ -0,0 +1,223 @@
+"""Key/value state shared between worker processes.
+
+Used for what must agree across workers: JWT revocations, chat sessions and
+request-rate token buckets. Pick the backend with STATE_BACKEND:
+
+* ``memory``   - per-process dicts; correct only with a single worker (and for tests)
+* ``sqlite``   - a file at STATE_SQLITE_PATH; shared by all workers on one host
+* ``postgres`` - tables from migrations/009 on the app database; shared by every host
+
+Values are strings; callers serialize. Expired keys read as missing.
+"""
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, Optional
+
+from db_utils import get_db_connection
+
+STATE_BACKEND = os.getenv("STATE_BACKEND", "memory")
+STATE_SQLITE_PATH = os.getenv("STATE_SQLITE_PATH", "/tmp/app-state.sqlite3")
+
+
+class MemoryStateBackend:
+    shared = False
+
+    def __init__(self):
+        self._data: Dict[str, Dict[str, tuple]] = {}
+        self._buckets: Dict[str, tuple] = {}
+        self._lock = threading.Lock()
+
+    def get(self, namespace: str, key: str) -> Optional[str]:
+        with self._lock:
+            entry = self._data.get(namespace, {}).get(key)
+            if entry is None:
+                return None
+            value, expires = entry
+            if expires is not None and expires <= time.time():
+                del self._data[namespace][key]
+                return None
+            return value
+
+    def set(self, namespace: str, key: str, value: str, ttl: Optional[float] = None):
+        with self._lock:
+            self._data.setdefault(namespace, {})[key] = (value, time.time() + ttl if ttl is not None else None)
+
+    def delete(self, namespace: str, key: str):
+        with self._lock:
+            self._data.get(namespace, {}).pop(key, None)
+
+    def items(self, namespace: str) -> Dict[str, str]:
+        now = time.time()
+        with self._lock:
+            entries = self._data.get(namespace, {})
+            for key in [key for key, (_, expires) in entries.items() if expires is not None and expires <= now]:
+                del entries[key]
+            return {key: value for key, (value, _) in entries.items()}
+
+    def take_token(self, key: str, rate: float, burst: int) -> float:
+        """Token-bucket take: 0 when admitted, else seconds until a token is available."""
+        now = time.time()
+        with self._lock:
+            tokens, updated = self._buckets.get(key, (float(burst), now))
+            tokens = min(burst, tokens + (now - updated) * rate)
+            admitted = tokens >= 1
+            if admitted:
+                tokens -= 1
+            self._buckets[key] = (tokens, now)
+        return 0.0 if admitted else (1 - tokens) / rate
+
+
+class SQLiteStateBackend:
+    """One SQLite file per host. WAL mode lets readers proceed while a worker writes."""
+
+    shared = True
+
+    def __init__(self, path: str = STATE_SQLITE_PATH):
+        self.path = path
+        self._local = threading.local()
+        conn = self._conn()
+        conn.executescript('''
+            PRAGMA journal_mode = WAL;
+            CREATE TABLE IF NOT EXISTS app_state (
+                namespace TEXT NOT NULL,
+                key TEXT NOT NULL,
+                value TEXT NOT NULL,
+                expires_at REAL,
+                PRIMARY KEY (namespace, key)
+            );
+            CREATE TABLE IF NOT EXISTS app_rate_buckets (
+                key TEXT PRIMARY KEY,
+                tokens REAL NOT NULL,
+                updated_at REAL NOT NULL
+            );
+        ''')
+
+    def _conn(self) -> sqlite3.Connection:
+        # sqlite3 connections must not cross threads; handlers run in a threadpool
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute("PRAGMA busy_timeout = 5000")
+            self._local.conn = conn
+        return conn
+
+    def get(self, namespace: str, key: str) -> Optional[str]:
+        row = self._conn().execute(
+            "SELECT value FROM app_state WHERE namespace = ? AND key = ? AND (expires_at IS NULL OR expires_at > ?)",
+            (namespace, key, time.time()),
+        ).fetchone()
+        return row[0] if row else None
+
+    def set(self, namespace: str, key: str, value: str, ttl: Optional[float] = None):
+        self._conn().execute(
+            "INSERT OR REPLACE INTO app_state (namespace, key, value, expires_at) VALUES (?, ?, ?, ?)",
+            (namespace, key, value, time.time() + ttl if ttl is not None else None),
+        )
+
+    def delete(self, namespace: str, key: str):
+        self._conn().execute("DELETE FROM app_state WHERE namespace = ? AND key = ?", (namespace, key))
+
+    def items(self, namespace: str) -> Dict[str, str]:
+        conn = self._conn()
+        now = time.time()
+        conn.execute("DELETE FROM app_state WHERE namespace = ? AND expires_at <= ?", (namespace, now))
+        return dict(conn.execute("SELECT key, value FROM app_state WHERE namespace = ?", (namespace,)).fetchall())
+
+    def take_token(self, key: str, rate: float, burst: int) -> float:
+        conn = self._conn()
+        now = time.time()
+        # BEGIN IMMEDIATE takes the write lock up front, so read-modify-write is atomic across processes
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute("SELECT tokens, updated_at FROM app_rate_buckets WHERE key = ?", (key,)).fetchone()
+            tokens = float(burst) if row is None else min(burst, row[0] + (now - row[1]) * rate)
+            admitted = tokens >= 1
+            if admitted:
+                tokens -= 1
+            conn.execute("INSERT OR REPLACE INTO app_rate_buckets (key, tokens, updated_at) VALUES (?, ?, ?)", (key, tokens, now))
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return 0.0 if admitted else (1 - tokens) / rate
+
+
+class PostgresStateBackend:
+    """State in the app database (migrations/009), for deployments spanning several hosts."""
+
+    shared = True
+
+    def _run(self, query: str, params=(), fetch: str = None):
+        conn = get_db_connection()
+        cursor = conn.cursor()
+        try:
+            cursor.execute(query, params)
+            result = cursor.fetchone() if fetch == "one" else cursor.fetchall() if fetch == "all" else None
+            conn.commit()
+            return result
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            cursor.close()
+            conn.close()
+
+    def get(self, namespace: str, key: str) -> Optional[str]:
+        row = self._run(
+            "SELECT value FROM app_state WHERE namespace = %s AND key = %s AND (expires_at IS NULL OR expires_at > NOW());",
+            (namespace, key), fetch="one",
+        )
+        return row[0] if row else None
+
+    def set(self, namespace: str, key: str, value: str, ttl: Optional[float] = None):
+        self._run('''
+            INSERT INTO app_state (namespace, key, value, expires_at)
+            VALUES (%s, %s, %s, CASE WHEN %s::float8 IS NULL THEN NULL ELSE NOW() + make_interval(secs => %s::float8) END)
+            ON CONFLICT (namespace, key) DO UPDATE SET value = EXCLUDED.value, expires_at = EXCLUDED.expires_at;
+        ''', (namespace, key, value, ttl, ttl))
+
+    def delete(self, namespace: str, key: str):
+        self._run("DELETE FROM app_state WHERE namespace = %s AND key = %s;", (namespace, key))
+
+    def items(self, namespace: str) -> Dict[str, str]:
+        rows = self._run('''
+            DELETE FROM app_state WHERE namespace = %(namespace)s AND expires_at <= NOW();
+            SELECT key, value FROM app_state WHERE namespace = %(namespace)s;
+        ''', {"namespace": namespace}, fetch="all")
+        return dict(rows)
+
+    def take_token(self, key: str, rate: float, burst: int) -> float:
+        # Refill and take in one upsert; the row lock serializes concurrent takers
+        refilled = "LEAST(%(burst)s, b.tokens + EXTRACT(EPOCH FROM clock_timestamp() - b.updated_at) * %(rate)s)"
+        admitted, tokens = self._run(f'''
+            INSERT INTO app_rate_buckets AS b (key, tokens, admitted, updated_at)
+            VALUES (%(key)s, %(burst)s - 1, TRUE, clock_timestamp())
+            ON CONFLICT (key) DO UPDATE SET
+                tokens = CASE WHEN {refilled} >= 1 THEN {refilled} - 1 ELSE {refilled} END,
+                admitted = {refilled} >= 1,
+                updated_at = clock_timestamp()
+            RETURNING admitted, tokens;
+        ''', {"key": key, "burst": burst, "rate": rate}, fetch="one")
+        return 0.0 if admitted else (1 - tokens) / rate
+
+
+_backend = None
+_backend_lock = threading.Lock()
+
+
+def get_state_backend():
+    global _backend
+    if _backend is None:
+        with _backend_lock:
+            if _backend is None:
+                if STATE_BACKEND == "sqlite":
+                    _backend = SQLiteStateBackend(STATE_SQLITE_PATH)
+                elif STATE_BACKEND == "postgres":
+                    _backend = PostgresStateBackend()
+                elif STATE_BACKEND == "memory":
+                    _backend = MemoryStateBackend()
+                else:
+                    raise ValueError(f"Unknown STATE_BACKEND: {STATE_BACKEND}")
+    return _backend
@@ -1,9 +1,11 @@
+import os
 
 from fastapi import APIRouter, HTTPException
 from algosdk.v2client import algod
+from metrics import observe_external
 
-algod_address = "https://testnet-api.4160.nodely.dev"
-algod_token = ""
+algod_address = os.getenv("ALGOD_ADDRESS", "https://testnet-api.4160.nodely.dev")
+algod_token = os.getenv("ALGOD_TOKEN", "")
 
 algod_client = algod.AlgodClient(algod_token, algod_address)
 
@@ -13,7 +15,8 @@ router = APIRouter()
 async def get_algorand_status():
     """Get the status of the Algorand node."""
     try:
-        status = algod_client.status()
+        with observe_external("algod", "status"):
+            status = algod_client.status()
         return {
             "status": "success",
             "data": status
@@ -0,0 +1,49 @@
+import os
+import sys
+import uuid
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+
+@pytest.fixture
+def app_schema():
+    """connect() for a throwaway schema holding the load-test base tables plus every migration.
+
+    Skipped unless DB_HOST (and DB_NAME, DB_USER, DB_PASSWORD, DB_PORT) point at a Postgres.
+    """
+    if not os.getenv("DB_HOST"):
+        pytest.skip("needs a Postgres database (DB_HOST, DB_NAME, DB_USER, DB_PASSWORD, DB_PORT)")
+    import psycopg2
+
+    from db_utils import PooledConnection, _connection_params
+    from migrate import migrate
+
+    schema = f"test_{uuid.uuid4().hex[:12]}"
+    admin = psycopg2.connect(**_connection_params())
+    admin.autocommit = True
+    admin.cursor().execute(f"CREATE SCHEMA {schema}")
+    connections = []
+
+    def connect():
+        conn = psycopg2.connect(
+            **_connection_params(), options=f"-c search_path={schema},public", connection_factory=PooledConnection,
+        )
+        connections.append(conn)
+        return conn
+
+    conn = connect()
+    with open(os.path.join(ROOT, "loadtest", "schema.sql")) as f:
+        conn.cursor().execute(f.read())
+    conn.commit()
+    migrate(conn)
+    try:
+        yield connect
+    finally:
+        # PooledConnection.close() only hands back to a pool; these have none
+        for c in connections:
+            c.discard()
+        admin.cursor().execute(f"DROP SCHEMA {schema} CASCADE")
+        admin.close()
@@ -0,0 +1,79 @@
+"""PUT /projects/{id}/addFund against a real Postgres (skipped unless DB_HOST is set):
+the top-up is recorded as a txid-less contribution and lands in the chart rollups.
+
+    python -m pytest tests/test_add_fund.py
+"""
+import os
+
+import pytest
+
+
+@pytest.fixture
+def pg(app_schema, monkeypatch):
+    # main reads its admin token at import
+    monkeypatch.setenv("API_TOKEN", os.getenv("API_TOKEN", "test-token"))
+    main = pytest.importorskip("main")
+    monkeypatch.setattr(main, "get_db_connection", app_schema)
+    return main, app_schema()
+
+
+def _project(conn, goal=100):
+    cursor = conn.cursor()
+    cursor.execute('''
+        INSERT INTO algo_projects (name, current_fund, fund_raise_total, fund_raise_count)
+        VALUES ('Well', 0, %s, 0) RETURNING id;
+    ''', (goal,))
+    project_id = cursor.fetchone()[0]
+    conn.commit()
+    return project_id
+
+
+def test_add_fund_records_txidless_contributions(pg):
+    main, conn = pg
+    project_id = _project(conn)
+
+    # Two top-ups: both have a NULL txid, which the (project_id, txid) unique index allows
+    for amount in (10, 15):
+        main.update_project_funding(project_id, main.UpdateProjectFundingRequest(current_fund=amount, name="Donor"))
+
+    cursor = conn.cursor()
+    cursor.execute('''
+        SELECT txid, amount, time_round FROM algo_contributions WHERE project_id = %s ORDER BY id;
+    ''', (project_id,))
+    rows = cursor.fetchall()
+    assert [(txid, amount) for txid, amount, _ in rows] == [(None, 10), (None, 15)]
+    assert all(time_round is not None for _, _, time_round in rows)
+
+    cursor.execute("SELECT current_fund, fund_raise_count FROM algo_projects WHERE id = %s;", (project_id,))
+    assert cursor.fetchone() == (25, 2)
+    conn.rollback()
+
+
+def test_add_fund_lands_in_the_rollup_bucket_of_its_time_round(pg):
+    main, conn = pg
+    project_id = _project(conn)
+    main.update_project_funding(project_id, main.UpdateProjectFundingRequest(current_fund=10))
+
+    cursor = conn.cursor()
+    cursor.execute('''
+        SELECT r.granularity, r.amount, r.contribution_count, r.bucket = date_trunc(r.granularity, c.time_round)
+        FROM algo_contribution_rollups r
+        JOIN algo_contributions c ON c.project_id = r.project_id
+        WHERE r.project_id = %s
+        ORDER BY r.granularity;
+    ''', (project_id,))
+    assert cursor.fetchall() == [("day", 10, 1, True), ("hour", 10, 1, True), ("week", 10, 1, True)]
+    conn.rollback()
+
+
+def test_add_fund_over_the_goal_writes_nothing(pg):
+    main, conn = pg
+    project_id = _project(conn, goal=5)
+    with pytest.raises(main.HTTPException) as excinfo:
+        main.update_project_funding(project_id, main.UpdateProjectFundingRequest(current_fund=10))
+    assert excinfo.value.status_code == 400
+
+    cursor = conn.cursor()
+    cursor.execute("SELECT COUNT(*) FROM algo_contributions WHERE project_id = %s;", (project_id,))
+    assert cursor.fetchone()[0] == 0
+    conn.rollback()
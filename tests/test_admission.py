@@ -0,0 +1,187 @@
+"""Admission control: token buckets, the priority limiter, route matching and the
+ASGI middleware's rejections.
+
+    python -m pytest tests/test_admission.py
+"""
+import asyncio
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import admission  # noqa: E402
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(admission.time, "monotonic", clock)
+    return clock
+
+
+def test_token_bucket_allows_a_burst_then_waits_for_refill(clock):
+    bucket = admission.TokenBucket(rate=2, burst=3)
+    assert [bucket.take() for _ in range(3)] == [0.0, 0.0, 0.0]
+    assert bucket.take() == pytest.approx(0.5)
+
+    clock.now += 0.5
+    assert bucket.take() == 0.0
+
+
+def test_token_bucket_refill_is_capped_at_burst(clock):
+    bucket = admission.TokenBucket(rate=10, burst=2)
+    bucket.take()
+    clock.now += 60
+    assert [bucket.take() for _ in range(3)] == [0.0, 0.0, pytest.approx(0.1)]
+
+
+def _limiter(limit=4, max_queue=8, timeout=1.0):
+    return admission.PriorityLimiter(limit, max_queue, timeout)
+
+
+def test_limiter_sheds_lower_classes_first():
+    async def run():
+        limiter = _limiter(limit=4)
+        # bulk_read may hold half the slots, read three quarters, critical all of them
+        assert [await limiter.acquire("bulk_read") for _ in range(2)] == [True, True]
+        assert await limiter.acquire("read")
+        assert await limiter.acquire("critical")
+        assert limiter.inflight == 4
+
+    asyncio.run(run())
+
+
+def test_limiter_wakes_higher_priority_waiters_first():
+    async def run():
+        limiter = _limiter(limit=2)
+        assert await limiter.acquire("critical")
+        assert await limiter.acquire("critical")
+
+        order = []
+
+        async def wait(priority):
+            assert await limiter.acquire(priority)
+            order.append(priority)
+
+        tasks = [asyncio.create_task(wait(priority)) for priority in ("read", "write", "critical")]
+        await asyncio.sleep(0)
+        assert limiter.queue_depth == 3
+        for _ in range(3):
+            limiter.release()
+            await asyncio.sleep(0)
+        await asyncio.gather(*tasks)
+        assert order == ["critical", "write", "read"]
+        assert limiter.queue_depth == 0
+
+    asyncio.run(run())
+
+
+def test_limiter_rejects_when_the_queue_is_full():
+    async def run():
+        limiter = _limiter(limit=1, max_queue=1)
+        assert await limiter.acquire("critical")
+        waiter = asyncio.create_task(limiter.acquire("critical"))
+        await asyncio.sleep(0)
+        assert await limiter.acquire("critical") is False
+        limiter.release()
+        assert await waiter
+
+    asyncio.run(run())
+
+
+def test_limiter_times_out_queued_requests():
+    async def run():
+        limiter = _limiter(limit=1, timeout=0.01)
+        assert await limiter.acquire("critical")
+        assert await limiter.acquire("critical") is False
+        assert limiter.queue_depth == 0
+        assert limiter.inflight == 1
+
+    asyncio.run(run())
+
+
+def test_cancelled_waiter_gives_back_its_queue_slot():
+    async def run():
+        limiter = _limiter(limit=1)
+        assert await limiter.acquire("critical")
+        waiter = asyncio.create_task(limiter.acquire("read"))
+        await asyncio.sleep(0)
+        waiter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+        assert limiter.queue_depth == 0
+        limiter.release()
+        assert limiter.inflight == 0
+
+    asyncio.run(run())
+
+
+@pytest.mark.parametrize("method, path, rule", [
+    ("GET", "/", "health"),
+    ("GET", "/health-check", "health"),
+    ("GET", "/projects/1/health-check", "default_read"),
+    ("GET", "/projects", "project_list"),
+    ("GET", "/projects/7/contributions", "contribution_list"),
+    ("POST", "/projects/7/contributions", "contribution_insert"),
+    ("PUT", "/projects/7/addFund", "project_add_fund"),
+    ("GET", "/admin/exports/payouts", "export"),
+    ("GET", "/projects/7", "default_read"),
+    ("DELETE", "/projects/7", "default_write"),
+])
+def test_match(method, path, rule):
+    controller = admission.AdmissionController(admission.DEFAULT_RULES)
+    assert controller.match(method, path).name == rule
+
+
+def _call(middleware, method, path):
+    sent = []
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        sent.append(message)
+
+    asyncio.run(middleware({"type": "http", "method": method, "path": path, "headers": []}, receive, send))
+    return sent
+
+
+async def _ok(scope, receive, send):
+    await send({"type": "http.response.start", "status": 200, "headers": []})
+    await send({"type": "http.response.body", "body": b"ok"})
+
+
+def test_middleware_rate_limits_with_retry_after(clock):
+    rules = [admission.RouteRule("auth", "POST", r"/signin$", "critical", rate=1, burst=1)]
+    controller = admission.AdmissionController(rules)
+    middleware = admission.AdmissionMiddleware(_ok, controller)
+
+    assert _call(middleware, "POST", "/signin")[0]["status"] == 200
+    start = _call(middleware, "POST", "/signin")[0]
+    assert start["status"] == 429
+    assert (b"retry-after", b"1") in start["headers"]
+    assert controller.snapshot()["rejected"] == [{"route": "auth", "status": 429, "count": 1}]
+    assert controller.snapshot()["inflight"] == 0
+
+
+def test_middleware_releases_slots_when_the_app_raises():
+    async def boom(scope, receive, send):
+        raise RuntimeError("handler failed")
+
+    controller = admission.AdmissionController(admission.DEFAULT_RULES)
+    middleware = admission.AdmissionMiddleware(boom, controller)
+    with pytest.raises(RuntimeError):
+        _call(middleware, "GET", "/projects")
+    snapshot = controller.snapshot()
+    assert snapshot["inflight"] == 0
+    assert snapshot["routes"]["project_list"]["inflight"] == 0
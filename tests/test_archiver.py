@@ -0,0 +1,104 @@
+"""Archiving soft-deleted projects and restoring them, against a real Postgres
+(skipped unless DB_HOST is set).
+
+    python -m pytest tests/test_archiver.py
+"""
+import pytest
+
+import archiver
+
+
+@pytest.fixture
+def pg(app_schema, monkeypatch):
+    monkeypatch.setattr(archiver, "get_db_connection", app_schema)
+    return app_schema()
+
+
+def _project(conn, deleted_days_ago=None):
+    cursor = conn.cursor()
+    cursor.execute('''
+        INSERT INTO algo_projects (name, current_fund, fund_raise_total, fund_raise_count, deleted_at)
+        VALUES ('Well', 10, 10, 1, NOW() - make_interval(days => %s)) RETURNING id;
+    ''', (deleted_days_ago,))
+    project_id = cursor.fetchone()[0]
+    cursor.execute('''
+        INSERT INTO algo_receivers (project_id, name, receiver_wallet_address) VALUES (%s, 'R', 'ADDR') RETURNING id;
+    ''', (project_id,))
+    receiver_id = cursor.fetchone()[0]
+    cursor.execute('''
+        INSERT INTO algo_contributions (project_id, txid, amount, time_round) VALUES (%s, %s, 10, NOW());
+    ''', (project_id, f"tx-{project_id}"))
+    cursor.execute('''
+        INSERT INTO algo_receivers_transaction (receiver_id, project_id, transaction_count, amount, time_round)
+        VALUES (%s, %s, 1, 10, NOW());
+    ''', (receiver_id, project_id))
+    conn.commit()
+    return project_id
+
+
+def _counts(conn, project_id):
+    cursor = conn.cursor()
+    counts = {}
+    for live, archive, key in archiver.ARCHIVED_TABLES:
+        for table in (live, archive):
+            cursor.execute(f"SELECT COUNT(*) FROM {table} WHERE {key} = %s;", (project_id,))
+            counts[table] = cursor.fetchone()[0]
+    conn.rollback()
+    return counts
+
+
+def test_archives_only_projects_deleted_long_enough_ago(pg):
+    old = _project(pg, deleted_days_ago=40)
+    recent = _project(pg, deleted_days_ago=1)
+    live = _project(pg)
+
+    assert archiver.archive_deleted_projects(older_than_days=30, batch_size=10) == 1
+    for live_table, archive_table, _ in archiver.ARCHIVED_TABLES:
+        assert _counts(pg, old)[live_table] == 0
+        assert _counts(pg, old)[archive_table] == 1
+        for kept in (recent, live):
+            assert _counts(pg, kept)[live_table] == 1
+
+
+def test_archives_in_batches(pg):
+    projects = [_project(pg, deleted_days_ago=40) for _ in range(5)]
+    assert archiver.archive_deleted_projects(older_than_days=30, batch_size=2) == 5
+    assert all(_counts(pg, project_id)["algo_projects_archive"] == 1 for project_id in projects)
+
+
+def test_restore_moves_everything_back(pg):
+    project_id = _project(pg, deleted_days_ago=40)
+    before = _counts(pg, project_id)
+    archiver.archive_deleted_projects(older_than_days=30)
+
+    assert archiver.restore_project(project_id) is True
+    assert _counts(pg, project_id) == before
+    cursor = pg.cursor()
+    cursor.execute("SELECT deleted_at FROM algo_projects WHERE id = %s;", (project_id,))
+    assert cursor.fetchone() == (None,)
+    pg.rollback()
+    assert archiver.restore_project(project_id) is False
+
+
+def test_restore_can_keep_the_project_deleted(pg):
+    project_id = _project(pg, deleted_days_ago=40)
+    archiver.archive_deleted_projects(older_than_days=30)
+    assert archiver.restore_project(project_id, undelete=False) is True
+    cursor = pg.cursor()
+    cursor.execute("SELECT deleted_at IS NOT NULL FROM algo_projects WHERE id = %s;", (project_id,))
+    assert cursor.fetchone() == (True,)
+    pg.rollback()
+
+
+def test_a_second_archiver_backs_off_while_a_batch_runs(pg, app_schema):
+    project_id = _project(pg, deleted_days_ago=40)
+    holder = app_schema()
+    cursor = holder.cursor()
+    cursor.execute("SELECT pg_advisory_xact_lock(%s);", (archiver.ARCHIVE_LOCK_KEY,))
+    try:
+        assert archiver.archive_deleted_projects(older_than_days=30) == 0
+    finally:
+        holder.rollback()
+    # The lock went with the transaction; nothing is left behind on the connection
+    assert archiver.archive_deleted_projects(older_than_days=30) == 1
+    assert _counts(pg, project_id)["algo_projects_archive"] == 1
@@ -0,0 +1,126 @@
+"""Response compression: negotiation, Vary on every compressible response, weak
+ETags on compressed bodies and the compressed-body cache.
+
+    python -m pytest tests/test_compression.py
+"""
+import asyncio
+import gzip
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+pytest.importorskip("anyio")
+
+import compression  # noqa: E402
+
+LARGE = b'{"body": [' + b", ".join(b'{"id": %d}' % i for i in range(200)) + b"]}"
+
+
+def _app(body, content_type=b"application/json", extra_headers=(), status=200):
+    async def app(scope, receive, send):
+        await send({
+            "type": "http.response.start",
+            "status": status,
+            "headers": [(b"content-type", content_type), (b"content-length", str(len(body)).encode()), *extra_headers],
+        })
+        await send({"type": "http.response.body", "body": body})
+    return app
+
+
+def _call(app, accept_encoding=None, cache=None):
+    middleware = compression.CompressionMiddleware(app, min_size=100, cache=cache or compression.CompressedBodyCache())
+    headers = [(b"accept-encoding", accept_encoding.encode())] if accept_encoding is not None else []
+    sent = []
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        sent.append(message)
+
+    asyncio.run(middleware({"type": "http", "method": "GET", "path": "/", "headers": headers}, receive, send))
+    start, body = sent[0], b"".join(message.get("body", b"") for message in sent[1:])
+    return start["status"], {name: value for name, value in start["headers"]}, body
+
+
+@pytest.mark.parametrize("header, expected", [
+    ("gzip", "gzip"),
+    ("gzip;q=0", None),
+    ("identity", None),
+    ("*", "br" if compression.brotli is not None else "gzip"),
+    ("br, gzip", "br" if compression.brotli is not None else "gzip"),
+    ("br;q=0, gzip", "gzip"),
+    ("gzip;q=bogus", None),
+])
+def test_negotiate(header, expected):
+    assert compression.negotiate(header) == expected
+
+
+def test_large_json_is_compressed_with_vary_and_a_weak_etag():
+    status, headers, body = _call(_app(LARGE, extra_headers=[(b"etag", b'"v1"')]), "gzip")
+    assert status == 200
+    assert headers[b"content-encoding"] == b"gzip"
+    assert headers[b"vary"] == b"Accept-Encoding"
+    assert headers[b"etag"] == b'W/"v1"'
+    assert int(headers[b"content-length"]) == len(body)
+    assert gzip.decompress(body) == LARGE
+
+
+@pytest.mark.parametrize("accept_encoding, body, status", [
+    ("gzip", b'{"ok": true}', 200),  # below the size threshold
+    ("gzip", b"", 304),
+    (None, LARGE, 200),  # client accepts no encoding
+    ("identity", LARGE, 200),
+])
+def test_uncompressed_json_still_varies_on_accept_encoding(accept_encoding, body, status):
+    _, headers, sent_body = _call(_app(body, status=status), accept_encoding)
+    assert b"content-encoding" not in headers
+    assert headers[b"vary"] == b"Accept-Encoding"
+    assert sent_body == body
+
+
+def test_vary_is_merged_into_an_existing_header():
+    _, headers, _ = _call(_app(b"{}", extra_headers=[(b"vary", b"Origin")]), "gzip")
+    assert headers[b"vary"] == b"Origin, Accept-Encoding"
+    _, headers, _ = _call(_app(b"{}", extra_headers=[(b"vary", b"*")]), "gzip")
+    assert headers[b"vary"] == b"*"
+
+
+@pytest.mark.parametrize("content_type, extra_headers", [
+    (b"image/png", ()),
+    (b"text/event-stream", ()),
+    (b"application/json", [(b"cache-control", b"no-transform")]),
+])
+def test_incompressible_responses_pass_through_untouched(content_type, extra_headers):
+    _, headers, body = _call(_app(LARGE, content_type, extra_headers), "gzip")
+    assert b"content-encoding" not in headers
+    assert b"vary" not in headers
+    assert body == LARGE
+
+
+def test_compressed_bodies_are_cached_by_strong_etag(monkeypatch):
+    cache = compression.CompressedBodyCache()
+    calls = []
+    real_compress = compression._compress
+    monkeypatch.setattr(compression, "_compress", lambda body, encoding: calls.append(encoding) or real_compress(body, encoding))
+
+    first = _call(_app(LARGE, extra_headers=[(b"etag", b'"v1"')]), "gzip", cache)
+    second = _call(_app(LARGE, extra_headers=[(b"etag", b'"v1"')]), "gzip", cache)
+    assert first == second
+    assert calls == ["gzip"]
+
+
+def test_cache_evicts_least_recently_used_within_its_byte_budget():
+    cache = compression.CompressedBodyCache(max_bytes=10)
+    cache.put("a", b"12345")
+    cache.put("b", b"12345")
+    assert cache.get("a") == b"12345"
+    cache.put("c", b"12345")
+    assert cache.get("b") is None
+    assert cache.get("a") == b"12345" and cache.get("c") == b"12345"
+    assert cache.size == 10
+    cache.put("huge", b"x" * 11)
+    assert cache.get("huge") is None
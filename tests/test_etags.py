@@ -0,0 +1,67 @@
+"""ETag construction and If-None-Match handling for the conditional GET endpoints.
+
+    python -m pytest tests/test_etags.py
+"""
+import os
+import sys
+from datetime import datetime
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+pytest.importorskip("fastapi")
+
+from fastapi import Request  # noqa: E402
+
+import etags  # noqa: E402
+
+
+def _request(if_none_match=None):
+    headers = [(b"if-none-match", if_none_match.encode())] if if_none_match is not None else []
+    return Request({"type": "http", "method": "GET", "path": "/projects/1", "headers": headers})
+
+
+def test_make_etag_is_a_stable_strong_tag():
+    updated = datetime(2024, 5, 1, 12, 0, 0)
+    tag = etags.make_etag(1, updated, 250.0, 3)
+    assert tag == etags.make_etag(1, updated, 250.0, 3)
+    assert tag.startswith('"') and tag.endswith('"') and not tag.startswith("W/")
+
+
+def test_make_etag_changes_with_any_component():
+    updated = datetime(2024, 5, 1, 12, 0, 0)
+    base = etags.make_etag(1, updated, 250.0, 3)
+    assert base != etags.make_etag(2, updated, 250.0, 3)
+    assert base != etags.make_etag(1, datetime(2024, 5, 1, 12, 0, 1), 250.0, 3)
+    assert base != etags.make_etag(1, updated, 251.0, 3)
+    assert base != etags.make_etag(1, updated, 250.0, 4)
+
+
+@pytest.mark.parametrize("header, matches", [
+    (None, False),
+    ("", False),
+    ('"abc"', True),
+    ('W/"abc"', True),
+    ('"other", W/"abc"', True),
+    ('"other"', False),
+    ("*", True),
+])
+def test_if_none_match(header, matches):
+    assert etags.if_none_match(_request(header), '"abc"') is matches
+
+
+def test_not_modified_carries_the_validator():
+    response = etags.not_modified('"abc"')
+    assert response.status_code == 304
+    assert response.body == b""
+    assert response.headers["etag"] == '"abc"'
+    assert response.headers["cache-control"] == etags.CACHE_CONTROL
+
+
+def test_set_etag():
+    from fastapi.responses import Response
+
+    response = etags.set_etag(Response(content=b"{}"), '"abc"')
+    assert response.headers["etag"] == '"abc"'
+    assert response.headers["cache-control"] == "no-cache"
@@ -0,0 +1,249 @@
+"""Job queue behaviour: outcome bookkeeping against a fake connection, and claim,
+retry and lease handling against a real Postgres (skipped unless DB_HOST is set).
+
+    python -m pytest tests/test_jobs.py
+"""
+import os
+import sys
+import uuid
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import jobs  # noqa: E402
+
+MIGRATION = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "migrations", "010_jobs.sql")
+
+
+class FakeCursor:
+    def __init__(self, conn):
+        self.conn = conn
+        self.rowcount = 1
+        self._rows = []
+
+    def execute(self, query, params=None):
+        self.conn.statements.append((" ".join(query.split()), params))
+        self._rows = self.conn.results.pop(0) if self.conn.results else []
+        self.rowcount = self.conn.rowcount
+
+    def fetchone(self):
+        return self._rows[0] if self._rows else None
+
+    def fetchall(self):
+        return self._rows
+
+    def close(self):
+        pass
+
+
+class FakeConnection:
+    def __init__(self, log, results=None, rowcount=1):
+        self.statements = log
+        self.results = results if results is not None else []
+        self.rowcount = rowcount
+        self.commits = 0
+        self.rollbacks = 0
+
+    def cursor(self):
+        return FakeCursor(self)
+
+    def commit(self):
+        self.commits += 1
+
+    def rollback(self):
+        self.rollbacks += 1
+
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def fake_db(monkeypatch):
+    statements = []
+    connections = []
+
+    def connect(results=None, rowcount=1):
+        conn = FakeConnection(statements, results, rowcount)
+        connections.append(conn)
+        return conn
+
+    queue = []
+    monkeypatch.setattr(jobs, "get_db_connection", lambda: queue.pop(0) if queue else connect())
+    return statements, connections, queue, connect
+
+
+def make_job(kind):
+    return jobs.Job(1, kind, {"n": 1}, attempt=1, worker="w1")
+
+
+def test_success_commits_handler_writes_with_result(fake_db):
+    statements, connections, queue, connect = fake_db
+    kind = f"test_{uuid.uuid4().hex}"
+    jobs.job_handler(kind)(lambda job, cursor: cursor.execute("INSERT INTO t VALUES (1)") or {"ok": True})
+    jobs.run_job(make_job(kind))
+
+    assert statements[0][0] == "INSERT INTO t VALUES (1)"
+    assert "status = 'succeeded'" in statements[1][0]
+    assert statements[1][1][1:] == (1, "w1")
+    assert connections[0].commits == 1 and connections[0].rollbacks == 0
+
+
+def test_failure_rolls_back_and_records_retry(fake_db):
+    statements, connections, queue, connect = fake_db
+    kind = f"test_{uuid.uuid4().hex}"
+
+    def handler(job, cursor):
+        cursor.execute("INSERT INTO t VALUES (1)")
+        raise RuntimeError("algod unavailable")
+
+    jobs.job_handler(kind)(handler)
+    queue.extend([connect(), connect(results=[[], [("queued",)]])])
+    jobs.run_job(make_job(kind))
+
+    work, bookkeeping = connections
+    assert work.rollbacks == 1 and work.commits == 0
+    query, params = statements[-1]
+    assert query.startswith("UPDATE app_jobs SET status = CASE")
+    assert params["permanent"] is False and params["error"] == "algod unavailable"
+    assert 0 <= params["delay"] <= jobs.JOB_RETRY_BASE_SECONDS
+
+
+def test_permanent_error_is_not_retried(fake_db):
+    statements, connections, queue, connect = fake_db
+    kind = f"test_{uuid.uuid4().hex}"
+
+    def handler(job, cursor):
+        raise jobs.PermanentJobError("project not found")
+
+    jobs.job_handler(kind)(handler)
+    jobs.run_job(make_job(kind))
+    assert statements[-1][1]["permanent"] is True
+
+
+def test_lost_lease_discards_the_run(fake_db):
+    statements, connections, queue, connect = fake_db
+    kind = f"test_{uuid.uuid4().hex}"
+    jobs.job_handler(kind)(lambda job, cursor: {"ok": True})
+    # The succeeded UPDATE matches no row: another worker owns the job now
+    queue.append(connect(rowcount=0))
+    jobs.run_job(make_job(kind))
+    assert connections[0].commits == 0 and connections[0].rollbacks == 1
+
+
+def test_unknown_kind_fails_permanently(fake_db):
+    statements, connections, queue, connect = fake_db
+    jobs.run_job(make_job(f"missing_{uuid.uuid4().hex}"))
+    assert statements[-1][1]["permanent"] is True
+
+
+def test_retry_delay_is_capped(monkeypatch):
+    monkeypatch.setattr(jobs.random, "uniform", lambda low, high: high)
+    assert jobs.retry_delay(1) == jobs.JOB_RETRY_BASE_SECONDS
+    assert jobs.retry_delay(2) == 2 * jobs.JOB_RETRY_BASE_SECONDS
+    assert jobs.retry_delay(50) == jobs.JOB_RETRY_MAX_SECONDS
+
+
+# --- Postgres ---------------------------------------------------------------
+
+@pytest.fixture
+def pg(monkeypatch):
+    if not os.getenv("DB_HOST"):
+        pytest.skip("needs a Postgres database (DB_HOST, DB_NAME, DB_USER, DB_PASSWORD, DB_PORT)")
+    import psycopg2
+
+    from db_utils import _connection_params
+
+    schema = f"test_jobs_{uuid.uuid4().hex[:12]}"
+    admin = psycopg2.connect(**_connection_params())
+    admin.autocommit = True
+    admin.cursor().execute(f"CREATE SCHEMA {schema}")
+
+    def connect():
+        return psycopg2.connect(**_connection_params(), options=f"-c search_path={schema}")
+
+    conn = connect()
+    with open(MIGRATION) as f:
+        conn.cursor().execute(f.read())
+    conn.commit()
+    monkeypatch.setattr(jobs, "get_db_connection", connect)
+    try:
+        yield conn
+    finally:
+        conn.close()
+        admin.cursor().execute(f"DROP SCHEMA {schema} CASCADE")
+        admin.close()
+
+
+def _enqueue(conn, kind, dedupe_key=None, max_attempts=3):
+    cursor = conn.cursor()
+    job_id, created = jobs.enqueue(cursor, kind, {"n": 1}, dedupe_key=dedupe_key, max_attempts=max_attempts)
+    conn.commit()
+    return job_id, created
+
+
+def _job(conn, job_id):
+    cursor = conn.cursor()
+    job = jobs.fetch_job(cursor, job_id)
+    conn.commit()
+    return job
+
+
+def test_enqueue_dedupes_unfinished_jobs(pg):
+    first, created = _enqueue(pg, "dedupe", dedupe_key="p1")
+    second, created_again = _enqueue(pg, "dedupe", dedupe_key="p1")
+    assert created and not created_again and first == second
+
+
+def test_claims_skip_jobs_locked_by_other_workers(pg):
+    ids = {_enqueue(pg, "claim")[0] for _ in range(2)}
+    claimed = {jobs._claim("w1").id, jobs._claim("w2").id}
+    assert claimed == ids
+    assert jobs._claim("w3") is None
+
+
+def test_failed_attempt_is_requeued_with_backoff_then_failed(pg):
+    kind = f"flaky_{uuid.uuid4().hex}"
+    jobs.job_handler(kind)(lambda job, cursor: 1 / 0)
+    job_id, _ = _enqueue(pg, kind, max_attempts=2)
+
+    jobs.run_job(jobs._claim("w1"))
+    job = _job(pg, job_id)
+    assert job["status"] == "queued" and job["attempts"] == 1 and "division by zero" in job["last_error"]
+
+    cursor = pg.cursor()
+    cursor.execute("UPDATE app_jobs SET run_after = NOW() WHERE id = %s", (job_id,))
+    pg.commit()
+    jobs.run_job(jobs._claim("w1"))
+    job = _job(pg, job_id)
+    assert job["status"] == "failed" and job["attempts"] == 2 and job["finished_at"] is not None
+
+
+def test_expired_lease_is_reclaimed_until_attempts_run_out(pg):
+    job_id, _ = _enqueue(pg, "hangs", max_attempts=2)
+    cursor = pg.cursor()
+
+    assert jobs._claim("w1").id == job_id
+    # Still leased: nobody else may take it
+    assert jobs._claim("w2") is None
+
+    cursor.execute("UPDATE app_jobs SET locked_until = NOW() - INTERVAL '1 second' WHERE id = %s", (job_id,))
+    pg.commit()
+    reclaimed = jobs._claim("w2")
+    assert reclaimed.id == job_id and reclaimed.attempt == 2
+
+    cursor.execute("UPDATE app_jobs SET locked_until = NOW() - INTERVAL '1 second' WHERE id = %s", (job_id,))
+    pg.commit()
+    assert jobs._claim("w3") is None
+    job = _job(pg, job_id)
+    assert job["status"] == "failed" and job["attempts"] == 2
+    assert job["last_error"].startswith("lease expired on the final attempt")
+
+
+def test_success_is_recorded_with_result(pg):
+    kind = f"ok_{uuid.uuid4().hex}"
+    jobs.job_handler(kind)(lambda job, cursor: {"doubled": job.payload["n"] * 2})
+    job_id, _ = _enqueue(pg, kind)
+    jobs.run_job(jobs._claim("w1"))
+    job = _job(pg, job_id)
+    assert job["status"] == "succeeded" and job["result"] == {"doubled": 2} and job["progress"] == 1
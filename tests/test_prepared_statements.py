@@ -0,0 +1,149 @@
+"""Registered statements run both as PREPARE/EXECUTE and through the
+DB_PREPARED_STATEMENTS=0 fallback, which rewrites $n placeholders for psycopg2.
+
+    python -m pytest tests/test_prepared_statements.py
+"""
+import importlib
+import os
+import re
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import db_utils  # noqa: E402
+
+# Modules that register statements; main needs the full app dependencies
+STATEMENT_MODULES = ("project_repository", "main")
+
+
+class FakeConnection:
+    def __init__(self):
+        self.prepared_statements = set()
+
+
+class FakeCursor:
+    def __init__(self):
+        self.connection = FakeConnection()
+        self.query_name = None
+        self.executed = []
+
+        self.plan = None
+
+    def execute(self, query, params=None):
+        self.executed.append((query, params))
+
+    def fetchone(self):
+        return (self.plan,)
+
+
+def _registered_statements():
+    # main reads its admin token at import
+    os.environ.setdefault("API_TOKEN", "test-token")
+    for module in STATEMENT_MODULES:
+        try:
+            importlib.import_module(module)
+        except ImportError:
+            pass
+    return sorted(db_utils.PREPARED_STATEMENTS)
+
+
+def _params_for(sql):
+    count = max((int(n) for n in re.findall(r"\$(\d+)", sql)), default=0)
+    return tuple(f"v{i}" for i in range(1, count + 1))
+
+
+def _interpolate(query, params):
+    # psycopg2 parses placeholders like Python's %-formatting: %% is a literal %, any other
+    # bare % is an error and every %(name)s must have a value
+    return query % {key: repr(value) for key, value in params.items()}
+
+
+def test_fallback_binds_reused_placeholders_to_one_value():
+    query, params = db_utils.to_pyformat("SELECT $1 % 16 WHERE a = $1 AND b = $2 AND c = $10", tuple(range(1, 11)))
+    assert query == "SELECT %(p1)s %% 16 WHERE a = %(p1)s AND b = %(p2)s AND c = %(p10)s"
+    assert _interpolate(query, params) == "SELECT 1 % 16 WHERE a = 1 AND b = 2 AND c = 10"
+
+
+def test_fallback_passes_dict_params_through():
+    params = {"p1": 7}
+    assert db_utils.to_pyformat("SELECT $1", params) == ("SELECT %(p1)s", params)
+
+
+def test_fallback_without_params_leaves_percent_alone():
+    # psycopg2 only unescapes %% when it substitutes parameters
+    assert db_utils.to_pyformat("SELECT 7 % 2") == ("SELECT 7 % 2", None)
+
+
+@pytest.mark.parametrize("use_prepared, explained", [
+    (True, "EXPLAIN (SUMMARY, FORMAT JSON) EXECUTE sampled_stmt (%s, %s)"),
+    (False, "EXPLAIN (SUMMARY, FORMAT JSON) SELECT %(p1)s %% %(p2)s, %(p1)s"),
+])
+def test_sampled_planning_time_is_recorded(monkeypatch, use_prepared, explained):
+    monkeypatch.setattr(db_utils, "USE_PREPARED_STATEMENTS", use_prepared)
+    monkeypatch.setattr(db_utils, "DB_PLAN_SAMPLE_RATE", 1.0)
+    monkeypatch.setitem(db_utils.PREPARED_STATEMENTS, "sampled_stmt", "SELECT $1 % $2, $1")
+    monkeypatch.setitem(db_utils._statement_stats, "sampled_stmt", {
+        "prepare_count": 0, "execute_count": 0, "execute_seconds": 0.0, "plan_count": 0, "plan_seconds": 0.0,
+    })
+    cursor = FakeCursor()
+    cursor.plan = [{"Plan": {}, "Planning Time": 2.5}]
+    db_utils.execute_prepared(cursor, "sampled_stmt", (7, 2))
+
+    queries = [query for query, _ in cursor.executed]
+    assert explained in queries
+    assert queries[-1] == explained[len("EXPLAIN (SUMMARY, FORMAT JSON) "):]
+    stats = db_utils.statement_stats()["sampled_stmt"]
+    assert stats["plan_count"] == 1 and stats["plan_seconds"] == pytest.approx(0.0025)
+    assert stats["execute_count"] == 1
+
+
+@pytest.mark.parametrize("name", _registered_statements())
+def test_every_registered_statement_runs_unprepared(monkeypatch, name):
+    monkeypatch.setattr(db_utils, "USE_PREPARED_STATEMENTS", False)
+    monkeypatch.setattr(db_utils, "DB_PLAN_SAMPLE_RATE", 0)
+    sql = db_utils.PREPARED_STATEMENTS[name]
+    cursor = FakeCursor()
+    db_utils.execute_prepared(cursor, name, _params_for(sql))
+
+    [(query, params)] = cursor.executed
+    assert "$" not in query
+    rendered = _interpolate(query, params)
+    for i, value in enumerate(_params_for(sql), 1):
+        assert (f"${i}" in sql) == (repr(value) in rendered)
+    assert cursor.query_name is None
+
+
+@pytest.mark.parametrize("name", _registered_statements())
+def test_every_registered_statement_prepares_once(monkeypatch, name):
+    monkeypatch.setattr(db_utils, "USE_PREPARED_STATEMENTS", True)
+    monkeypatch.setattr(db_utils, "DB_PLAN_SAMPLE_RATE", 0)
+    params = _params_for(db_utils.PREPARED_STATEMENTS[name])
+    cursor = FakeCursor()
+    db_utils.execute_prepared(cursor, name, params)
+    db_utils.execute_prepared(cursor, name, params)
+
+    queries = [query for query, _ in cursor.executed]
+    assert [query.split()[0] for query in queries] == ["PREPARE", "EXECUTE", "EXECUTE"]
+    assert queries[1].count("%s") == len(params)
+    assert name in cursor.connection.prepared_statements
+
+
+def test_main_statements_are_covered():
+    if "main" not in sys.modules:
+        pytest.skip("main could not be imported")
+    assert {"insert_contribution", "bump_project_counters", "receivers_by_project"} <= set(_registered_statements())
+
+
+def test_slow_query_explain_binds_registered_statements(monkeypatch):
+    import slow_query
+
+    log = slow_query.SlowQueryLog()
+    submitted = []
+    monkeypatch.setattr(log._explainer, "submit", lambda func, *args: submitted.append(args))
+    sql = "SELECT version FROM t WHERE shard = $1 % 16 AND id = $1"
+    log._schedule_explain(slow_query.normalize(sql), sql, (42,), 500.0)
+
+    [(_, query, params, _)] = submitted
+    assert _interpolate(query, params) == "SELECT version FROM t WHERE shard = 42 % 16 AND id = 42"
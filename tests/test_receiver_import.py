@@ -0,0 +1,117 @@
+"""Bulk receiver import: format detection, streaming parsing of CSV/NDJSON uploads
+and row-level error reporting, against a fake cursor.
+
+    python -m pytest tests/test_receiver_import.py
+"""
+import io
+import os
+import sys
+from typing import Optional
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+pydantic = pytest.importorskip("pydantic")
+
+import receiver_import  # noqa: E402
+
+
+class Receiver(pydantic.BaseModel):
+    project_id: int
+    email: Optional[str] = None
+    sodienthoai: Optional[str] = None
+    address: Optional[str] = None
+    name: Optional[str] = None
+    type_receiver_wallet: Optional[str] = None
+    receiver_wallet_address: str
+
+
+class FakeCursor:
+    def __init__(self, known_projects):
+        self.known_projects = known_projects
+        self.copies = []
+        self.rowcount = 0
+        self._rows = []
+
+    def execute(self, query, params=None):
+        self._rows = []
+        if query is receiver_import.MISSING_PROJECT_SQL:
+            self._rows = [(row[0], row[1]) for row in self._staged() if row[1] not in self.known_projects]
+        elif query is receiver_import.MERGE_SQL:
+            self.rowcount = sum(1 for row in self._staged() if row[1] in self.known_projects)
+
+    def copy_expert(self, sql, buffer):
+        self.copies.append(buffer.read())
+
+    def fetchall(self):
+        return self._rows
+
+    def _staged(self):
+        import csv
+        for chunk in self.copies:
+            for row in csv.reader(io.StringIO(chunk)):
+                yield int(row[0]), int(row[1])
+
+
+@pytest.mark.parametrize("filename, content_type, fmt", [
+    ("receivers.csv", "text/csv", "csv"),
+    ("receivers.NDJSON", "application/octet-stream", "ndjson"),
+    ("receivers.jsonl", "", "ndjson"),
+    ("upload", "application/x-ndjson", "ndjson"),
+    (None, None, "csv"),
+])
+def test_detect_format(filename, content_type, fmt):
+    assert receiver_import.detect_format(filename, content_type) == fmt
+
+
+def test_iter_records_csv_drops_empty_cells_and_bom():
+    data = "\ufeffproject_id,email,receiver_wallet_address\n1,a@x.io,ADDR1\n2,,ADDR2\n".encode("utf-8")
+    records = list(receiver_import.iter_records(io.BytesIO(data), "csv"))
+    assert records == [
+        (1, {"project_id": "1", "email": "a@x.io", "receiver_wallet_address": "ADDR1"}),
+        (2, {"project_id": "2", "receiver_wallet_address": "ADDR2"}),
+    ]
+
+
+def test_iter_records_ndjson_skips_blank_lines_and_yields_parse_errors():
+    data = b'{"project_id": 1}\n\n   \nnot json\n{"project_id": 2}\n'
+    records = list(receiver_import.iter_records(io.BytesIO(data), "ndjson"))
+    assert [row for row, _ in records] == [1, 2, 3]
+    assert records[0][1] == {"project_id": 1}
+    assert isinstance(records[1][1], ValueError)
+    assert records[2][1] == {"project_id": 2}
+
+
+def test_import_reports_bad_rows_and_unknown_projects(monkeypatch):
+    monkeypatch.setattr(receiver_import, "RECEIVER_IMPORT_CHUNK_ROWS", 2)
+    records = [
+        (1, {"project_id": 1, "receiver_wallet_address": "A1"}),
+        (2, ValueError("Expecting value")),
+        (3, ["not", "an", "object"]),
+        (4, {"project_id": "x", "receiver_wallet_address": "A4"}),
+        (5, {"project_id": 9, "receiver_wallet_address": "A5"}),
+        (6, {"project_id": 1, "receiver_wallet_address": "A6"}),
+        (7, {"project_id": 1}),
+    ]
+    cursor = FakeCursor(known_projects={1})
+    report = receiver_import.import_receivers(cursor, iter(records), Receiver).to_dict()
+
+    assert len(cursor.copies) == 2  # rows 1 and 5, then row 6
+    assert report["received"] == 7
+    assert report["inserted"] == 2
+    assert report["failed"] == 5
+    assert [error["row"] for error in report["errors"]] == [2, 3, 4, 5, 7]
+    assert report["errors"][1]["errors"] == ["expected an object per line"]
+    assert report["errors"][2]["errors"][0].startswith("project_id: ")
+    assert report["errors"][3]["errors"] == ["project_id: project 9 not found"]
+    assert report["errors_truncated"] is False
+
+
+def test_error_list_is_truncated_but_still_counted(monkeypatch):
+    monkeypatch.setattr(receiver_import, "RECEIVER_IMPORT_MAX_ERRORS", 2)
+    records = [(row, ValueError("bad")) for row in range(1, 6)]
+    report = receiver_import.import_receivers(FakeCursor(set()), iter(records), Receiver).to_dict()
+    assert report["failed"] == 5
+    assert len(report["errors"]) == 2
+    assert report["errors_truncated"] is True
@@ -1,10 +1,15 @@
 import json
+import os
 from typing import Dict, List, Optional, Union
 
-from db_utils import fetch_user_chat_from_db, push_user_chat_to_db
+from db_utils import fetch_user_chat_from_db, get_db_connection, push_user_chat_to_db
 from langchain_core.messages import AIMessage, HumanMessage, SystemMessage
 from request_models import RequestModelProject
 
+# With a shared state backend, sessions live there instead of in one worker's memory
+SESSION_NAMESPACE = "chat_session"
+CHAT_SESSION_TTL_SECONDS = float(os.getenv("CHAT_SESSION_TTL_SECONDS", "3600"))
+
 
 class ChatSession:
     def __init__(
@@ -13,7 +18,9 @@ class ChatSession:
         request_id: Optional[str] = None,
         model_id: Optional[str] = None,
         model_kwargs: Optional[str] = None,
+        store=None,
     ):
+        self.store = store
         self.user_id = user_id
         self.request_id = request_id
         self.model_id = model_id
@@ -26,6 +33,12 @@ class ChatSession:
         chat_dict = {"user": json.dumps(user_input), "model": json.dumps(model_output)}
         self.chats.append(chat_dict)
         push_user_chat_to_db(self.user_id, self.request_id, chat_dict, conn)
+        self.save()
+
+    def save(self):
+        if self.store is not None and self.user_id is not None:
+            state = json.dumps({"request_id": self.request_id, "chats": self.chats})
+            self.store.set(SESSION_NAMESPACE, str(self.user_id), state, ttl=CHAT_SESSION_TTL_SECONDS)
 
     def populate_chat_from_db(self, user_id, request_id, conn):
         self.chats = fetch_user_chat_from_db(user_id, request_id, conn)
@@ -67,16 +80,46 @@ class ChatSession:
 
 
 class ChatSessionManager:
-    def __init__(self, conn):
+    def __init__(self, conn=None, store=None):
         self.sessions: Dict[str, ChatSession] = {}
+        # Without a connection one is borrowed from the pool per load, so none is held between requests
         self.conn = conn
+        self.store = store if store is not None and store.shared else None
+
+    def _populate(self, session: ChatSession, user_id: str, request_id: str):
+        if self.conn is not None:
+            session.populate_chat_from_db(user_id, request_id, self.conn)
+            return
+        conn = get_db_connection()
+        try:
+            session.populate_chat_from_db(user_id, request_id, conn)
+        finally:
+            conn.close()
+
+    def _load_shared_session(self, user_id: str, request_id: str) -> ChatSession:
+        session = ChatSession(store=self.store)
+        state = self.store.get(SESSION_NAMESPACE, str(user_id))
+        if state is None:
+            self._populate(session, user_id, request_id)
+            session.save()
+        else:
+            state = json.loads(state)
+            session.user_id = user_id
+            session.request_id = state["request_id"]
+            session.chats = state["chats"]
+        return session
 
     def get_session(self, user_id: str, request_id: str) -> ChatSession:
+        if self.store is not None:
+            # Always read through: another worker may have added chats since
+            return self._load_shared_session(user_id, request_id)
         if user_id not in self.sessions:
             self.sessions[user_id] = ChatSession()
-            self.sessions[user_id].populate_chat_from_db(user_id, request_id, self.conn)
+            self._populate(self.sessions[user_id], user_id, request_id)
         return self.sessions[user_id]
 
     def remove_session(self, user_id: str):
+        if self.store is not None:
+            self.store.delete(SESSION_NAMESPACE, str(user_id))
         if user_id in self.sessions:
             del self.sessions[user_id]